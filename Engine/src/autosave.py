@@ -0,0 +1,156 @@
+"""
+Background autosave for the editor
+The Tk thread only takes a snapshot of what changed since the last save, serializing and writing
+happen on a worker thread. Files are written to a temp file and renamed over the target, so a crash
+mid-write never leaves a truncated level behind. Polls run every interval, so a burst of edits
+becomes one write, and if the disk is slower than that the worker only ever writes the latest snapshot.
+"""
+import json
+import os
+import threading
+import time
+import traceback
+
+from level_model import Level
+from level_io import level_to_json
+from level_table import pipe_dicts, powerup_dicts
+from instrumentation import span, count
+
+
+def write_atomic(filepath, text):
+    """Writes text next to filepath and renames it into place, returns the number of bytes written"""
+    data = text.encode('utf-8')
+    temp = f"{filepath}.{os.getpid()}.tmp"
+    try:
+        with open(temp, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, filepath)
+    except BaseException:
+        # a full disk or a failed rename shouldn't leave a stray temp file next to the levels
+        try:
+            os.unlink(temp)
+        except OSError:
+            pass
+        raise
+    return len(data)
+
+
+def write_level_snapshot(directory, snapshot):
+    """
+    Worker side of the editor's autosave, snapshot is (name, gravity, bg, pipe columns, power-up
+    columns) as taken by Editor.autosave_snapshot. Written in the same JSON the Save button produces.
+    """
+    name, gravity, bg, pipes, powerups = snapshot
+    level = Level(name, gravity, bg)
+    level.pipes = pipe_dicts(pipes)
+    level.powerups = powerup_dicts(powerups)
+    os.makedirs(directory, exist_ok=True)
+    return write_atomic(os.path.join(directory, level.file_name()), json.dumps(level_to_json(level), indent=2))
+
+
+class AutoSaver:
+    """
+    snapshot() runs on the Tk thread and returns None when nothing changed, write(snapshot) runs on
+    the worker and returns the bytes written. Everything read by the Tk side is a plain attribute
+    the worker swaps in whole, so the UI never takes a lock for longer than a handoff.
+    """
+
+    def __init__(self, root, snapshot, write, interval_ms=3000, report=None):
+        self.root = root
+        self.snapshot = snapshot
+        self.write = write
+        self.interval_ms = interval_ms
+        # called on the Tk thread after every poll, e.g. to refresh a status label from stats()
+        self.report = report
+
+        # what the status label shows, the worker fills in everything but skipped and last_snapshot_ms
+        self.saves = 0
+        self.skipped = 0
+        self.last_bytes = 0
+        self.last_write_ms = 0.0
+        self.last_snapshot_ms = 0.0
+        self.last_error = None
+
+        self._pending = None
+        self._closing = False
+        self._wake = threading.Condition()
+        self._after = None
+        self._thread = threading.Thread(target=self._work, name="autosave", daemon=True)
+        self._thread.start()
+
+    def start(self):
+        self._after = self.root.after(self.interval_ms, self.poll)
+
+    def poll(self):
+        """Takes a snapshot if anything changed and hands it to the worker, then schedules the next poll"""
+        try:
+            self.save_now()
+        except Exception as e:
+            # same as a failed write: reported in stats() and tried again next poll, rather than never re-arming
+            traceback.print_exc()
+            self.last_error = f"{type(e).__name__}: {e}"
+        finally:
+            self._after = self.root.after(self.interval_ms, self.poll)
+        if self.report is not None:
+            self.report(self)
+
+    def save_now(self):
+        start = time.perf_counter()
+        snapshot = self.snapshot()
+        if snapshot is None:
+            self.skipped += 1
+            return False
+        self.last_snapshot_ms = (time.perf_counter() - start) * 1000
+        with self._wake:
+            # an older snapshot the worker hasn't reached yet is simply replaced
+            self._pending = snapshot
+            self._wake.notify()
+        return True
+
+    def _work(self):
+        while True:
+            with self._wake:
+                while self._pending is None and not self._closing:
+                    self._wake.wait()
+                snapshot, self._pending = self._pending, None
+            if snapshot is None:
+                return
+            start = time.perf_counter()
+            try:
+                with span("autosave write"):
+                    size = self.write(snapshot)
+            except OSError as e:
+                self.last_error = str(e)
+                continue
+            except Exception as e:
+                # anything else is a bug in serializing or writing, the worker carries on with the next
+                # snapshot instead of dying and silently ending every autosave after this one
+                traceback.print_exc()
+                self.last_error = f"{type(e).__name__}: {e}"
+                continue
+            self.last_write_ms = (time.perf_counter() - start) * 1000
+            self.last_bytes = size
+            count("bytes serialized", size)
+            self.last_error = None
+            self.saves += 1
+
+    def stop(self, timeout=None):
+        """Writes whatever is still dirty and waits for the worker to finish, closing never drops an edit"""
+        if self._after is not None:
+            self.root.after_cancel(self._after)
+            self._after = None
+        self.save_now()
+        with self._wake:
+            self._closing = True
+            self._wake.notify()
+        self._thread.join(timeout)
+
+    def stats(self):
+        if self.last_error:
+            return f"Autosave failed: {self.last_error}"
+        if not self.saves:
+            return ""
+        return (f"Autosaved {self.last_bytes / 1024:.1f} KB in {self.last_write_ms:.1f}ms "
+                f"(UI thread {self.last_snapshot_ms:.2f}ms)")
@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+"""
+Game config parameter sweep
+Tries every combination of swept scripts/game_config.json values on each level. The level_difficulty bots
+give a pass rate and the reachability analyzer the tightest gap margin. All combinations of a level step
+through the frames together as one set of arrays, cells (one level x one combination) are cached by level
+content and values so widening a range only simulates the new cells, and chunks of combinations fan out
+over a process pool. The picked combination is written back as a GameScript.
+
+    python config_sweep.py ../levels --jump=-350:-250:50 --gravity 700:900:100
+    python config_sweep.py ../levels --speed=-240:-160:40 --spawn-rate 2,2.5,3 --hard both --target 0.6
+    python config_sweep.py ../levels --gravity 600:1000:100 --write ../scripts/game_config.json
+    python config_sweep.py --bench 64
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from flap_physics import BIRD_START_Y, FLAP_COOLDOWN, FRAME_DT, pipe_arrays
+from level_analyzer import IMPOSSIBLE, TIGHT, analyze_arrays
+from level_difficulty import (AIM_SPREAD, JITTER, LAPSE, REACTION_FRAMES, frame_geometry, hop_offset,
+                              seed_for, simulate)
+from level_lint import file_hash
+
+# swept values in the order every combination tuple holds them, the last one is a GameScript flag
+PARAMETERS = ('bird_jump_power', 'bird_gravity', 'pipe_speed', 'pipe_spawn_rate', 'hard_mode')
+FLAGS = ('hard_mode',)
+# the modify commands main.d runs at startup repeat two of the variables, they are kept in step
+COMMAND_PARAMETERS = {('bird', 'jump_power'): 'bird_jump_power', ('game', 'gravity'): 'bird_gravity'}
+DEFAULT_CONFIG = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts",
+                                              "game_config.json"))
+
+# level files are laid out for pipes this many seconds apart, other rates stretch the spacing to match
+DEFAULT_SPAWN_RATE = 2.5
+# the engine doesn't act on hard_mode yet, the sweep plays it as gaps this much narrower around their centre
+HARD_MODE_GAP_SCALE = 0.8
+
+DEFAULT_RUNS = 500
+DEFAULT_TARGET = 0.5
+# combinations per pool task
+CHUNK = 32
+
+# bump whenever the simulation changes so cached cells from older runs are thrown away
+SWEEP_VERSION = 2
+# next to this file, so runs from any working directory share it
+DEFAULT_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".config_sweep_cache.json")
+
+
+def parse_values(text, cast=float):
+    """'a:b:step' (inclusive), 'a,b,c' or a single value"""
+    if ':' in text:
+        start, stop, step = (cast(part) for part in text.split(':'))
+        if step <= 0 or stop < start:
+            raise ValueError(f"bad range {text!r}")
+        return [cast(round(start + i * step, 6)) for i in range(int(round((stop - start) / step)) + 1)]
+    return [cast(part) for part in text.split(',')]
+
+
+def parse_flag(text):
+    return {'off': [False], 'on': [True], 'both': [False, True]}[text]
+
+
+def load_config(path):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except OSError:
+        return {"type": "GameScript", "name": "game_config", "variables": {}, "flags": {}, "commands": []}
+
+
+def config_values(config):
+    """Current value of every swept parameter, the engine's defaults where the config has none"""
+    defaults = dict(zip(PARAMETERS, (-300.0, 800.0, -200.0, DEFAULT_SPAWN_RATE, False)))
+    values = dict(defaults, **{name: value for name, value in config.get('variables', {}).items()
+                              if name in defaults})
+    values.update((name, value) for name, value in config.get('flags', {}).items() if name in defaults)
+    return tuple(values[name] for name in PARAMETERS)
+
+
+def apply_combination(config, combination, name=None):
+    """A copy of the GameScript dict with the combination's values in its variables, flags and commands"""
+    script = json.loads(json.dumps(config))
+    if name is not None:
+        script['name'] = name
+    variables = script.setdefault('variables', {})
+    flags = script.setdefault('flags', {})
+    for parameter, value in zip(PARAMETERS, combination):
+        if parameter in FLAGS:
+            flags[parameter] = bool(value)
+        else:
+            # std.json's .floating throws on an integer literal
+            variables[parameter] = float(value)
+    for command in script.get('commands', []):
+        parameter = COMMAND_PARAMETERS.get((command.get('target'), command.get('parameter')))
+        if command.get('action') == 'modify' and parameter is not None:
+            command['value'] = variables[parameter]
+    return script
+
+
+def write_game_script(script, path):
+    with open(path, 'w') as f:
+        f.write(json.dumps(script, indent=2) + "\n")
+
+
+def variant(pipes, spawn_rate, hard_mode):
+    """The pipes as a run at this spawn rate and hard mode meets them, the first pipe stays where it is"""
+    if not pipes:
+        return []
+    stretch = spawn_rate / DEFAULT_SPAWN_RATE
+    first = min(pipe['x'] for pipe in pipes)
+    scale = HARD_MODE_GAP_SCALE if hard_mode else 1.0
+    return [dict(pipe, x=first + (pipe['x'] - first) * stretch,
+                 gap_top=pipe['gap_top'] + pipe['gap_height'] * (1 - scale) / 2,
+                 gap_height=pipe['gap_height'] * scale) for pipe in pipes]
+
+
+def simulate_combinations(level, combinations, runs=DEFAULT_RUNS, seed=0):
+    """
+    Pipes cleared by each bot run under each combination, shape (runs, combinations). Column c is exactly
+    what level_difficulty.simulate gives for combination c on its own: every combination replays the same
+    bots with the same noise, so cells don't depend on what else was swept with them and differences
+    between combinations aren't drowned in sampling noise.
+    """
+    rng = np.random.default_rng(seed_for(level, seed))
+    # combinations that only differ in jump power or gravity share a frame geometry
+    layouts = {}
+    for combination in combinations:
+        layouts.setdefault(combination[2:], len(layouts))
+    geometries = [frame_geometry(variant(level.pipes, rate, hard), speed) for speed, rate, hard in layouts]
+    frames = max(geometry[0] for geometry in geometries)
+
+    # past the end of its own level a layout has no walls, its runs are done
+    shape = (frames + 1, len(layouts))
+    lo = np.full(shape, -np.inf)
+    hi = np.full(shape, np.inf)
+    cleared = np.full(shape, len(level.pipes))
+    centre = np.full(shape, float(BIRD_START_Y))
+    gap = np.zeros(shape)
+    for i, (end, g_lo, g_hi, g_cleared, g_centre, g_gap) in enumerate(geometries):
+        lo[:end + 1, i] = g_lo
+        hi[:end + 1, i] = g_hi
+        cleared[:end + 1, i] = g_cleared
+        centre[:end + 1, i] = g_centre
+        gap[:end + 1, i] = g_gap
+
+    layout = np.array([layouts[combination[2:]] for combination in combinations])
+    jump_power = np.array([combination[0] for combination in combinations], dtype=np.float64)
+    gravity = np.array([combination[1] for combination in combinations], dtype=np.float64)
+    lift = hop_offset(jump_power, gravity)
+
+    # drawn in the same order as simulate(), one bot per row shared across the columns
+    delay = rng.integers(REACTION_FRAMES[0], REACTION_FRAMES[1] + 1, runs)
+    aim = rng.normal(0.0, AIM_SPREAD, runs)[:, None]
+    history = np.full((REACTION_FRAMES[1] + 1, runs, len(combinations)), float(BIRD_START_Y))
+    rows = np.arange(runs)
+
+    y = np.full((runs, len(combinations)), float(BIRD_START_Y))
+    v = np.zeros(y.shape)
+    # frames since each bot's last flap
+    since = np.full(y.shape, FLAP_COOLDOWN)
+    alive = np.ones(y.shape, dtype=bool)
+    death = np.full(y.shape, frames)
+    for f in range(frames):
+        history[f % len(history)] = y
+        seen = history[(f - delay) % len(history), rows]
+        target = centre[f, layout] + lift + aim * gap[f, layout] + rng.normal(0.0, JITTER, runs)[:, None]
+        flap = (seen > target) & (since >= FLAP_COOLDOWN) & (rng.random(runs) >= LAPSE)[:, None]
+        v = np.where(flap, jump_power, v) + gravity * FRAME_DT
+        y += np.trunc(v * FRAME_DT)
+        since = np.where(flap, 1, since + 1)
+
+        dead = alive & ((y < lo[f + 1, layout]) | (y > hi[f + 1, layout]))
+        if dead.any():
+            death[dead] = f + 1
+            alive &= ~dead
+            if not alive.any():
+                break
+    return np.where(alive, len(level.pipes), cleared[death, layout])
+
+
+def margins(level, combinations):
+    """
+    (smallest reachable band in px, tight pipes, impossible pipes) per combination. Layout variants that
+    share a jump power, gravity and pipe speed go through the analyzer as one concatenated run.
+    """
+    groups = {}
+    for combination in combinations:
+        groups.setdefault(combination[:3], set()).add(combination[3:])
+    found = {}
+    for (jump_power, gravity, pipe_speed), layouts in groups.items():
+        layouts = sorted(layouts)
+        if not level.pipes:
+            found.update(((jump_power, gravity, pipe_speed, *key), (None, 0, 0)) for key in layouts)
+            continue
+        arrays = [pipe_arrays(variant(level.pipes, rate, hard))[1:] for rate, hard in layouts]
+        left, width, top, bottom = (np.concatenate(column) for column in zip(*arrays))
+        starts = np.zeros(len(left), dtype=bool)
+        starts[np.arange(len(layouts)) * len(level.pipes)] = True
+        status, margin = analyze_arrays(left, width, top, bottom, starts, gravity, jump_power, pipe_speed)
+        for key, part in zip(layouts, range(0, len(left), len(level.pipes))):
+            part = slice(part, part + len(level.pipes))
+            found[(jump_power, gravity, pipe_speed, *key)] = (
+                int(margin[part].min()), int(np.count_nonzero(status[part] == TIGHT)),
+                int(np.count_nonzero(status[part] == IMPOSSIBLE)))
+    return [found[tuple(combination)] for combination in combinations]
+
+
+def sweep_level(level, combinations, runs=DEFAULT_RUNS, seed=0):
+    """One result dict per combination: pass rate, mean pipes cleared and the analyzer's margins"""
+    outcome = simulate_combinations(level, combinations, runs, seed)
+    pipes = len(level.pipes)
+    return [{"pass": round(float(np.mean(column == pipes)), 4), "cleared": round(float(column.mean()), 3),
+             "margin": margin, "tight": tight, "impossible": impossible}
+            for column, (margin, tight, impossible) in zip(outcome.T, margins(level, combinations))]
+
+
+def sweep_job(job):
+    path, combinations, runs, seed = job
+    from level_io import load_any_level_file
+    return sweep_level(load_any_level_file(path), combinations, runs, seed)
+
+
+def cell_key(combination, runs, seed):
+    return json.dumps([runs, seed, *combination])
+
+
+def load_cache(cache_path):
+    try:
+        with open(cache_path, 'r') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if cache.get('version') != SWEEP_VERSION:
+        return {}
+    return cache.get('levels', {})
+
+
+def save_cache(cache_path, levels):
+    with open(cache_path, 'w') as f:
+        json.dump({'version': SWEEP_VERSION, 'levels': levels}, f)
+
+
+def sweep(paths, combinations, runs=DEFAULT_RUNS, seed=0, workers=None, cache=None):
+    """
+    {path: [result per combination]} and the number of cells that had to be simulated. cache maps level
+    content hash -> {cell key: result} and is updated in place, only cells missing from it are simulated.
+    """
+    cache = {} if cache is None else cache
+    hashes = {path: file_hash(path) for path in paths}
+    jobs = []
+    for path in paths:
+        cells = cache.setdefault(hashes[path], {})
+        todo = [combination for combination in combinations if cell_key(combination, runs, seed) not in cells]
+        jobs.extend((path, todo[i:i + CHUNK], runs, seed) for i in range(0, len(todo), CHUNK))
+    if workers == 1 or len(jobs) < 2:
+        fresh = [sweep_job(job) for job in jobs]
+    else:
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            fresh = list(pool.map(sweep_job, jobs))
+    for (path, todo, _, _), results in zip(jobs, fresh):
+        for combination, result in zip(todo, results):
+            cache[hashes[path]][cell_key(combination, runs, seed)] = result
+    table = {path: [cache[hashes[path]][cell_key(combination, runs, seed)] for combination in combinations]
+             for path in paths}
+    return table, sum(len(job[1]) for job in jobs)
+
+
+def summarize(results):
+    """Mean pass rate and smallest margin over a row of level results, None margins are levels with no pipes"""
+    found = [result['margin'] for result in results if result['margin'] is not None]
+    return (sum(result['pass'] for result in results) / len(results), min(found, default=None),
+            sum(result['impossible'] for result in results))
+
+
+def rank(combinations, rows, target):
+    """
+    Combination indices best first: no impossible pipe on any level, then mean pass rate closest to target,
+    then the widest smallest margin
+    """
+    def order(i):
+        passed, margin, impossible = summarize(rows[i])
+        return (impossible > 0, round(abs(passed - target), 4), -(margin or 0))
+    return sorted(range(len(combinations)), key=order)
+
+
+def format_combination(combination):
+    jump_power, gravity, pipe_speed, spawn_rate, hard_mode = combination
+    return f"{jump_power:>7g} {gravity:>7g} {pipe_speed:>7g} {spawn_rate:>5g} {'on' if hard_mode else 'off':>4}"
+
+
+def print_table(paths, combinations, table, order):
+    names = [os.path.splitext(os.path.basename(path))[0][:14] for path in paths]
+    print(f"{'jump':>7} {'gravity':>7} {'speed':>7} {'rate':>5} {'hard':>4} | {'pass':>5} {'margin':>6} |"
+          + "".join(f" {name:>14}" for name in names))
+    for i in order:
+        rows = [table[path][i] for path in paths]
+        passed, margin, _ = summarize(rows)
+        cells = "".join(f" {result['pass']:>7.0%} {'-' if result['margin'] is None else result['margin']:>4}px"
+                        if not result['impossible'] else f" {result['pass']:>7.0%} {'IMPOS':>6}" for result in rows)
+        print(f"{format_combination(combinations[i])} | {passed:>5.0%} {'-' if margin is None else margin:>4}px |"
+              + cells)
+
+
+def bench(count, runs):
+    """Batched sweep of one generated level against the same combinations simulated one at a time"""
+    from level_generator import LevelGenerator, GeneratorBounds
+    level = next(iter(LevelGenerator(0, GeneratorBounds(pipes=(20, 20)), batch=1)))
+    jumps = np.linspace(-380.0, -260.0, 4)
+    gravities = np.linspace(600.0, 1000.0, max(1, count // 16))
+    combinations = list(itertools.product(jumps, gravities, (-240.0, -200.0), (2.5, 3.0), (False,)))[:count]
+    start = time.perf_counter()
+    outcome = simulate_combinations(level, combinations, runs)
+    batched = time.perf_counter() - start
+    start = time.perf_counter()
+    for i, (jump_power, gravity, pipe_speed, rate, hard) in enumerate(combinations):
+        rng = np.random.default_rng(seed_for(level, 0))
+        single = simulate(variant(level.pipes, rate, hard), gravity, runs, rng, jump_power, pipe_speed)
+        if not np.array_equal(single, outcome[:, i]):
+            raise AssertionError(f"combination {i} differs from simulate()")
+    serial = time.perf_counter() - start
+    start = time.perf_counter()
+    margins(level, combinations)
+    analyzed = time.perf_counter() - start
+    print(f"{len(combinations)} combinations x {runs} runs on {len(level.pipes)} pipes: batched {batched:.2f}s, "
+          f"one at a time {serial:.2f}s ({serial / batched:.1f}x), margins {analyzed * 1000:.0f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep game_config.json values over levels with simulated runs",
+                                     epilog="ranges are start:stop:step (inclusive) or comma separated values, "
+                                            "write negative ones as --jump=-350:-250:50")
+    parser.add_argument("levels", nargs="*", help="level files or directories")
+    parser.add_argument("--config", default=DEFAULT_CONFIG, help=f"GameScript to start from (default: {DEFAULT_CONFIG})")
+    parser.add_argument("--jump", help="bird_jump_power values")
+    parser.add_argument("--gravity", help="bird_gravity values, used in place of each level's own")
+    parser.add_argument("--speed", help="pipe_speed values")
+    parser.add_argument("--spawn-rate", help="pipe_spawn_rate values, seconds between pipes")
+    parser.add_argument("--hard", choices=("off", "on", "both"), help="hard_mode values")
+    parser.add_argument("-n", "--runs", type=int, default=DEFAULT_RUNS, help="bot runs per cell")
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--target", type=float, default=DEFAULT_TARGET,
+                        help=f"pass rate the picked combination should come closest to (default: {DEFAULT_TARGET})")
+    parser.add_argument("--top", type=int, default=20, help="rows to print, best first (0 for all)")
+    parser.add_argument("--write", metavar="PATH", help="write the best combination over all levels as a GameScript")
+    parser.add_argument("--per-level", metavar="DIR", help="write each level's best combination as <level>_config.json")
+    parser.add_argument("--json", metavar="PATH", help="also write the whole table as JSON")
+    parser.add_argument("--cache", default=DEFAULT_CACHE, help=f"cell cache file (default: {DEFAULT_CACHE})")
+    parser.add_argument("--no-cache", action="store_true", help="simulate every cell again")
+    parser.add_argument("--bench", type=int, metavar="N", help="time N combinations batched against one at a time")
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        bench(args.bench, args.runs)
+        return 0
+    from level_io import LEVEL_EXTENSIONS, level_files
+    paths = level_files(args.levels, LEVEL_EXTENSIONS)
+    if not paths:
+        parser.error("no level files given")
+    config = load_config(args.config)
+    values = [[value] for value in config_values(config)]
+    try:
+        for i, text in ((0, args.jump), (1, args.gravity), (2, args.speed), (3, args.spawn_rate)):
+            if text is not None:
+                values[i] = parse_values(text)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.hard is not None:
+        values[4] = parse_flag(args.hard)
+    if any(value >= 0 for value in values[0] + values[2]) or any(value <= 0 for value in values[1] + values[3]):
+        parser.error("jump power and pipe speed must be negative, gravity and spawn rate positive")
+    combinations = list(itertools.product(*values))
+
+    cache = {} if args.no_cache else load_cache(args.cache)
+    start = time.perf_counter()
+    table, simulated = sweep(paths, combinations, args.runs, args.seed, args.jobs, cache)
+    elapsed = time.perf_counter() - start
+    if not args.no_cache:
+        # only levels in this sweep are kept, so edited levels don't pile up stale cells
+        hashes = {file_hash(path) for path in paths}
+        save_cache(args.cache, {key: cells for key, cells in cache.items() if key in hashes})
+
+    rows = [[table[path][i] for path in paths] for i in range(len(combinations))]
+    order = rank(combinations, rows, args.target)
+    print_table(paths, combinations, table, order[:args.top] if args.top else order)
+    if args.top and len(order) > args.top:
+        print(f"... {len(order) - args.top} more")
+    print(f"{len(combinations)} combinations x {len(paths)} levels, {simulated} cells simulated "
+          f"({len(combinations) * len(paths) - simulated} cached) in {elapsed:.2f}s")
+
+    best = combinations[order[0]]
+    print(f"best for a {args.target:.0%} pass rate: " + ", ".join(
+        f"{name}={value}" for name, value in zip(PARAMETERS, best)))
+    if args.write:
+        write_game_script(apply_combination(config, best), args.write)
+        print(f"wrote {args.write}")
+    if args.per_level:
+        os.makedirs(args.per_level, exist_ok=True)
+        for path in paths:
+            name = os.path.splitext(os.path.basename(path))[0] + "_config"
+            best = combinations[rank(combinations, [[result] for result in table[path]], args.target)[0]]
+            write_game_script(apply_combination(config, best, name), os.path.join(args.per_level, name + ".json"))
+        print(f"wrote {len(paths)} level configs to {args.per_level}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump([dict(zip(PARAMETERS, combination), levels={path: table[path][i] for path in paths})
+                       for i, combination in enumerate(combinations)], f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
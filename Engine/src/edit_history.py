@@ -0,0 +1,119 @@
+"""
+Undo/redo command log for the level editor
+Every edit is recorded as a pair of (callable, args) deltas that only name what changed: row numbers
+for adds and removes (the tables keep dead rows, so undoing a remove just revives the row), old and
+new field values for edits. Loading or clearing swaps whole tables, those entries hold on to the
+replaced tables as their checkpoint rather than copying anything, so every undo and redo costs
+O(changed objects). Entries carry a byte estimate and the oldest ones are evicted past the budget.
+"""
+import time
+from collections import deque
+
+# memory the history may keep alive, checkpoints count their tables
+DEFAULT_BUDGET = 32 * 1024 * 1024
+# bytes charged for a delta that only holds a few numbers
+DELTA_SIZE = 200
+# consecutive edits with the same merge key this close together become one undo step
+MERGE_SECONDS = 1.0
+
+
+def _chain(first, second):
+    for func, args in (first, second):
+        func(*args)
+
+
+class Command:
+    __slots__ = ('label', 'undo', 'redo', 'size', 'merge_key', 'time')
+
+    def __init__(self, label, undo, redo, size, merge_key):
+        self.label = label
+        self.undo = undo
+        self.redo = redo
+        self.size = size
+        self.merge_key = merge_key
+        self.time = time.monotonic()
+
+
+class EditHistory:
+    def __init__(self, budget=DEFAULT_BUDGET):
+        self.budget = budget
+        self.done = deque()
+        self.undone = []
+        self.size = 0
+        self.evicted = 0
+        # set while a delta is being replayed, so the edits it makes aren't recorded again
+        self.replaying = False
+
+    def record(self, label, undo, redo, size=DELTA_SIZE, merge_key=None):
+        """undo and redo are (callable, args) pairs"""
+        if self.replaying:
+            return
+        for command in self.undone:
+            self.size -= command.size
+        self.undone = []
+
+        top = self.done[-1] if self.done else None
+        if (merge_key is not None and top is not None and top.merge_key == merge_key
+                and time.monotonic() - top.time < MERGE_SECONDS):
+            # keep the oldest undo, take the newest redo
+            top.redo = redo
+            top.time = time.monotonic()
+            return
+
+        self.done.append(Command(label, undo, redo, size, merge_key))
+        self.size += size
+        while self.size > self.budget and len(self.done) > 1:
+            self.size -= self.done.popleft().size
+            self.evicted += 1
+
+    def attach(self, undo, redo, size=DELTA_SIZE):
+        """
+        Folds a follow-up delta into the newest step, undone before and redone after the step's own
+        delta. The editor attaches table compaction to the edit that left the tables sparse
+        """
+        if self.replaying or not self.done:
+            return
+        top = self.done[-1]
+        top.undo = (_chain, (undo, top.undo))
+        top.redo = (_chain, (top.redo, redo))
+        top.size += size
+        # a later merge would replace the redo and drop the attached half
+        top.merge_key = None
+        self.size += size
+        while self.size > self.budget and len(self.done) > 1:
+            self.size -= self.done.popleft().size
+            self.evicted += 1
+
+    def _replay(self, delta):
+        func, args = delta
+        self.replaying = True
+        try:
+            func(*args)
+        finally:
+            self.replaying = False
+
+    def undo(self):
+        if not self.done:
+            return None
+        command = self.done.pop()
+        self._replay(command.undo)
+        self.undone.append(command)
+        return command.label
+
+    def redo(self):
+        if not self.undone:
+            return None
+        command = self.undone.pop()
+        self._replay(command.redo)
+        self.done.append(command)
+        return command.label
+
+    def clear(self):
+        self.done.clear()
+        self.undone = []
+        self.size = 0
+        self.evicted = 0
+
+    def stats(self):
+        return (f"{len(self.done)} undo / {len(self.undone)} redo steps, {self.size / 1024:.0f} KB of "
+                f"{self.budget / 1024:.0f} KB, {self.evicted} evicted")
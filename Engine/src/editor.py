@@ -4,11 +4,52 @@ Flappy Bird Level Editor
 Just click to place pipes, adjust settings, and save
 """
 import tkinter as tk
-from tkinter import ttk, messagebox, filedialog, colorchooser
-import json
+from tkinter import ttk, messagebox, filedialog, colorchooser, simpledialog
+from array import array
 import os
+import random
+
+from level_model import Level, clamp_gap_top
+from level_io import save_level_file, load_level_file
+from level_binary import write_level_binary, read_level_binary, is_binary_level
+from scene_layer import SceneLayer
+from level_table import PipeTable, PowerupTable, POWERUP_EXTENT
+from update_scheduler import UpdateScheduler
+from edit_history import EditHistory
+from autosave import AutoSaver, write_level_snapshot
+from hot_reload import HotReloadPublisher
+from instrumentation import timed, span, count, FrameMonitor, Sampler, export_chrome_trace
+import instrumentation
+
+try:
+    from level_analyzer import analyze_columns, STATUS_NAMES
+    from level_difficulty import estimate_level
+    from level_generator import LevelGenerator, GeneratorBounds
+    from level_thumbnail import render_columns, to_ppm, ThumbnailCache
+    from level_browser import LevelBrowser
+    import pipe_transforms
+except ImportError:
+    # the playability, difficulty, generator, thumbnail and bulk transform tools need numpy, the editor works without them
+    analyze_columns = estimate_level = LevelGenerator = render_columns = pipe_transforms = None
 
 class Editor:
+    # spinbox limits, settings outside them are never applied
+    WIDTH_RANGE = (30, 100)
+    GAP_RANGE = (80, 250)
+    GRAVITY_RANGE = (400, 1500)
+    # at most one settings redraw per this many ms
+    SETTINGS_FRAME_MS = 16
+    # Engine/levels, found from this file rather than the cwd so launching from anywhere writes into the repo
+    LEVELS_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "levels"))
+    # autosaves go in a subfolder, the game only lists the .json files directly in levels/
+    AUTOSAVE_DIR = os.path.join(LEVELS_DIR, "autosave")
+    AUTOSAVE_MS = 3000
+    # the engine can't load the prefab form, those saves default to a subfolder the game doesn't list
+    PREFABS_DIR = os.path.join(LEVELS_DIR, "prefabs")
+    # whole-level strip above the canvas, redrawn at most this often
+    MINIMAP_HEIGHT = 40
+    MINIMAP_FRAME_MS = 100
+
     def __init__(self, root):
         self.root = root
         self.root.title("Flappy Bird Level Editor")
@@ -24,19 +65,47 @@ class Editor:
         self.canvas_width = 800
         self.canvas_height = 600
 
-        # pipes storage
-        self.pipes = []
+        # pipes storage: column table keyed by row, rows grow so row order is placement order
+        self.pipes = PipeTable()
         self.selected_pipe = None
+        # range selection: rows picked with a shift-drag, transformed together from the Selection menu
+        self.selection = frozenset()
+        self.clipboard = None
+        self._band = None
 
-        # power-ups storage: list of dicts with {x,y, type}
-        self.powerups = []
+        # power-ups storage: {x, y, type code} columns, same row keys
+        self.powerups = PowerupTable()
         self.selected_powerup_type = None 
 
         self.bg_r = 135
         self.bg_g = 206
         self.bg_b = 235
+
+        # set while select_pipe syncs the spinboxes so the traces don't write back
+        self._syncing_vars = False
+        # generated levels handed out by the Generate button, started on first use
+        self.level_stream = None
+        self.settings_updates = UpdateScheduler(self.root, self.update_settings, self.SETTINGS_FRAME_MS)
+        self.minimap = None
+        self.minimap_updates = UpdateScheduler(self.root, self.draw_minimap, self.MINIMAP_FRAME_MS)
+        # thumbnails for the Load browser, opened on first use
+        self.thumbnails = None
+        # undo/redo log, edits are stored as deltas against the tables above
+        self.history = EditHistory()
         self.setup_ui()
 
+        # the level as it was last handed to the autosave worker, only tables whose revision moved get copied again
+        self._autosaved = self.autosave_state()
+        self._autosave_columns = (self.pipes.snapshot(), self.powerups.snapshot())
+        self.autosave = AutoSaver(self.root, self.autosave_snapshot,
+                                  lambda snapshot: write_level_snapshot(self.AUTOSAVE_DIR, snapshot),
+                                  self.AUTOSAVE_MS, report=lambda saver: self.autosave_label.config(text=saver.stats()))
+        self.autosave.start()
+        # streams edits to a running game, off until the Live checkbox is ticked
+        self.live = HotReloadPublisher(self.root, self.level_state,
+                                       report=lambda publisher: self.live_label.config(text=publisher.stats()))
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
     def setup_ui(self):
         control_frame = tk.Frame(self.root, bg='lightgray', height=150)
         control_frame.pack(fill=tk.X, padx=5, pady=5)
@@ -51,34 +120,50 @@ class Editor:
         self.name_entry.pack(side=tk.LEFT, padx=5)
         tk.Label(row1, text="Pipe Width:", bg='lightgray').pack(side=tk.LEFT, padx=5)
         self.width_var = tk.IntVar(value=self.pipe_width)
-        self.width_spin = tk.Spinbox(row1, from_=30, to=100, width=10,
+        self.width_spin = tk.Spinbox(row1, from_=self.WIDTH_RANGE[0], to=self.WIDTH_RANGE[1], width=10,
                                       textvariable=self.width_var,
-                                      command=self.update_settings)
-        self.width_var.trace('w', lambda *args: self.update_settings())
+                                      command=self.schedule_settings_update)
+        self.width_var.trace('w', lambda *args: self.schedule_settings_update())
         self.width_spin.pack(side=tk.LEFT, padx=5)
 
         tk.Label(row1, text="Gap Height:", bg='lightgray').pack(side=tk.LEFT, padx=5)
         self.gap_var = tk.IntVar(value=self.pipe_gap)
-        self.gap_spin = tk.Spinbox(row1, from_=80, to=250, width=10,
+        self.gap_spin = tk.Spinbox(row1, from_=self.GAP_RANGE[0], to=self.GAP_RANGE[1], width=10,
                                     textvariable=self.gap_var,
-                                    command=self.update_settings)
-        self.gap_var.trace('w', lambda *args: self.update_settings())
+                                    command=self.schedule_settings_update)
+        self.gap_var.trace('w', lambda *args: self.schedule_settings_update())
         self.gap_spin.pack(side=tk.LEFT, padx=5)
 
         tk.Label(row1, text="Gravity:", bg='lightgray').pack(side=tk.LEFT, padx=5)
         self.gravity_var = tk.DoubleVar(value=self.gravity)
-        self.gravity_spin = tk.Spinbox(row1, from_=400, to=1500, increment=50, width=10,
-                                       textvariable=self.gravity_var,
-                                       command=self.update_settings)
-        self.gravity_var.trace('w', lambda *args: self.update_settings())
+        self.gravity_spin = tk.Spinbox(row1, from_=self.GRAVITY_RANGE[0], to=self.GRAVITY_RANGE[1], increment=50,
+                                       width=10, textvariable=self.gravity_var,
+                                       command=self.schedule_settings_update)
+        self.gravity_var.trace('w', lambda *args: self.schedule_settings_update())
         self.gravity_spin.pack(side=tk.LEFT, padx=5)
 
         row2 = tk.Frame(control_frame, bg='lightgray')
         row2.pack(pady=5)
         tk.Button(row2, text="Save Level", command=self.save_level, bg='green', fg='black', width=12).pack(side=tk.LEFT, padx=5)
+        # adds level_broadphase's x-sorted collider index to saved JSON
+        self.broadphase_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(row2, text="Collision index", variable=self.broadphase_var, bg='lightgray').pack(side=tk.LEFT)
+        # writes the compact prefab form, level_prefab.py expands it again for the engine
+        self.prefabs_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(row2, text="Prefabs", variable=self.prefabs_var, bg='lightgray').pack(side=tk.LEFT)
         tk.Button(row2, text="Load Level", command=self.load_level,
                  bg='blue', fg='black', width=12).pack(side=tk.LEFT, padx=5)
         tk.Button(row2, text="Clear All", command=self.clear_all, bg='red', fg='black', width=12).pack(side=tk.LEFT, padx=5)
+        tk.Button(row2, text="Undo", command=self.undo, width=6).pack(side=tk.LEFT, padx=2)
+        tk.Button(row2, text="Redo", command=self.redo, width=6).pack(side=tk.LEFT, padx=2)
+        self.playability_label = tk.Label(row2, text="", bg='lightgray')
+        self.playability_label.pack(side=tk.LEFT, padx=10)
+        if LevelGenerator is not None:
+            tk.Button(row2, text="Generate", command=self.generate_level, width=10).pack(side=tk.LEFT, padx=5)
+        if estimate_level is not None:
+            tk.Button(row2, text="Difficulty", command=self.estimate_difficulty, width=10).pack(side=tk.LEFT, padx=5)
+            self.difficulty_label = tk.Label(row2, text="", bg='lightgray')
+            self.difficulty_label.pack(side=tk.LEFT, padx=5)
         powerup_frame = tk.Frame(control_frame, bg='lightgray')
         powerup_frame.pack(pady=5)
 
@@ -88,12 +173,48 @@ class Editor:
                  bg='cyan', fg='black', width=14).pack(side=tk.LEFT, padx=2)
         tk.Button(powerup_frame, text="Shrink", command=lambda: self.select_powerup_type('shrink'),
                  bg='pink', fg='black', width=14).pack(side=tk.LEFT, padx=2)
+        if pipe_transforms is not None:
+            selection_button = tk.Menubutton(powerup_frame, text="Selection", relief=tk.RAISED, width=10)
+            menu = tk.Menu(selection_button, tearoff=0)
+            menu.add_command(label="Shift...", command=self.ask_shift)
+            menu.add_command(label="Scale Spacing...", command=self.ask_scale_spacing)
+            menu.add_command(label="Mirror", command=lambda: self.transform_selection("mirror", pipe_transforms.mirror))
+            menu.add_command(label="Set Gap Height...", command=self.ask_gap_height)
+            menu.add_command(label="Randomize Gap Height...", command=self.ask_random_gap_height)
+            menu.add_command(label="Jitter Gap Top...", command=self.ask_jitter)
+            menu.add_separator()
+            menu.add_command(label="Copy", command=self.copy_selection, accelerator="Ctrl+C")
+            menu.add_command(label="Paste", command=self.paste_selection, accelerator="Ctrl+V")
+            menu.add_command(label="Delete", command=self.delete_selection, accelerator="Del")
+            menu.add_separator()
+            menu.add_command(label="Select Range...", command=self.ask_select_range)
+            menu.add_command(label="Select All", command=lambda: self.set_selection(self.pipes), accelerator="Ctrl+A")
+            menu.add_command(label="Clear Selection", command=lambda: self.set_selection(()), accelerator="Esc")
+            selection_button.config(menu=menu)
+            selection_button.pack(side=tk.LEFT, padx=10)
+        self.selection_label = tk.Label(powerup_frame, text="", bg='lightgray')
+        self.selection_label.pack(side=tk.LEFT, padx=5)
 
         # background color row
         bgcolor_frame = tk.Frame(control_frame, bg='lightgray')
         bgcolor_frame.pack(pady=5)
         tk.Label(bgcolor_frame, text="BG Color:", bg='lightgray', font=('Arial', 10, 'bold')).pack(side=tk.LEFT, padx=5)
         tk.Button(bgcolor_frame, text="Pick Color", command=self.pick_bg_color, bg='orange', fg='black', width=12).pack(side=tk.LEFT, padx=2)
+        self.autosave_label = tk.Label(bgcolor_frame, text="", bg='lightgray')
+        self.autosave_label.pack(side=tk.LEFT, padx=10)
+        self.live_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(bgcolor_frame, text="Live", variable=self.live_var, command=self.toggle_live,
+                       bg='lightgray').pack(side=tk.LEFT, padx=5)
+        self.live_label = tk.Label(bgcolor_frame, text="", bg='lightgray')
+        self.live_label.pack(side=tk.LEFT, padx=5)
+        # instrumentation, off unless ticked: frame times over the canvas, optional stack sampling, trace export
+        self.profile_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(bgcolor_frame, text="Profile", variable=self.profile_var, command=self.toggle_profiling,
+                       bg='lightgray').pack(side=tk.LEFT, padx=5)
+        self.sample_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(bgcolor_frame, text="Sample", variable=self.sample_var, command=self.toggle_sampling,
+                       bg='lightgray').pack(side=tk.LEFT)
+        tk.Button(bgcolor_frame, text="Export Trace", command=self.export_trace, width=10).pack(side=tk.LEFT, padx=5)
 
         # canvas with scrollbar
         canvas_frame = tk.Frame(self.root, bg='white')
@@ -102,18 +223,59 @@ class Editor:
         # horizontal scrollbar
         h_scrollbar = tk.Scrollbar(canvas_frame, orient=tk.HORIZONTAL)
         h_scrollbar.pack(side=tk.BOTTOM, fill=tk.X)
-        self.actual_canvas_width = 6000  
+        self.h_scrollbar = h_scrollbar
+
+        # scroll region grows with the level, always leaving room to keep placing pipes
+        self.min_canvas_width = 6000
+        self.scroll_padding = 2000
+        self.actual_canvas_width = self.min_canvas_width
+
+        # only objects within this many px of the visible area get canvas items
+        self.view_margin = self.canvas_width
+        self.viewport = None
+
+        if render_columns is not None:
+            # the whole level squeezed into the canvas width, click or drag to jump there
+            self.minimap = tk.Canvas(canvas_frame, width=self.canvas_width, height=self.MINIMAP_HEIGHT,
+                                     highlightthickness=0)
+            self.minimap.pack(side=tk.TOP, fill=tk.X)
+            self.minimap_photo = None
+            self.minimap_image = self.minimap.create_image(0, 0, anchor=tk.NW)
+            self.minimap_view = self.minimap.create_rectangle(0, 0, 0, self.MINIMAP_HEIGHT - 1, outline='red', width=2)
+            self.minimap.bind('<Button-1>', self.minimap_jump)
+            self.minimap.bind('<B1-Motion>', self.minimap_jump)
 
         self.canvas = tk.Canvas(canvas_frame, bg='skyblue', width=self.canvas_width,
                                height=self.canvas_height, scrollregion=(0, 0, self.actual_canvas_width, self.canvas_height),
-                               xscrollcommand=h_scrollbar.set)
+                               xscrollcommand=self.on_xscroll)
         self.canvas.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+        # a widget placed over the canvas rather than canvas items, so showing it doesn't disturb what it measures
+        self.profile_overlay = tk.Label(self.canvas, text="", bg='black', fg='white', font=('Courier', 9),
+                                        justify=tk.LEFT)
+        self.frame_monitor = FrameMonitor(self.root, report=self.report_frames, log=self.note_slow_frame)
+        # the latest slow frame the monitor logged, shown on the overlay
+        self.slow_frame = ""
+        self.sampler = Sampler()
 
         h_scrollbar.config(command=self.canvas.xview)
 
         self.canvas.bind('<Button-1>', self.add_pipe)
         self.canvas.bind('<Button-2>', self.select_pipe)  
         self.canvas.bind('<Button-3>', self.remove_pipe)
+        # shift-drag selects every pipe whose x falls inside the band
+        self.canvas.bind('<Shift-Button-1>', self.start_band)
+        self.canvas.bind('<B1-Motion>', self.drag_band)
+        self.canvas.bind('<ButtonRelease-1>', self.end_band)
+        self.root.bind('<Control-a>', self.selection_key(lambda: self.set_selection(self.pipes)))
+        self.root.bind('<Escape>', lambda event: self.set_selection(()))
+        self.root.bind('<Delete>', self.selection_key(self.delete_selection))
+        if pipe_transforms is not None:
+            self.root.bind('<Control-c>', self.selection_key(self.copy_selection))
+            self.root.bind('<Control-v>', self.selection_key(self.paste_selection))
+        self.root.bind('<Control-z>', lambda event: self.undo())
+        self.root.bind('<Control-y>', lambda event: self.redo())
+        self.root.bind('<Control-Shift-Z>', lambda event: self.redo())
+        self.scene = SceneLayer(self.canvas, self.canvas_height)
         self.draw_canvas()
 
     def select_powerup_type(self, powerup_type):
@@ -123,418 +285,694 @@ class Editor:
     def pick_bg_color(self):
         color = colorchooser.askcolor(color=(self.bg_r, self.bg_g, self.bg_b))
         if color[0]:  
-            self.bg_r = int(color[0][0])
-            self.bg_g = int(color[0][1])
-            self.bg_b = int(color[0][2])
-            self.draw_canvas()
+            old = (self.bg_r, self.bg_g, self.bg_b)
+            new = (int(color[0][0]), int(color[0][1]), int(color[0][2]))
+            self.set_background_color(new)
+            self.history.record("background color", (self.set_background_color, (old,)),
+                                (self.set_background_color, (new,)))
             print(f"Selected BG color: RGB({self.bg_r}, {self.bg_g}, {self.bg_b})")
 
+    def set_background_color(self, rgb):
+        self.bg_r, self.bg_g, self.bg_b = rgb
+        self.scene.set_background(self.bg_r, self.bg_g, self.bg_b)
+        self.schedule_minimap()
+        self.live.settings_changed()
+
+    def schedule_settings_update(self):
+        # spinner and trace callbacks only queue the update, bursts are applied once per frame
+        if not self._syncing_vars:
+            self.settings_updates.request()
+
+    def read_settings(self):
+        """(width, gap, gravity) from the spinboxes, None while any of them is half-typed or out of range"""
+        try:
+            width = self.width_var.get()
+            gap = self.gap_var.get()
+            gravity = self.gravity_var.get()
+        except tk.TclError:
+            return None
+        if not (self.WIDTH_RANGE[0] <= width <= self.WIDTH_RANGE[1] and
+                self.GAP_RANGE[0] <= gap <= self.GAP_RANGE[1] and
+                self.GRAVITY_RANGE[0] <= gravity <= self.GRAVITY_RANGE[1]):
+            return None
+        return width, gap, gravity
+
+    @timed("update settings")
     def update_settings(self):
+        settings = self.read_settings()
+        if settings is None:
+            return
+        old = (self.pipe_width, self.pipe_gap, self.gravity)
+        changed = settings[2] != self.gravity
+        self.pipe_width, self.pipe_gap, self.gravity = settings
+        key = self.selected_pipe
+        old_fields = new_fields = None
+        if key in self.pipes:
+            # recorded even when this edit leaves the pipe alone: merged steps keep the first entry's undo
+            # and the last one's redo, and either may come from an edit that didn't touch the pipe
+            old_fields = (self.pipes.width[key], self.pipes.gap_height[key])
+            new_fields = (self.pipe_width, self.pipe_gap)
+            if old_fields != new_fields:
+                self.pipes.update(key, width=self.pipe_width, gap_height=self.pipe_gap)
+                self.scene.update_pipe(key, self.pipes[key])
+                self.live.pipe_changed(key)
+                self.schedule_minimap()
+                changed = True
+        if old != settings or old_fields != new_fields:
+            # a held spinner arrow merges into one step per pipe
+            self.history.record("settings", (self.restore_settings, (old, key, old_fields)),
+                                (self.restore_settings, (settings, key, new_fields)), merge_key=('settings', key))
+        if changed:
+            self.live.settings_changed()
+            self.check_playability()
+
+    def restore_settings(self, settings, key, fields):
+        """Puts back spinbox settings and, when fields is given, the (width, gap_height) of pipe key"""
+        self.pipe_width, self.pipe_gap, self.gravity = settings
+        self._syncing_vars = True
         try:
-            self.pipe_width = self.width_var.get()
-            self.pipe_gap = self.gap_var.get()
-            self.gravity = self.gravity_var.get()
-            if self.selected_pipe is not None and 0 <= self.selected_pipe < len(self.pipes):
-                self.pipes[self.selected_pipe]['width'] = self.pipe_width
-                self.pipes[self.selected_pipe]['gap_height'] = self.pipe_gap
-            self.draw_canvas()
-        except:
-            pass 
+            self.width_var.set(self.pipe_width)
+            self.gap_var.set(self.pipe_gap)
+            self.gravity_var.set(self.gravity)
+        finally:
+            self._syncing_vars = False
+        if fields is not None and key in self.pipes:
+            self.pipes.update(key, width=fields[0], gap_height=fields[1])
+            self.scene.update_pipe(key, self.pipes[key])
+            self.live.pipe_changed(key)
+            self.schedule_minimap()
+        self.live.settings_changed()
+        self.check_playability()
+
     def add_pipe(self, event):
         x = self.canvas.canvasx(event.x)
         y = event.y
 
         # if a power-up is selected, place it instead of a pipe
         if self.selected_powerup_type is not None:
-            self.powerups.append({
-                'x': x, 'y': y, 'type': self.selected_powerup_type
-            })
-            self.selected_powerup_type = None 
-            self.draw_canvas()
+            self.insert_powerup(x, y, self.selected_powerup_type)
+            self.selected_powerup_type = None
+            self.compact_tables()
             return
-        gap_top = y - self.pipe_gap // 2
-        if gap_top < 30:
-            gap_top = 30
-        if gap_top + self.pipe_gap > self.canvas_height - 50:
-            gap_top = self.canvas_height - 50 - self.pipe_gap
+        gap_top = clamp_gap_top(y - self.pipe_gap // 2, self.pipe_gap, self.canvas_height)
 
         # store pipe with its individual properties
-        self.pipes.append({
-            'x': x, 'gap_top': gap_top,
-            'width': self.pipe_width, 'gap_height': self.pipe_gap
-        })
-        self.draw_canvas()
+        self.insert_pipe(x, gap_top, self.pipe_width, self.pipe_gap)
+        self.check_playability()
+        self.compact_tables()
+
+    def insert_pipe(self, x, gap_top, width, gap_height):
+        key = self.pipes.append(x, gap_top, width, gap_height)
+        if self.in_viewport(x, self.pipes.index.max_extent):
+            self.scene.add_pipe(key, self.pipes[key])
+        self.update_scroll_region()
+        self.live.pipe_changed(key)
+        self.history.record("add pipe", (self.delete_pipe, (key,)), (self.restore_pipe, (key,)))
+        return key
+
+    def insert_powerup(self, x, y, powerup_type):
+        key = self.powerups.append(x, y, powerup_type)
+        if self.in_viewport(x, POWERUP_EXTENT):
+            self.scene.add_powerup(key, self.powerups[key])
+        self.update_scroll_region()
+        self.live.powerup_changed(key)
+        self.history.record("add power-up", (self.delete_powerup, (key,)), (self.restore_powerup, (key,)))
+        return key
+
+    # deleted rows keep their fields, so undoing a removal (or redoing an add) only flips the row back on
+
+    def delete_pipe(self, key):
+        if self.selected_pipe == key:
+            self.set_selected_pipe(None)
+        self.pipes.delete(key)
+        self.scene.remove_pipe(key)
+        self.update_scroll_region()
+        self.live.pipe_changed(key)
+        self.check_playability()
+
+    def restore_pipe(self, key):
+        self.pipes.revive(key)
+        if self.in_viewport(self.pipes.x[key], self.pipes.index.max_extent):
+            self.scene.add_pipe(key, self.pipes[key])
+        self.update_scroll_region()
+        self.live.pipe_changed(key)
+        self.check_playability()
+
+    def delete_pipes(self, rows):
+        """delete_pipe() for a batch, the table, scene and checks are each updated once"""
+        if self.selected_pipe in rows:
+            self.set_selected_pipe(None)
+        self.pipes.delete_many(rows)
+        for key in rows:
+            self.scene.remove_pipe(key)
+        self.pipes_changed(rows)
+
+    def restore_pipes(self, rows):
+        self.pipes.revive_many(rows)
+        self.pipes_changed(rows)
+
+    def set_pipe_columns(self, rows, columns):
+        """columns is (x, gap_top, width, gap_height) for rows, None for a field left as is"""
+        self.pipes.update_many(rows, *columns)
+        for key in rows:
+            if key in self.scene.pipe_items:
+                self.scene.update_pipe(key, self.pipes[key])
+        self.pipes_changed(rows)
+
+    def pipes_changed(self, rows):
+        self.update_scroll_region()
+        self.refresh_viewport(force=True)
+        for key in rows:
+            self.live.pipe_changed(key)
+        self.check_playability()
+
+    def delete_powerup(self, key):
+        self.powerups.delete(key)
+        self.scene.remove_powerup(key)
+        self.update_scroll_region()
+        self.live.powerup_changed(key)
+
+    def restore_powerup(self, key):
+        self.powerups.revive(key)
+        if self.in_viewport(self.powerups.x[key], POWERUP_EXTENT):
+            self.scene.add_powerup(key, self.powerups[key])
+        self.update_scroll_region()
+        self.live.powerup_changed(key)
+
+    @timed("hit-test")
+    def find_powerup(self, x, y):
+        # lowest row wins, same as scanning the placement order
+        powerups = self.powerups
+        hits = [key for key in powerups.near(x, POWERUP_EXTENT)
+                if abs(powerups.x[key] - x) < POWERUP_EXTENT and abs(powerups.y[key] - y) < POWERUP_EXTENT]
+        return min(hits, default=None)
+
+    @timed("hit-test")
+    def find_pipe(self, x, hit):
+        pipes = self.pipes
+        hits = [key for key in pipes.near(x) if abs(pipes.x[key] - x) < pipes.width[key] // 2 and hit(pipes[key])]
+        return min(hits, default=None)
 
     def remove_pipe(self, event):
         x = self.canvas.canvasx(event.x)
         y = event.y
-        for i, powerup in enumerate(self.powerups):
-            if abs(powerup['x'] - x) < 15 and abs(powerup['y'] - y) < 15:
-                self.powerups.pop(i)
-                self.draw_canvas()
-                return
+        key = self.find_powerup(x, y)
+        if key is not None:
+            self.delete_powerup(key)
+            self.history.record("remove power-up", (self.restore_powerup, (key,)), (self.delete_powerup, (key,)))
+            self.compact_tables()
+            return
 
         # find pipe near the click
-        to_remove = None
-        for i, pipe in enumerate(self.pipes):
-            px = pipe['x']
-            py = pipe['gap_top']
-            pipe_width = pipe['width']
-            if abs(px - x) < pipe_width // 2 and abs(py - y) < 100:
-                to_remove = i
-                break
-
-        if to_remove is not None:
-            if self.selected_pipe == to_remove:
-                self.selected_pipe = None
-            elif self.selected_pipe is not None and self.selected_pipe > to_remove:
-                self.selected_pipe -= 1
-            self.pipes.pop(to_remove)
-            self.draw_canvas()
+        key = self.find_pipe(x, lambda pipe: abs(pipe['gap_top'] - y) < 100)
+        if key is not None:
+            self.delete_pipe(key)
+            self.history.record("remove pipe", (self.restore_pipe, (key,)), (self.delete_pipe, (key,)))
+            self.compact_tables()
 
     def select_pipe(self, event):
         x = self.canvas.canvasx(event.x)
         y = event.y
-        for i, pipe in enumerate(self.pipes):
-            px = pipe['x']
-            py = pipe['gap_top']
-            pipe_width = pipe['width']
-            pipe_gap = pipe['gap_height']
-
-            if abs(px - x) < pipe_width // 2 and abs(py + pipe_gap // 2 - y) < pipe_gap // 2 + 50:
-                self.selected_pipe = i
+        key = self.find_pipe(x, lambda pipe: abs(pipe['gap_top'] + pipe['gap_height'] // 2 - y)
+                             < pipe['gap_height'] // 2 + 50)
+        if key is not None:
+            pipe = self.pipes[key]
+            self.set_selected_pipe(key)
+            self._syncing_vars = True
+            try:
                 self.width_var.set(pipe['width'])
                 self.gap_var.set(pipe['gap_height'])
-                self.draw_canvas()
-                return
-        self.selected_pipe = None
-        self.draw_canvas()
+            finally:
+                self._syncing_vars = False
+            self.pipe_width = pipe['width']
+            self.pipe_gap = pipe['gap_height']
+            return
+        self.set_selected_pipe(None)
+
+    def set_selected_pipe(self, key):
+        if key == self.selected_pipe:
+            return
+        self.selected_pipe = key
+        self.scene.set_selected_pipe(key)
+
+    def selection_key(self, action):
+        # the name field and spinboxes keep their own select-all, delete, copy and paste
+        return lambda event: None if isinstance(event.widget, (tk.Entry, tk.Spinbox)) else action()
+
+    def start_band(self, event):
+        x = self.canvas.canvasx(event.x)
+        self._band = (x, self.canvas.create_rectangle(x, 0, x, self.canvas_height, outline='blue', dash=(4, 2)))
 
+    def drag_band(self, event):
+        if self._band is None:
+            return
+        x0, item = self._band
+        self.canvas.coords(item, x0, 0, self.canvas.canvasx(event.x), self.canvas_height)
+
+    def end_band(self, event):
+        if self._band is None:
+            return
+        x0, item = self._band
+        self._band = None
+        self.canvas.delete(item)
+        lo, hi = sorted((x0, self.canvas.canvasx(event.x)))
+        self.set_selection(self.pipes.range(lo, hi))
+
+    def ask_select_range(self):
+        lo = simpledialog.askinteger("Select Range", "From x:", parent=self.root, minvalue=0)
+        if lo is None:
+            return
+        hi = simpledialog.askinteger("Select Range", "To x:", parent=self.root, minvalue=lo)
+        if hi is not None:
+            self.set_selection(self.pipes.range(lo, hi))
+
+    def set_selection(self, rows):
+        self.selection = frozenset(rows)
+        self.scene.set_selection(self.selection)
+        self.selection_label.config(text=f"{len(self.selection)} selected" if self.selection else "")
+
+    def selected_rows(self):
+        """The selected rows still in the level, in x order"""
+        x = self.pipes.x
+        return sorted((row for row in self.selection if row in self.pipes), key=lambda row: (x[row], row))
+
+    @timed("transform selection")
+    def transform_selection(self, label, transform, *args):
+        """
+        Runs a pipe_transforms function over the selection. The table is written column by column and
+        redrawn once, the undo entry holds the old and new values of the columns that changed
+        """
+        rows = self.selected_rows()
+        if not rows:
+            return
+        self.settings_updates.flush_now()
+        taken = self.pipes.take(rows)
+        before = pipe_transforms.columns(*taken)
+        changed = pipe_transforms.changed(before, transform(*before, *args))
+        if all(column is None for column in changed):
+            return
+        new = [None if values is None else array(column.typecode, values) for column, values in zip(taken, changed)]
+        old = [None if values is None else column for column, values in zip(taken, changed)]
+        self.set_pipe_columns(rows, new)
+        size = sum(column.itemsize * len(column) for column in new + old if column is not None) + 8 * len(rows)
+        self.history.record(label, (self.set_pipe_columns, (rows, old)), (self.set_pipe_columns, (rows, new)), size)
+
+    def ask_shift(self):
+        dx = simpledialog.askinteger("Shift", "Move the selection by (px, negative is left):", parent=self.root)
+        if dx:
+            self.transform_selection("shift selection", pipe_transforms.shift, dx)
+
+    def ask_scale_spacing(self):
+        factor = simpledialog.askfloat("Scale Spacing", "Multiply the spacing by:", parent=self.root,
+                                       minvalue=0.1, maxvalue=10.0)
+        if factor is not None:
+            self.transform_selection("scale spacing", pipe_transforms.scale_spacing, factor)
+
+    def ask_gap_height(self):
+        value = simpledialog.askinteger("Set Gap Height", "Gap height:", parent=self.root, initialvalue=self.pipe_gap,
+                                        minvalue=self.GAP_RANGE[0], maxvalue=self.GAP_RANGE[1])
+        if value is not None:
+            self.transform_selection("set gap height", pipe_transforms.set_gap_height, value)
+
+    def ask_random_gap_height(self):
+        lo = simpledialog.askinteger("Randomize Gap Height", "Smallest gap:", parent=self.root,
+                                     minvalue=self.GAP_RANGE[0], maxvalue=self.GAP_RANGE[1])
+        if lo is None:
+            return
+        hi = simpledialog.askinteger("Randomize Gap Height", "Largest gap:", parent=self.root,
+                                     minvalue=lo, maxvalue=self.GAP_RANGE[1])
+        if hi is not None:
+            self.transform_selection("randomize gap height", pipe_transforms.randomize_gap_height, lo, hi,
+                                     random.randrange(1 << 32))
+
+    def ask_jitter(self):
+        amount = simpledialog.askinteger("Jitter Gap Top", "Move gaps up or down by up to (px):", parent=self.root,
+                                         minvalue=1, maxvalue=self.canvas_height)
+        if amount is not None:
+            self.transform_selection("jitter gap top", pipe_transforms.jitter_gap_top, amount,
+                                     random.randrange(1 << 32))
+
+    def copy_selection(self):
+        rows = self.selected_rows()
+        if rows:
+            self.clipboard = pipe_transforms.copy(*pipe_transforms.columns(*self.pipes.take(rows)))
+
+    @timed("paste selection")
+    def paste_selection(self):
+        """Adds the copied section starting at the middle of the view, the pasted pipes become the selection"""
+        if self.clipboard is None:
+            return
+        self.settings_updates.flush_now()
+        lo, hi = self.visible_range()
+        x, gap_top, width, gap_height = pipe_transforms.paste(self.clipboard, (lo + hi) // 2)
+        rows = self.pipes.append_many(x.tolist(), gap_top.tolist(), width.tolist(), gap_height.tolist())
+        self.pipes_changed(rows)
+        self.set_selection(rows)
+        self.history.record("paste pipes", (self.delete_pipes, (rows,)), (self.restore_pipes, (rows,)),
+                            8 * len(rows))
+
+    def delete_selection(self):
+        rows = self.selected_rows()
+        if not rows:
+            return
+        self.settings_updates.flush_now()
+        self.delete_pipes(rows)
+        self.history.record("remove pipes", (self.restore_pipes, (rows,)), (self.delete_pipes, (rows,)), 8 * len(rows))
+        self.compact_tables()
+
+    def compact_tables(self):
+        """
+        Swaps in copies of the tables without their dead rows once those outnumber the live ones.
+        The history keeps the sparse tables as the checkpoint behind the edit that was just recorded,
+        so older deltas still replay against the row numbers they were recorded with
+        """
+        if not (self.pipes.needs_compaction() or self.powerups.needs_compaction()):
+            return
+        old = self.level_state()
+        selection, selected = self.selection, self.selected_pipe
+        pipes, rows = self.pipes.compacted()
+        powerups, _ = self.powerups.compacted()
+        state = old[:3] + (pipes, powerups)
+        self.restore_level_state(state)
+        self.set_selection(rows[row] for row in selection if row in rows)
+        if selected in rows:
+            self.set_selected_pipe(rows[selected])
+        size = old[3].nbytes() + old[4].nbytes() + pipes.nbytes() + powerups.nbytes()
+        self.history.attach((self.restore_level_state, (old,)), (self.restore_level_state, (state,)), size)
+
+    @timed("playability")
+    def check_playability(self):
+        """Flags pipes the bird can't get through (red) or barely can (magenta) at the current gravity"""
+        if analyze_columns is None:
+            return
+        analysis = analyze_columns(*self.pipes.live_columns(), self.gravity)
+        self.scene.set_pipe_flags({key: int(status) for key, status in zip(self.pipes, analysis.status) if status})
+        counts = analysis.counts()
+        problems = [f"{counts[name]} {name}" for name in STATUS_NAMES[1:] if counts[name]]
+        self.playability_label.config(text="Playable" if not problems else ", ".join(problems),
+                                      fg='black' if not problems else 'red')
+
+    def update_scroll_region(self):
+        rightmost = 0
+        if self.pipes:
+            rightmost = self.pipes.index.xs[-1]
+        if self.powerups:
+            rightmost = max(rightmost, self.powerups.index.xs[-1])
+        width = max(self.min_canvas_width, int(rightmost) + self.scroll_padding)
+        if width != self.actual_canvas_width:
+            self.actual_canvas_width = width
+            self.canvas.config(scrollregion=(0, 0, width, self.canvas_height))
+            self.scene.draw_ground(width)
+        # every add, removal and level swap passes through here
+        self.schedule_minimap()
+
+    def schedule_minimap(self):
+        if self.minimap is not None:
+            self.minimap_updates.request()
+
+    @timed("draw minimap")
+    def draw_minimap(self):
+        count("minimap redraws")
+        image = render_columns(*self.pipes.live_columns(), *self.powerups.live_columns(),
+                               (self.bg_r, self.bg_g, self.bg_b), (self.canvas_width, self.MINIMAP_HEIGHT),
+                               span=self.actual_canvas_width)
+        self.minimap_photo = tk.PhotoImage(data=to_ppm(image))
+        self.minimap.itemconfig(self.minimap_image, image=self.minimap_photo)
+        self.draw_minimap_view()
+
+    def draw_minimap_view(self):
+        first, last = self.canvas.xview()
+        self.minimap.coords(self.minimap_view, first * self.canvas_width, 1, last * self.canvas_width,
+                            self.MINIMAP_HEIGHT - 1)
+
+    def minimap_jump(self, event):
+        # centre the view on the clicked spot
+        first, last = self.canvas.xview()
+        self.canvas.xview_moveto(max(0.0, event.x / self.canvas_width - (last - first) / 2))
+
+    def on_xscroll(self, first, last):
+        self.h_scrollbar.set(first, last)
+        self.refresh_viewport()
+        if self.minimap is not None:
+            self.draw_minimap_view()
+
+    def visible_range(self):
+        first, last = self.canvas.xview()
+        return first * self.actual_canvas_width, last * self.actual_canvas_width
+
+    def in_viewport(self, x, extent=0):
+        return self.viewport is not None and self.viewport[0] <= x + extent and x - extent <= self.viewport[1]
+
+    @timed("refresh viewport")
+    def refresh_viewport(self, force=False):
+        """Materialize the objects around the visible window, skipped while the view stays inside the margin"""
+        lo, hi = self.visible_range()
+        if not force and self.viewport is not None:
+            slack = self.view_margin // 2
+            if (self.viewport[0] + slack <= lo or self.viewport[0] <= 0) and \
+               (hi <= self.viewport[1] - slack or self.viewport[1] >= self.actual_canvas_width):
+                return
+        self.viewport = (max(0, lo - self.view_margin), min(self.actual_canvas_width, hi + self.view_margin))
+        count("redraws")
+        pipe_extent = self.pipes.index.max_extent
+        self.scene.sync(self.pipes.range(self.viewport[0] - pipe_extent, self.viewport[1] + pipe_extent),
+                        self.pipes,
+                        self.powerups.range(self.viewport[0] - POWERUP_EXTENT, self.viewport[1] + POWERUP_EXTENT),
+                        self.powerups)
+
+    @timed("draw canvas")
     def draw_canvas(self):
-        self.canvas.delete('all')
-
-        bg_color = f'#{self.bg_r:02x}{self.bg_g:02x}{self.bg_b:02x}'
-        self.canvas.config(bg=bg_color)
-
-        # draw ground across full width
-        self.canvas.create_rectangle(0, self.canvas_height - 50, self.actual_canvas_width, self.canvas_height,
-        fill='brown', outline='black')
-
-        # draw pipes
-        for i, pipe in enumerate(self.pipes):
-            px = pipe['x']
-            gap_top = pipe['gap_top']
-            pipe_width = pipe['width']
-            pipe_gap = pipe['gap_height']
-
-            is_selected = (i == self.selected_pipe)
-            fill_color = 'yellow' if is_selected else 'green'
-            outline_color = 'orange' if is_selected else 'darkgreen'
-            outline_width = 4 if is_selected else 2
-
-            # top pipe
-            self.canvas.create_rectangle(px - pipe_width//2, 0, px + pipe_width//2, gap_top,
-            fill=fill_color, outline=outline_color, width=outline_width)
-
-            gap_bottom = gap_top + pipe_gap
-            self.canvas.create_rectangle(px - pipe_width//2, gap_bottom,
-            px + pipe_width//2, self.canvas_height - 50, fill=fill_color, outline=outline_color, width=outline_width)
-
-            marker_color = 'orange' if is_selected else 'red'
-            self.canvas.create_oval(px - 5, gap_top + pipe_gap//2 - 5, px + 5, gap_top + pipe_gap//2 + 5,
-            fill=marker_color)
-
-        # draw power-ups
-        powerup_colors = {
-            'invincibility': 'gold',
-            'speed': 'cyan',
-            'shrink': 'pink',
-        }
-        powerup_symbols = {
-            'invincibility': '⭐',
-            'speed': '⚡',
-            'shrink': '🎯',
-        }
-
-        for powerup in self.powerups:
-            px = powerup['x']
-            py = powerup['y']
-            ptype = powerup['type']
-            color = powerup_colors.get(ptype, 'white')
-
-            # Draw power-up 
-            self.canvas.create_oval(px - 15, py - 15, px + 15, py + 15, fill=color, outline='white', width=3)
-            # Draw symbol
-            self.canvas.create_text(px, py, text=powerup_symbols.get(ptype, '?'), font=('Arial', 16), fill='white')
+        """Full rebuild of the scene, only needed when the whole level changes"""
+        self.scene.set_background(self.bg_r, self.bg_g, self.bg_b)
+        self.scene.clear()
+        self.update_scroll_region()
+        self.scene.draw_ground(self.actual_canvas_width)
+        self.refresh_viewport(force=True)
+
+    def generate_level(self):
+        # one seeded stream per session, the seed is in the level name so a layout can be regenerated
+        if self.level_stream is None:
+            generator = LevelGenerator(random.randrange(1 << 31), GeneratorBounds(gravity=self.gravity), batch=16)
+            self.level_stream = iter(generator)
+        self.set_level(next(self.level_stream))
+
+    @timed("estimate difficulty")
+    def estimate_difficulty(self):
+        # fewer bot runs than the CLI default keeps the click responsive, the score stays within a couple of points
+        self.settings_updates.flush_now()
+        estimate = estimate_level(self.to_level(), runs=1000)
+        self.difficulty_label.config(text=estimate.summary())
+
+    def to_level(self):
+        level = Level(self.level_name, self.gravity, (self.bg_r, self.bg_g, self.bg_b))
+        level.pipes = self.pipes.to_dicts()
+        level.powerups = self.powerups.to_dicts()
+        return level
+
+    def set_level(self, level):
+        self.replace_level("load level", (level.name, level.gravity, (level.bg_r, level.bg_g, level.bg_b),
+                                          PipeTable(level.pipes), PowerupTable(level.powerups)))
+
+    def level_state(self):
+        return (self.level_name, self.gravity, (self.bg_r, self.bg_g, self.bg_b), self.pipes, self.powerups)
+
+    def replace_level(self, label, state):
+        """
+        Swaps in a whole level. The history entry keeps the replaced tables themselves as its checkpoint,
+        nothing is copied, and the edits after it stay deltas against whichever tables are current
+        """
+        self.settings_updates.flush_now()
+        old = self.level_state()
+        self.restore_level_state(state)
+        size = old[3].nbytes() + old[4].nbytes() + state[3].nbytes() + state[4].nbytes()
+        self.history.record(label, (self.restore_level_state, (old,)), (self.restore_level_state, (state,)), size)
+
+    def restore_level_state(self, state):
+        self.level_name, self.gravity, bg, self.pipes, self.powerups = state
+        self.name_entry.delete(0, tk.END)
+        self.name_entry.insert(0, self.level_name)
+        # guarded so the trace doesn't log a settings edit on top of this one
+        self._syncing_vars = True
+        try:
+            self.gravity_var.set(int(self.gravity))
+        finally:
+            self._syncing_vars = False
+        self.bg_r, self.bg_g, self.bg_b = bg
+
+        self.set_selected_pipe(None)
+        self.set_selection(())
+        self.draw_canvas()
+        self.live.level_replaced()
+        self.check_playability()
+
+    @timed("undo")
+    def undo(self):
+        # a settings change still waiting for its frame is an edit of its own
+        self.settings_updates.flush_now()
+        label = self.history.undo()
+        if label is not None:
+            print(f"Undo {label}")
+
+    @timed("redo")
+    def redo(self):
+        self.settings_updates.flush_now()
+        label = self.history.redo()
+        if label is not None:
+            print(f"Redo {label}")
 
     def save_level(self):
+        self.settings_updates.flush_now()
         self.level_name = self.name_entry.get()
-        level_data = {
-            "type": "Level",
-            "name": self.level_name,
-            "width": 800,
-            "height": 600,
-            "gravity": self.gravity,
-            "bgR": self.bg_r,
-            "bgG": self.bg_g,
-            "bgB": self.bg_b,
-            "gameObjects": []
-        }
-        level_data["gameObjects"].append({
-            "type": "GameObject",
-            "name": "Ground",
-            "active": True,
-            "components": [
-                {
-                    "type": "Transform",
-                    "x": 0.0,
-                    "y": 550.0,
-                    "rotation": 0.0,
-                    "scaleX": 1.0,
-                    "scaleY": 1.0
-                },
-                {
-                    "type": "Sprite",
-                    "width": 800,
-                    "height": 50,
-                    "r": 139,
-                    "g": 69,
-                    "b": 19
-                },
-                {
-                    "type": "Collider",
-                    "width": 800,
-                    "height": 50,
-                    "isTrigger": False,
-                    "tag": "ground"
-                }
-            ]
-        })
-
-        # add the pipes
-        for i, pipe in enumerate(self.pipes):
-            px = pipe['x']
-            gap_top = pipe['gap_top']
-            pipe_width = pipe['width']
-            pipe_gap = pipe['gap_height']
-
-            # top pipe
-            level_data["gameObjects"].append({
-                "type": "GameObject",
-                "name": f"Pipe{i}_Top",
-                "active": True,
-                "components": [
-                    {
-                        "type": "Transform",
-                        "x": float(px - pipe_width//2),
-                        "y": 0.0,
-                        "rotation": 0.0,
-                        "scaleX": 1.0,
-                        "scaleY": 1.0
-                    },
-                    {
-                        "type": "Sprite",
-                        "width": pipe_width,
-                        "height": int(gap_top),
-                        "r": 34,
-                        "g": 139,
-                        "b": 34
-                    },
-                    {
-                        "type": "Collider",
-                        "width": pipe_width,
-                        "height": int(gap_top),
-                        "isTrigger": False,
-                        "tag": "pipe"
-                    }
-                ]
-            })
-
-            # bottom pipe
-            gap_bottom = gap_top + pipe_gap
-            bottom_height = self.canvas_height - 50 - gap_bottom
-            level_data["gameObjects"].append({
-                "type": "GameObject",
-                "name": f"Pipe{i}_Bottom",
-                "active": True,
-                "components": [
-                    {
-                        "type": "Transform",
-                        "x": float(px - pipe_width//2),
-                        "y": float(gap_bottom),
-                        "rotation": 0.0,
-                        "scaleX": 1.0,
-                        "scaleY": 1.0
-                    },
-                    {
-                        "type": "Sprite",
-                        "width": pipe_width,
-                        "height": int(bottom_height),
-                        "r": 34,
-                        "g": 139,
-                        "b": 34
-                    },
-                    {
-                        "type": "Collider",
-                        "width": pipe_width,
-                        "height": int(bottom_height),
-                        "isTrigger": False,
-                        "tag": "pipe"
-                    }
-                ]
-            })
-
-        # add power-ups
-        powerup_tag_map = {
-            'invincibility': 'powerup_invincibility',
-            'speed': 'powerup_speed',
-            'shrink': 'powerup_shrink',
-        }
-
-        for i, powerup in enumerate(self.powerups):
-            tag = powerup_tag_map.get(powerup['type'], 'powerup')
-            level_data["gameObjects"].append({
-                "type": "GameObject",
-                "name": f"PowerUp_{powerup['type']}_{i}",
-                "active": True,
-                "components": [
-                    {
-                        "type": "Transform",
-                        "x": float(powerup['x']),
-                        "y": float(powerup['y']),
-                        "rotation": 0.0,
-                        "scaleX": 1.0,
-                        "scaleY": 1.0
-                    },
-                    {
-                        "type": "Sprite",
-                        "width": 20,
-                        "height": 20,
-                        "r": 255,
-                        "g": 255,
-                        "b": 0
-                    },
-                    {
-                        "type": "Collider",
-                        "width": 20,
-                        "height": 20,
-                        "isTrigger": True,
-                        "tag": tag
-                    }
-                ]
-            })
+        level = self.to_level()
+        prefabs = self.prefabs_var.get()
+        if prefabs:
+            os.makedirs(self.PREFABS_DIR, exist_ok=True)
 
         # save file
-        filename = self.level_name.replace(" ", "_") + ".json"
         filepath = filedialog.asksaveasfilename(
             defaultextension=".json",
-            filetypes=[("JSON files", "*.json")],
-            initialdir="../levels",
-            initialfile=filename
+            filetypes=[("JSON files", "*.json"), ("Packed levels", "*.fblv")],
+            initialdir=self.PREFABS_DIR if prefabs else self.LEVELS_DIR,
+            initialfile=level.file_name()
         )
 
+        if filepath and prefabs and not is_binary_level(filepath) and self.in_levels_dir(filepath):
+            messagebox.showerror("Error", "The game can't load prefab files, it would list this level with no "
+                                          "pipes.\nSave it outside the levels folder, or untick Prefabs.")
+            return
         if filepath:
-            with open(filepath, 'w') as f:
-                json.dump(level_data, f, indent=2)
+            with span("save level", pipes=len(level.pipes)):
+                if is_binary_level(filepath):
+                    try:
+                        size = write_level_binary(level, filepath)
+                    except ValueError as e:
+                        messagebox.showerror("Error", f"Could not save level:\n{e}")
+                        return
+                else:
+                    size = save_level_file(level, filepath, broadphase=self.broadphase_var.get(),
+                                           prefabs=prefabs)
+            count("bytes serialized", size)
             messagebox.showinfo("Success", f"Level saved!\n{os.path.basename(filepath)}")
 
+    def in_levels_dir(self, filepath):
+        """True for a file the game lists, i.e. one directly in LEVELS_DIR"""
+        folder = os.path.realpath(os.path.dirname(os.path.abspath(filepath)))
+        return os.path.normcase(folder) == os.path.normcase(os.path.realpath(self.LEVELS_DIR))
+
     def load_level(self):
+        if render_columns is None:
+            self.pick_level_file()
+            return
+        if self.thumbnails is None:
+            self.thumbnails = ThumbnailCache()
+        LevelBrowser(self.root, self.LEVELS_DIR, self.thumbnails, self.open_level_file, self.pick_level_file)
+
+    def pick_level_file(self):
         filepath = filedialog.askopenfilename(
-            filetypes=[("JSON files", "*.json")],
-            initialdir="../levels"
+            filetypes=[("JSON files", "*.json"), ("Packed levels", "*.fblv")],
+            initialdir=self.LEVELS_DIR
         )
-        if not filepath:
-            return
+        if filepath:
+            self.open_level_file(filepath)
 
+    def open_level_file(self, filepath):
         try:
-            with open(filepath, 'r') as f:
-                data = json.load(f)
-            self.level_name = data.get("name", "Loaded Level")
-            self.name_entry.delete(0, tk.END)
-            self.name_entry.insert(0, self.level_name)
-            self.gravity = data.get("gravity", 800.0)
-            self.gravity_var.set(int(self.gravity))
-
-            # load background color
-            self.bg_r = data.get("bgR", 135)
-            self.bg_g = data.get("bgG", 206)
-            self.bg_b = data.get("bgB", 235)
-            self.pipes = []
-            pipe_pairs = {}
-
-            for obj in data.get("gameObjects", []):
-                name = obj.get("name", "")
-                if "Pipe" in name and name != "Ground":
-                    x = y = width = height = 0
-                    for comp in obj.get("components", []):
-                        if comp.get("type") == "Transform":
-                            x = comp.get("x", 0)
-                            y = comp.get("y", 0)
-                        if comp.get("type") == "Sprite":
-                            width = comp.get("width", 60)
-                            height = comp.get("height", 100)
-                    if "_Top" in name:
-                        pipe_num = name.replace("Pipe", "").replace("_Top", "")
-                        if pipe_num not in pipe_pairs:
-                            pipe_pairs[pipe_num] = {}
-                        pipe_pairs[pipe_num]["top"] = (x + width//2, height)
-                        pipe_pairs[pipe_num]["width"] = width
-                    elif "_Bottom" in name:
-                        pipe_num = name.replace("Pipe", "").replace("_Bottom", "")
-                        if pipe_num not in pipe_pairs:
-                            pipe_pairs[pipe_num] = {}
-                        pipe_pairs[pipe_num]["bottom_y"] = y
-
-            for pipe_num, pipe_data in pipe_pairs.items():
-                if "top" in pipe_data and "bottom_y" in pipe_data:
-                    x, top_height = pipe_data["top"]
-                    gap_top = top_height
-                    gap_bottom = pipe_data["bottom_y"]
-                    gap_height = gap_bottom - gap_top
-                    pipe_width = pipe_data.get("width", 60)
-
-                    self.pipes.append({
-                        'x': x,
-                        'gap_top': gap_top,
-                        'width': pipe_width,
-                        'gap_height': gap_height
-                    })
-
-            # load power-ups
-            self.powerups = []
-            tag_to_type_map = {
-                'powerup_invincibility': 'invincibility',
-                'powerup_speed': 'speed',
-                'powerup_shrink': 'shrink',
-            }
-
-            for obj in data.get("gameObjects", []):
-                name = obj.get("name", "")
-                if "PowerUp" in name:
-                    x = y = 0
-                    tag = ""
-                    for comp in obj.get("components", []):
-                        if comp.get("type") == "Transform":
-                            x = comp.get("x", 0)
-                            y = comp.get("y", 0)
-                        if comp.get("type") == "Collider":
-                            tag = comp.get("tag", "")
-                    powerup_type = tag_to_type_map.get(tag)
-                    if powerup_type:
-                        self.powerups.append({
-                            'x': x, 'y': y, 'type': powerup_type
-                        })
-            self.draw_canvas()
+            with span("load level", file=os.path.basename(filepath)):
+                if is_binary_level(filepath):
+                    level = read_level_binary(filepath)
+                else:
+                    level = load_level_file(filepath)
+            self.set_level(level)
             messagebox.showinfo("Success", f"Level loaded!\n{len(self.pipes)} pipes, {len(self.powerups)} power-ups")
 
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load level:\n{str(e)}")
 
+    def autosave_state(self):
+        return ((self.pipes, self.pipes.revision), (self.powerups, self.powerups.revision),
+                (self.name_entry.get(), self.gravity, (self.bg_r, self.bg_g, self.bg_b)))
+
+    @timed("autosave snapshot")
+    def autosave_snapshot(self):
+        """Runs on the Tk thread, None when nothing changed since the last autosave"""
+        state = self.autosave_state()
+        last = self._autosaved
+        if state == last:
+            return None
+        pipe_columns, powerup_columns = self._autosave_columns
+        if state[0] != last[0]:
+            pipe_columns = self.pipes.snapshot()
+        if state[1] != last[1]:
+            powerup_columns = self.powerups.snapshot()
+        self._autosaved = state
+        self._autosave_columns = (pipe_columns, powerup_columns)
+        name, gravity, bg = state[2]
+        return name, gravity, bg, pipe_columns, powerup_columns
+
+    def toggle_live(self):
+        if not self.live_var.get():
+            self.live.stop()
+            self.live_label.config(text="")
+            return
+        try:
+            self.live.start()
+        except OSError as e:
+            self.live_var.set(False)
+            messagebox.showerror("Error", f"Failed to start live reload:\n{str(e)}")
+            return
+        self.live_label.config(text=f"Live on {self.live.server.address}")
+
+    def toggle_profiling(self):
+        if self.profile_var.get():
+            instrumentation.reset()
+            instrumentation.enable()
+            self.slow_frame = ""
+            self.frame_monitor.start()
+            self.profile_overlay.place(x=5, y=5)
+            return
+        self.frame_monitor.stop()
+        instrumentation.disable()
+        self.profile_overlay.place_forget()
+
+    def report_frames(self, monitor):
+        # how many requests each coalesced update folded into one redraw, next to what the frames cost
+        text = (f"{monitor.summary()}\n"
+                f"settings: {self.settings_updates.stats()}\n"
+                f"minimap: {self.minimap_updates.stats()}")
+        if self.slow_frame:
+            text += f"\n{self.slow_frame} ({monitor.slow} so far)"
+        self.profile_overlay.config(text=text)
+
+    def note_slow_frame(self, line):
+        # kept for the overlay's next report instead of printed, a frame can be slow many times a second
+        self.slow_frame = line
+
+    def toggle_sampling(self):
+        if self.sample_var.get():
+            self.sampler.start()
+        else:
+            self.sampler.stop()
+
+    def export_trace(self):
+        filepath = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("Chrome trace", "*.json")],
+                                                initialfile="editor_trace.json")
+        if filepath:
+            events = export_chrome_trace(filepath, self.sampler)
+            messagebox.showinfo("Success", f"Trace saved!\n{events} events in {os.path.basename(filepath)}\n"
+                                           "Open it in chrome://tracing or ui.perfetto.dev")
+
+    def on_close(self):
+        self.settings_updates.flush_now()
+        self.sampler.stop()
+        self.frame_monitor.stop()
+        self.live.stop()
+        self.autosave.stop()
+        self.root.destroy()
+
     def clear_all(self):
         if messagebox.askyesno("Clear All", "Remove all pipes and power-ups?"):
-            self.pipes = []
-            self.powerups = []
-            self.draw_canvas()
+            self.replace_level("clear all", (self.level_name, self.gravity, (self.bg_r, self.bg_g, self.bg_b),
+                                             PipeTable(), PowerupTable()))
 
 def main():
     root = tk.Tk()
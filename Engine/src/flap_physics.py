@@ -0,0 +1,80 @@
+"""
+Bird physics as the engine's FlappyBirdScene runs it, for the offline level tools
+Fixed 0.016s frames: input sets the velocity to the jump power, then v += g*dt and y += int(v*dt),
+then the pipes scroll and collisions are checked
+"""
+import numpy as np
+
+from level_model import GROUND_HEIGHT, LEVEL_HEIGHT
+
+FRAME_DT = 0.016
+JUMP_POWER = -300.0
+PIPE_SPEED = -200.0
+
+BIRD_X = 40
+BIRD_START_Y = 200
+BIRD_SIZE = 25
+
+# highest bird y that stays clear of the ground collider
+FLOOR_Y = LEVEL_HEIGHT - GROUND_HEIGHT - BIRD_SIZE
+# the engine ends the run once birdY <= 0
+CEILING_Y = 1
+
+# a flap needs the key released for a frame in between, so flaps are at least this many frames apart
+FLAP_COOLDOWN = 2
+
+
+def step(y, v, flap, gravity, jump_power=JUMP_POWER):
+    """Advances arrays of bird states by one frame, flap is a bool array"""
+    v = np.where(flap, jump_power, v) + gravity * FRAME_DT
+    y = y + np.trunc(v * FRAME_DT)
+    return y, v
+
+
+def hop_height(jump_power, gravity):
+    """
+    How high a flap lifts the bird before it starts to fall, stepped like step() so the truncation keeps it
+    under v^2 / 2g. Scalars or arrays, elementwise the same either way
+    """
+    gravity = np.asarray(gravity, dtype=np.float64)
+    v = np.asarray(jump_power, dtype=np.float64) + gravity * FRAME_DT
+    rise = np.zeros(np.broadcast(v, gravity).shape)
+    rising = (v < 0) & (gravity > 0)
+    while rising.any():
+        rise -= np.where(rising, np.trunc(v * FRAME_DT), 0.0)
+        v = v + gravity * FRAME_DT
+        rising &= v < 0
+    return rise
+
+
+def pipe_frames(left, width, pipe_speed=PIPE_SPEED):
+    """
+    First and last frame a pipe whose left edge starts at `left` overlaps the bird horizontally,
+    as arrays so whole levels go through at once
+    """
+    scroll = -pipe_speed * FRAME_DT
+    left = np.asarray(left, dtype=np.float64)
+    first = np.maximum(np.floor((left - BIRD_X - BIRD_SIZE) / scroll) + 1, 1)
+    last = np.ceil((left + width - BIRD_X) / scroll) - 1
+    return first.astype(np.int64), last.astype(np.int64)
+
+
+def pipe_arrays(pipes):
+    """x-sorted (order, left, width, gap_top, gap_bottom) arrays from pipe dicts, left as save_level writes it"""
+    count = len(pipes)
+    return column_arrays(np.fromiter((p['x'] for p in pipes), np.float64, count),
+                         np.fromiter((p['gap_top'] for p in pipes), np.float64, count),
+                         np.fromiter((p['width'] for p in pipes), np.int64, count),
+                         np.fromiter((p['gap_height'] for p in pipes), np.float64, count))
+
+
+def column_arrays(x, gap_top, width, gap_height):
+    """pipe_arrays for pipe fields already held as columns (numpy arrays, array.array or lists)"""
+    x = np.asarray(x, dtype=np.float64)
+    gap_top = np.asarray(gap_top, dtype=np.float64)
+    width = np.asarray(width, dtype=np.int64)
+    gap_height = np.asarray(gap_height, dtype=np.float64)
+    left = x - width // 2
+    order = np.argsort(left, kind='stable')
+    # the top collider's height is written as int(gap_top), the bottom one starts at gap_top + gap_height
+    return (order, left[order], width[order], np.trunc(gap_top[order]), gap_top[order] + gap_height[order])
@@ -0,0 +1,517 @@
+#!/usr/bin/env python3
+"""
+Live level channel from the editor to a running game
+The editor marks what an edit touched, once per frame the marks become one binary frame of deltas that an
+asyncio server on a local socket (a Unix socket, localhost TCP where there are none) sends to every
+connected client. A client that connects gets the whole level first, then only the deltas.
+
+Wire format, little endian. A frame is a (payload length u32, sequence u32, edit time f64) header, the edit
+time being time.time() of the first edit in the frame, followed by ops that each start with their code byte:
+
+    RESET                                   drop all pipes and power-ups
+    PIPE            row u32, x f64, gap_top f32, width u16, gap_height f32
+    PIPE_REMOVE     row u32
+    POWERUP         row u32, x f64, y f32, type code u8
+    POWERUP_REMOVE  row u32
+    GRAVITY         f32
+    BACKGROUND      r, g, b u8
+
+Rows are the editor's table rows, PIPE both adds and changes a row. The stand-in client applies frames
+to a LevelMirror and reports how long edits took to arrive:
+
+    python hot_reload.py client
+    python hot_reload.py bench --pipes 10000
+"""
+import argparse
+import asyncio
+import os
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+
+from level_model import Level, POWERUP_TYPES
+from update_scheduler import UpdateScheduler
+from instrumentation import timed, count
+
+FRAME = struct.Struct("<IId")
+OP_RESET, OP_PIPE, OP_PIPE_REMOVE, OP_POWERUP, OP_POWERUP_REMOVE, OP_GRAVITY, OP_BACKGROUND = range(7)
+OPS = {
+    OP_RESET: struct.Struct("<B"),
+    OP_PIPE: struct.Struct("<BIdfHf"),
+    OP_PIPE_REMOVE: struct.Struct("<BI"),
+    OP_POWERUP: struct.Struct("<BIdfB"),
+    OP_POWERUP_REMOVE: struct.Struct("<BI"),
+    OP_GRAVITY: struct.Struct("<Bf"),
+    OP_BACKGROUND: struct.Struct("<BBBB"),
+}
+DEFAULT_PORT = 47115
+# a client this far behind is dropped, it gets a fresh copy of the level if it reconnects
+MAX_CLIENT_BUFFER = 8 * 1024 * 1024
+# how often the editor looks for clients waiting for their first copy of the level
+JOIN_POLL_MS = 100
+
+
+def default_address():
+    if hasattr(socket, 'AF_UNIX'):
+        return os.path.join(tempfile.gettempdir(), "flappy-bird-editor.sock")
+    return ("127.0.0.1", DEFAULT_PORT)
+
+
+def parse_address(text):
+    """host:port for TCP, anything else is a Unix socket path"""
+    host, _, port = text.rpartition(":")
+    if host and port.isdigit():
+        return (host, int(port))
+    return text
+
+
+class DeltaBatch:
+    """
+    Rows and settings touched since the last frame. Only row keys are kept, the fields are read when the
+    frame is encoded, so an add and a remove of the same row in one frame cancel and a row dragged through
+    twenty positions is sent once.
+    """
+
+    def __init__(self):
+        self.pipes = set()
+        self.powerups = set()
+        self.settings = False
+        self.reset = False
+        self.first_edit = None
+        self.sequence = 0
+
+    def _touch(self):
+        if self.first_edit is None:
+            self.first_edit = time.time()
+
+    def pipe_changed(self, row):
+        self._touch()
+        self.pipes.add(row)
+
+    def powerup_changed(self, row):
+        self._touch()
+        self.powerups.add(row)
+
+    def settings_changed(self):
+        self._touch()
+        self.settings = True
+
+    def level_replaced(self):
+        """The tables were swapped for others, the next frame sends the whole level"""
+        self._touch()
+        self.reset = True
+        self.pipes.clear()
+        self.powerups.clear()
+
+    def clear(self):
+        self.pipes.clear()
+        self.powerups.clear()
+        self.settings = self.reset = False
+        self.first_edit = None
+
+    def encode(self, state):
+        """The frame for everything marked, state being the editor's level_state(), then starts a new batch"""
+        _, gravity, bg, pipes, powerups = state
+        ops = []
+        if self.reset:
+            ops.append(OPS[OP_RESET].pack(OP_RESET))
+            pipe_rows, powerup_rows = pipes, powerups
+        else:
+            pipe_rows, powerup_rows = sorted(self.pipes), sorted(self.powerups)
+        pack_pipe = OPS[OP_PIPE].pack
+        for row in pipe_rows:
+            if row in pipes:
+                ops.append(pack_pipe(OP_PIPE, row, pipes.x[row], pipes.gap_top[row], pipes.width[row],
+                                     pipes.gap_height[row]))
+            else:
+                ops.append(OPS[OP_PIPE_REMOVE].pack(OP_PIPE_REMOVE, row))
+        pack_powerup = OPS[OP_POWERUP].pack
+        for row in powerup_rows:
+            if row in powerups:
+                ops.append(pack_powerup(OP_POWERUP, row, powerups.x[row], powerups.y[row], powerups.code[row]))
+            else:
+                ops.append(OPS[OP_POWERUP_REMOVE].pack(OP_POWERUP_REMOVE, row))
+        # sent whenever marked, 9 bytes aren't worth remembering what each client last got
+        if self.reset or self.settings:
+            ops.append(OPS[OP_GRAVITY].pack(OP_GRAVITY, gravity))
+            ops.append(OPS[OP_BACKGROUND].pack(OP_BACKGROUND, *bg))
+
+        edit_time = self.first_edit or time.time()
+        self.clear()
+        if not ops:
+            return None
+        payload = b"".join(ops)
+        self.sequence += 1
+        return FRAME.pack(len(payload), self.sequence, edit_time) + payload
+
+    def snapshot(self, state):
+        """A frame with the whole level, for clients that just connected. Pending marks are left alone"""
+        pending = (self.pipes, self.powerups, self.settings, self.reset, self.first_edit)
+        self.pipes, self.powerups = set(), set()
+        self.settings, self.first_edit = False, None
+        self.reset = True
+        try:
+            return self.encode(state)
+        finally:
+            self.pipes, self.powerups, self.settings, self.reset, self.first_edit = pending
+
+
+class HotReloadServer:
+    """
+    Asyncio server on its own thread. publish() and welcome() may be called from any thread, frames reach
+    each client in the order they were handed over.
+    """
+
+    def __init__(self, address=None):
+        self.address = address or default_address()
+        self.clients = set()
+        # connected but still waiting for a copy of the level, filled by the server thread
+        self.joining = deque()
+        self.frames = 0
+        self.bytes_sent = 0
+        self.dropped = 0
+        self._loop = None
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        if isinstance(self.address, str):
+            _clear_stale_socket(self.address)
+        self.clients.clear()
+        self.joining.clear()
+        ready = threading.Event()
+        error = []
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            try:
+                self._server = self._loop.run_until_complete(self._listen())
+            except OSError as e:
+                error.append(e)
+                ready.set()
+                return
+            ready.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self._shutdown())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, name="hot-reload", daemon=True)
+        self._thread.start()
+        ready.wait()
+        if error:
+            raise error[0]
+
+    def _listen(self):
+        if isinstance(self.address, str):
+            return asyncio.start_unix_server(self._connected, self.address)
+        return asyncio.start_server(self._connected, *self.address)
+
+    async def _connected(self, reader, writer):
+        self.joining.append(writer)
+        # clients never send anything, reading only notices when they hang up
+        await reader.read()
+        self.clients.discard(writer)
+        writer.close()
+
+    def welcome(self, frame):
+        """Sends frame, a copy of the whole level, to every client that joined since the last call"""
+        self._loop.call_soon_threadsafe(self._welcome, frame)
+
+    def _welcome(self, frame):
+        while self.joining:
+            writer = self.joining.popleft()
+            if self._send(writer, frame):
+                self.clients.add(writer)
+
+    def publish(self, frame):
+        self._loop.call_soon_threadsafe(self._publish, frame)
+
+    def _publish(self, frame):
+        self.frames += 1
+        for writer in list(self.clients):
+            if not self._send(writer, frame):
+                self.clients.discard(writer)
+
+    def _send(self, writer, frame):
+        if writer.is_closing() or writer.transport.get_write_buffer_size() > MAX_CLIENT_BUFFER:
+            self.dropped += not writer.is_closing()
+            writer.close()
+            return False
+        writer.write(frame)
+        self.bytes_sent += len(frame)
+        return True
+
+    async def _shutdown(self):
+        self._server.close()
+        for writer in list(self.clients) + list(self.joining):
+            writer.close()
+        # closing the writers ends the handlers' reads, let them return before the loop goes away
+        handlers = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        await asyncio.gather(*handlers, return_exceptions=True)
+        await self._server.wait_closed()
+
+    def stop(self):
+        if self._loop is not None and self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.unlink(self.address)
+
+
+def _clear_stale_socket(path):
+    """Removes a socket file left behind by an editor that crashed, refuses to take over a live one"""
+    if not os.path.exists(path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except OSError:
+        os.unlink(path)
+        return
+    finally:
+        probe.close()
+    raise OSError(f"another editor is already publishing on {path}")
+
+
+class HotReloadPublisher:
+    """
+    Editor side of the channel. The edit methods only mark rows, frames go out at most once per frame_ms
+    from root.after, and clients waiting for their first copy are served every JOIN_POLL_MS.
+    source() returns the editor's level_state(), report(publisher) runs after every poll like AutoSaver's.
+    """
+
+    def __init__(self, root, source, address=None, frame_ms=16, report=None):
+        self.root = root
+        self.source = source
+        self.report = report
+        self.server = HotReloadServer(address)
+        self.batch = DeltaBatch()
+        self.updates = UpdateScheduler(root, self.flush, frame_ms)
+        self.running = False
+        self._after = None
+
+    def start(self):
+        self.server.start()
+        self.running = True
+        self._after = self.root.after(JOIN_POLL_MS, self.poll)
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        if self._after is not None:
+            self.root.after_cancel(self._after)
+            self._after = None
+        self.server.stop()
+        self.batch.clear()
+
+    def poll(self):
+        if self.server.joining:
+            self.server.welcome(self.batch.snapshot(self.source()))
+        if self.report is not None:
+            self.report(self)
+        self._after = self.root.after(JOIN_POLL_MS, self.poll)
+
+    @timed("live frame")
+    def flush(self):
+        if not self.running:
+            return
+        if not self.server.clients:
+            # nobody to tell, whoever connects next gets the whole level anyway
+            self.batch.clear()
+            return
+        frame = self.batch.encode(self.source())
+        if frame is not None:
+            count("live bytes sent", len(frame))
+            self.server.publish(frame)
+
+    def pipe_changed(self, row):
+        if self.running:
+            self.batch.pipe_changed(row)
+            self.updates.request()
+
+    def powerup_changed(self, row):
+        if self.running:
+            self.batch.powerup_changed(row)
+            self.updates.request()
+
+    def settings_changed(self):
+        if self.running:
+            self.batch.settings_changed()
+            self.updates.request()
+
+    def level_replaced(self):
+        if self.running:
+            self.batch.level_replaced()
+            self.updates.request()
+
+    def stats(self):
+        if not self.running:
+            return ""
+        server = self.server
+        return f"Live: {len(server.clients)} clients, {server.frames} frames, {server.bytes_sent / 1024:.1f} KB"
+
+
+class LevelMirror:
+    """What a client knows about the level, rebuilt from frames alone"""
+
+    def __init__(self):
+        self.pipes = {}
+        self.powerups = {}
+        self.gravity = None
+        self.bg = None
+
+    def apply(self, payload):
+        """Applies one frame's ops, returns how many there were"""
+        view = memoryview(payload)
+        offset = 0
+        count = 0
+        while offset < len(view):
+            op = view[offset]
+            fields = OPS[op].unpack_from(view, offset)
+            offset += OPS[op].size
+            count += 1
+            if op == OP_RESET:
+                self.pipes.clear()
+                self.powerups.clear()
+            elif op == OP_PIPE:
+                self.pipes[fields[1]] = fields[2:]
+            elif op == OP_PIPE_REMOVE:
+                self.pipes.pop(fields[1], None)
+            elif op == OP_POWERUP:
+                self.powerups[fields[1]] = fields[2:]
+            elif op == OP_POWERUP_REMOVE:
+                self.powerups.pop(fields[1], None)
+            elif op == OP_GRAVITY:
+                self.gravity = fields[1]
+            else:
+                self.bg = fields[1:]
+        return count
+
+    def to_level(self, name="Live Level"):
+        level = Level(name, self.gravity, self.bg)
+        for row in sorted(self.pipes):
+            level.add_pipe(*self.pipes[row])
+        for row in sorted(self.powerups):
+            x, y, code = self.powerups[row]
+            level.add_powerup(x, y, POWERUP_TYPES[code])
+        return level
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def latency_report(latencies, frames, ops, size):
+    if not latencies:
+        return "no frames"
+    ms = [latency * 1000 for latency in latencies]
+    return (f"{frames} frames, {ops} ops, {size / 1024:.1f} KB, edit to applied: mean {sum(ms) / len(ms):.2f}ms, "
+            f"p95 {_percentile(ms, 0.95):.2f}ms, max {max(ms):.2f}ms")
+
+
+async def run_client(address, frames=None, report_every=1.0, quiet=False):
+    """Stand-in for the engine: applies frames to a LevelMirror and prints edit-to-applied latency"""
+    if isinstance(address, str):
+        reader, writer = await asyncio.open_unix_connection(address)
+    else:
+        reader, writer = await asyncio.open_connection(*address)
+    mirror = LevelMirror()
+    latencies = []
+    received = ops = size = 0
+    last_report = time.monotonic()
+    try:
+        while frames is None or received < frames:
+            try:
+                header = await reader.readexactly(FRAME.size)
+            except asyncio.IncompleteReadError:
+                break
+            length, _, edit_time = FRAME.unpack(header)
+            payload = await reader.readexactly(length)
+            ops += mirror.apply(payload)
+            latencies.append(time.time() - edit_time)
+            received += 1
+            size += FRAME.size + length
+            if not quiet and time.monotonic() - last_report >= report_every:
+                last_report = time.monotonic()
+                print(f"{len(mirror.pipes)} pipes, {len(mirror.powerups)} power-ups | "
+                      f"{latency_report(latencies, received, ops, size)}", flush=True)
+    finally:
+        writer.close()
+    print(latency_report(latencies, received, ops, size), flush=True)
+    return mirror
+
+
+def bench(pipes, edits, frame_ms, address):
+    """
+    Editor stand-in without Tk: builds a level, starts a client process, then makes `edits` pipe moves
+    spread over frames of frame_ms and sends each frame like the editor would
+    """
+    import random
+    from level_table import PipeTable, PowerupTable
+
+    rng = random.Random(0)
+    table = PipeTable({'x': 400 + i * 250, 'gap_top': rng.randint(50, 300), 'width': 60, 'gap_height': 150}
+                      for i in range(pipes))
+    state = ("Bench", 800.0, (135, 206, 235), table, PowerupTable())
+    server = HotReloadServer(address)
+    server.start()
+    batch = DeltaBatch()
+    per_frame = 20
+    frames = 1 + -(-edits // per_frame)
+    address_arg = address if isinstance(address, str) else f"{address[0]}:{address[1]}"
+    client = subprocess.Popen([sys.executable, __file__, "client", "--address", address_arg,
+                               "--frames", str(frames), "--quiet"])
+    try:
+        while not server.joining:
+            time.sleep(0.01)
+        start = time.perf_counter()
+        server.welcome(batch.snapshot(state))
+        print(f"full level: {pipes} pipes encoded in {(time.perf_counter() - start) * 1000:.1f}ms")
+        rows = list(table)
+        for frame in range(frames - 1):
+            for _ in range(per_frame):
+                row = rng.choice(rows)
+                table.update(row, x=table.x[row] + rng.randint(-5, 5))
+                batch.pipe_changed(row)
+            server.publish(batch.encode(state))
+            time.sleep(frame_ms / 1000)
+        client.wait()
+    finally:
+        server.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stand-in game client for the editor's live reload channel")
+    parser.add_argument("command", choices=("client", "bench"))
+    parser.add_argument("--address", type=parse_address, default=None,
+                        help="Unix socket path or host:port (default: the editor's)")
+    parser.add_argument("--frames", type=int, default=None, help="client: exit after this many frames")
+    parser.add_argument("--quiet", action="store_true", help="client: only print the final report")
+    parser.add_argument("--pipes", type=int, default=1000, help="bench: level size")
+    parser.add_argument("--edits", type=int, default=2000, help="bench: pipe moves to send")
+    parser.add_argument("--frame-ms", type=int, default=16, help="bench: time between frames")
+    args = parser.parse_args(argv)
+
+    address = args.address or default_address()
+    if args.command == "bench":
+        bench(args.pipes, args.edits, args.frame_ms, address)
+        return 0
+    try:
+        asyncio.run(run_client(address, args.frames, quiet=args.quiet))
+    except (ConnectionError, FileNotFoundError) as e:
+        print(f"can't connect to {address}: {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+"""
+Opt-in instrumentation for the editor
+Operations decorated with timed() or wrapped in span() are timed, count() keeps named counters (canvas
+items created, bytes serialized, ...). While disabled, which is the default, a timed call costs one
+flag check and span() hands back a shared no-op, nothing is recorded.
+
+Enabled, every operation becomes a complete event in a bounded buffer, a FrameMonitor measures how long
+the Tk loop takes to come back to an idle timer, and a Sampler can walk the Tk thread's stack every few
+ms. export_chrome_trace writes all of it in the Chrome trace event format, which chrome://tracing,
+Perfetto and speedscope open as is.
+
+    python instrumentation.py summary trace.json
+    python instrumentation.py --bench
+"""
+import argparse
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+# events kept for export, the oldest go first
+MAX_EVENTS = 200000
+MAX_SAMPLES = 100000
+# frames slower than this are logged with the operations that ran in them
+SLOW_FRAME_MS = 50
+
+enabled = False
+_origin = time.perf_counter()
+_events = deque(maxlen=MAX_EVENTS)
+# name -> [calls, total seconds, max seconds]
+_stats = {}
+_counters = Counter()
+_lock = threading.Lock()
+
+
+def enable():
+    global enabled
+    enabled = True
+
+
+def disable():
+    global enabled
+    enabled = False
+
+
+def reset():
+    global _origin
+    with _lock:
+        _origin = time.perf_counter()
+        _events.clear()
+        _stats.clear()
+        _counters.clear()
+
+
+def _record(name, start, end, args=None):
+    elapsed = end - start
+    event = ("X", name, start, elapsed, threading.get_ident(), args)
+    with _lock:
+        _events.append(event)
+        stat = _stats.get(name)
+        if stat is None:
+            _stats[name] = [1, elapsed, elapsed]
+        else:
+            stat[0] += 1
+            stat[1] += elapsed
+            if elapsed > stat[2]:
+                stat[2] = elapsed
+
+
+def timed(name):
+    """Decorator recording each call of the function as operation `name`"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _record(name, start, time.perf_counter())
+        return wrapper
+    return decorate
+
+
+class _Span:
+    __slots__ = ('name', 'args', 'start')
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        _record(self.name, self.start, time.perf_counter(), self.args)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name, **args):
+    """Context manager timing its block as operation `name`, args end up in the trace event"""
+    if not enabled:
+        return _NULL_SPAN
+    return _Span(name, args or None)
+
+
+def count(name, n=1):
+    if enabled:
+        with _lock:
+            _counters[name] += n
+
+
+def counters():
+    with _lock:
+        return dict(_counters)
+
+
+def stats():
+    """{operation: (calls, total ms, max ms)}"""
+    with _lock:
+        return {name: (calls, total * 1000, worst * 1000) for name, (calls, total, worst) in _stats.items()}
+
+
+class FrameMonitor:
+    """
+    Idle timer on the Tk loop, a frame is the time between two of its ticks. Anything that blocks the loop
+    (a redraw, a save) stretches the frame it ran in, so frame times are what the user feels as lag.
+    report(monitor) runs every report_ms, log(line) gets one line per slow frame.
+    """
+
+    def __init__(self, root, frame_ms=16, report=None, report_ms=500, log=None):
+        self.root = root
+        self.frame_ms = frame_ms
+        self.report = report
+        self.report_ms = report_ms
+        self.log = log
+        self.frames = deque(maxlen=120)
+        self.slow = 0
+        self._after = None
+        self._last = None
+        self._last_report = 0.0
+        self._last_stats = {}
+
+    def start(self):
+        self._last = self._last_report = time.perf_counter()
+        self._last_stats = stats()
+        self._after = self.root.after(self.frame_ms, self.tick)
+
+    def stop(self):
+        if self._after is not None:
+            self.root.after_cancel(self._after)
+            self._after = None
+
+    def tick(self):
+        now = time.perf_counter()
+        frame = (now - self._last) * 1000
+        self._last = now
+        self.frames.append(frame)
+        with _lock:
+            _events.append(("C", "frame ms", now, frame, threading.get_ident(), None))
+        if frame >= SLOW_FRAME_MS:
+            self.slow += 1
+            if self.log is not None:
+                self.log(f"slow frame {frame:.0f}ms: {self.busiest()}")
+        if (now - self._last_report) * 1000 >= self.report_ms:
+            self._last_report = now
+            self._last_stats = stats()
+            if self.report is not None:
+                self.report(self)
+        self._after = self.root.after(self.frame_ms, self.tick)
+
+    def busiest(self, limit=3):
+        """Operations that took the most time since the last report"""
+        current = stats()
+        spent = []
+        for name, (calls, total, _) in current.items():
+            before = self._last_stats.get(name, (0, 0.0, 0.0))
+            if calls > before[0]:
+                spent.append((total - before[1], calls - before[0], name))
+        spent.sort(reverse=True)
+        return ", ".join(f"{name} {ms:.1f}ms x{calls}" for ms, calls, name in spent[:limit]) or "idle"
+
+    def summary(self):
+        if not self.frames:
+            return ""
+        frames = list(self.frames)
+        return (f"frame avg {sum(frames) / len(frames):.1f}ms, worst {max(frames):.0f}ms | "
+                f"{self.busiest()}")
+
+
+class Sampler:
+    """Statistical profiler for one thread (the Tk thread by default), its stack is read every interval_ms"""
+
+    def __init__(self, thread_id=None, interval_ms=5):
+        self.thread_id = thread_id or threading.main_thread().ident
+        self.interval = interval_ms / 1000
+        self.stacks = Counter()
+        self.samples = deque(maxlen=MAX_SAMPLES)
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            # root first, like a flame graph reads
+            stack = tuple(reversed(stack))
+            self.stacks[stack] += 1
+            self.samples.append((time.perf_counter(), stack))
+
+    def top(self, limit=10):
+        """(function, samples it was running in, samples it was at the top of) by inclusive samples"""
+        inclusive = Counter()
+        own = Counter()
+        for stack, n in self.stacks.items():
+            for name in set(stack):
+                inclusive[name] += n
+            if stack:
+                own[stack[-1]] += n
+        return [(name, n, own[name]) for name, n in inclusive.most_common(limit)]
+
+    def collapsed(self):
+        """Stacks in the folded "a;b;c count" format flame graph tools read"""
+        return "\n".join(f"{';'.join(stack)} {n}" for stack, n in self.stacks.most_common())
+
+
+def _us(seconds):
+    return round((seconds - _origin) * 1e6, 1)
+
+
+def chrome_trace(sampler=None):
+    """The recorded events (and sampler stacks) as a Chrome trace event format dict"""
+    pid = os.getpid()
+    with _lock:
+        events = list(_events)
+        totals = dict(_counters)
+    threads = {event[4] for event in events}
+    names = {thread.ident: thread.name for thread in threading.enumerate()}
+    trace = [{"ph": "M", "name": "thread_name", "pid": pid, "tid": tid, "args": {"name": names.get(tid, str(tid))}}
+             for tid in threads]
+    for phase, name, start, value, tid, args in events:
+        if phase == "X":
+            event = {"ph": "X", "name": name, "cat": "editor", "pid": pid, "tid": tid, "ts": _us(start),
+                     "dur": round(value * 1e6, 1)}
+            if args:
+                event["args"] = args
+        else:
+            event = {"ph": "C", "name": name, "pid": pid, "tid": tid, "ts": _us(start), "args": {"ms": value}}
+        trace.append(event)
+    data = {"traceEvents": trace, "displayTimeUnit": "ms", "otherData": {"counters": totals}}
+
+    if sampler is not None and sampler.samples:
+        # every distinct stack prefix becomes a stackFrames node, samples point at their leaf
+        frames = {}
+        ids = {}
+        samples = []
+        for ts, stack in list(sampler.samples):
+            parent = None
+            for depth in range(len(stack)):
+                key = stack[:depth + 1]
+                node = ids.get(key)
+                if node is None:
+                    node = ids[key] = str(len(ids) + 1)
+                    frames[node] = {"name": stack[depth], "category": "python"}
+                    if parent is not None:
+                        frames[node]["parent"] = parent
+                parent = node
+            if parent is not None:
+                samples.append({"cpu": 0, "tid": sampler.thread_id, "ts": _us(ts), "name": "sample", "sf": parent,
+                                "weight": 1})
+        data["stackFrames"] = frames
+        data["samples"] = samples
+    return data
+
+
+def export_chrome_trace(filepath, sampler=None):
+    """Writes chrome_trace() to filepath, returns the number of events"""
+    data = chrome_trace(sampler)
+    with open(filepath, 'w') as f:
+        json.dump(data, f)
+    return len(data["traceEvents"]) + len(data.get("samples", ()))
+
+
+def summarize(data, limit=15):
+    """Per-operation table, counters and hottest sampled functions of a trace dict"""
+    ops = {}
+    frames = []
+    for event in data.get("traceEvents", []):
+        if event.get("ph") == "X":
+            stat = ops.setdefault(event["name"], [0, 0.0, 0.0])
+            stat[0] += 1
+            stat[1] += event["dur"] / 1000
+            stat[2] = max(stat[2], event["dur"] / 1000)
+        elif event.get("ph") == "C" and event.get("name") == "frame ms":
+            frames.append(event["args"]["ms"])
+    lines = [f"{'operation':<24} {'calls':>7} {'total ms':>10} {'mean ms':>9} {'max ms':>9}"]
+    for name, (calls, total, worst) in sorted(ops.items(), key=lambda item: -item[1][1])[:limit]:
+        lines.append(f"{name:<24} {calls:>7} {total:>10.1f} {total / calls:>9.2f} {worst:>9.1f}")
+    if frames:
+        frames.sort()
+        lines.append(f"\n{len(frames)} frames: median {frames[len(frames) // 2]:.1f}ms, "
+                     f"p95 {frames[int(len(frames) * 0.95)]:.1f}ms, worst {frames[-1]:.1f}ms")
+    totals = data.get("otherData", {}).get("counters", {})
+    if totals:
+        lines.append("\n" + ", ".join(f"{name}: {value:,}" for name, value in sorted(totals.items())))
+
+    samples = data.get("samples", [])
+    if samples:
+        nodes = data["stackFrames"]
+        inclusive = Counter()
+        for sample in samples:
+            seen = set()
+            node = sample["sf"]
+            while node is not None:
+                name = nodes[node]["name"]
+                if name not in seen:
+                    seen.add(name)
+                    inclusive[name] += 1
+                node = nodes[node].get("parent")
+        lines.append(f"\n{len(samples)} samples, by inclusive share:")
+        for name, n in inclusive.most_common(limit):
+            lines.append(f"  {n / len(samples):>6.1%}  {name}")
+    return "\n".join(lines)
+
+
+def bench(calls=1000000):
+    """Cost of a timed() call and a count() with instrumentation off and on"""
+    @timed("bench")
+    def noop():
+        pass
+
+    def plain():
+        pass
+
+    results = {}
+    for label, func in (("plain call", plain), ("timed call", noop), ("count", lambda: count("bench"))):
+        for state in (False, True):
+            globals()['enabled'] = state
+            start = time.perf_counter()
+            for _ in range(calls):
+                func()
+            results[label, state] = (time.perf_counter() - start) / calls * 1e9
+    globals()['enabled'] = False
+    reset()
+    for label in ("plain call", "timed call", "count"):
+        print(f"{label:<12} disabled {results[label, False]:6.0f} ns   enabled {results[label, True]:6.0f} ns")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize editor traces or measure instrumentation overhead")
+    parser.add_argument("command", nargs="?", choices=("summary",))
+    parser.add_argument("trace", nargs="?", help="trace JSON written by the editor")
+    parser.add_argument("--bench", action="store_true", help="time timed() and count() disabled vs enabled")
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        bench()
+        return 0
+    if args.command is None or args.trace is None:
+        parser.error("summary needs a trace file")
+    with open(args.trace, 'r') as f:
+        print(summarize(json.load(f)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Level playability analyzer
+Propagates the bird's reachable vertical envelope between every pair of consecutive pipes at once with the
+engine's physics, and flags transitions nothing gets through (impossible) or only a sliver does (tight).
+passable_arrays answers only "impossible or not" and settles most transitions with one simulated bird first.
+
+    python level_analyzer.py ../levels/level3_hard.json
+    python level_analyzer.py --bench 1000
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from flap_physics import (BIRD_SIZE, BIRD_START_Y, CEILING_Y, FLAP_COOLDOWN, FLOOR_Y, FRAME_DT, JUMP_POWER, PIPE_SPEED,
+                          column_arrays, pipe_arrays, pipe_frames)
+
+# reachable band narrower than this (px) inside a pipe counts as too tight
+TIGHT_MARGIN = 8
+
+OK = 0
+TIGHT = 1
+IMPOSSIBLE = 2
+STATUS_NAMES = ('ok', 'tight', 'impossible')
+
+# sentinel for an empty interval, every real y fits well inside int16
+_EMPTY = 30000
+# below any real lo or -hi, what non-empty slots get maxed against
+_FLOOR = -2000
+
+
+class Analysis:
+    """Per-pipe results, indexed like the pipes that were analyzed"""
+
+    def __init__(self, status, margin):
+        self.status = status
+        self.margin = margin
+
+    def problems(self):
+        """(pipe index, status name, margin) for every flagged pipe"""
+        return [(int(i), STATUS_NAMES[self.status[i]], float(self.margin[i]))
+                for i in np.flatnonzero(self.status != OK)]
+
+    def counts(self):
+        return {name: int(np.count_nonzero(self.status == code)) for code, name in enumerate(STATUS_NAMES)}
+
+
+def fall_steps(gravity, jump_power=JUMP_POWER):
+    """
+    Per-frame y step n frames after a flap (n=0 is the flap frame), long enough that a bird which
+    stops flapping at the ceiling has hit the ground by the last entry
+    """
+    steps = []
+    travel = 0
+    n = 0
+    while travel <= FLOOR_Y - CEILING_Y or n < 2:
+        dy = int((jump_power + gravity * FRAME_DT * (n + 1)) * FRAME_DT)
+        steps.append(dy)
+        travel += dy
+        n += 1
+        if n > 10000:
+            break
+    return np.array(steps, dtype=np.int64)
+
+
+def analyze_pipes(pipes, gravity, jump_power=JUMP_POWER, pipe_speed=PIPE_SPEED):
+    return _analyze_sorted(pipe_arrays(pipes), gravity, jump_power, pipe_speed)
+
+
+def analyze_columns(x, gap_top, width, gap_height, gravity, jump_power=JUMP_POWER, pipe_speed=PIPE_SPEED):
+    """analyze_pipes for pipe fields held as columns, results are indexed like the columns"""
+    return _analyze_sorted(column_arrays(x, gap_top, width, gap_height), gravity, jump_power, pipe_speed)
+
+
+def _analyze_sorted(arrays, gravity, jump_power, pipe_speed):
+    order, left, width, top, bottom = arrays
+    count = len(order)
+    if count == 0:
+        return Analysis(np.zeros(0, dtype=np.int8), np.zeros(0))
+
+    starts = np.zeros(count, dtype=bool)
+    starts[0] = True
+    status, margin = analyze_arrays(left, width, top, bottom, starts, gravity, jump_power, pipe_speed)
+
+    # back to the caller's pipe order
+    result_status = np.empty(count, dtype=np.int8)
+    result_margin = np.empty(count)
+    result_status[order] = status
+    result_margin[order] = margin
+    return Analysis(result_status, result_margin)
+
+
+class _Transitions:
+    """
+    Per transition (one per pipe): the frame window from leaving the previous pipe (or spawn, or the
+    open sky before a far pipe) until clearing this one, where the bird may start and the gap it has
+    to get through. Shared by the interval analysis and the flap-policy check.
+    """
+    ROWS = ('start', 'first', 'last', 'prev_last', 'has_prev', 'seeded', 'prev_lo', 'prev_hi',
+            'band_lo', 'band_hi')
+
+    def __init__(self, left, width, top, bottom, starts, gravity, jump_power, pipe_speed):
+        self.steps = fall_steps(gravity, jump_power)
+        self.columns = columns = len(self.steps)
+        # spawn is v = 0, which is the column whose velocity is closest to zero, one the bird may flap from
+        self.spawn_column = min(columns - 1, max(FLAP_COOLDOWN - 1,
+                                                 int(round(-jump_power / (gravity * FRAME_DT))) - 1))
+
+        first, last = pipe_frames(left, width, pipe_speed)
+        band_lo = np.maximum(np.ceil(top), CEILING_Y).astype(np.int16)
+        band_hi = np.minimum(np.floor(bottom) - BIRD_SIZE, FLOOR_Y).astype(np.int16)
+        has_prev = ~np.asarray(starts, dtype=bool)
+        prev_last = np.concatenate(([0], last[:-1]))
+        start = np.where(has_prev, np.minimum(prev_last, first - 1), 0)
+        # a bird falls from the ceiling to the floor within `columns` frames, longer gaps start from open sky
+        open_sky = first - 1 - start > columns
+        start = np.where(open_sky, first - 1 - columns, start)
+        self.start, self.first, self.last, self.prev_last = start, first, last, prev_last
+        self.has_prev = has_prev
+        self.seeded = has_prev | open_sky
+        self.prev_lo = np.where(open_sky, CEILING_Y, np.concatenate(([BIRD_START_Y], band_lo[:-1]))).astype(np.int16)
+        self.prev_hi = np.where(open_sky, FLOOR_Y, np.concatenate(([BIRD_START_Y], band_hi[:-1]))).astype(np.int16)
+        self.band_lo, self.band_hi = band_lo, band_hi
+
+    def __len__(self):
+        return len(self.start)
+
+    def take(self, rows):
+        taken = object.__new__(_Transitions)
+        taken.__dict__.update(self.__dict__)
+        for name in self.ROWS:
+            setattr(taken, name, getattr(self, name)[rows])
+        return taken
+
+    def span(self):
+        return self.last - self.start
+
+    def bands(self, frames):
+        """
+        (lo, hi, active, in_cur) arrays of shape (frames, transitions) for frames 1..frames into each
+        transition: the safe band (pipes that overlap in time both apply), whether the transition is
+        still running and whether its own pipe is under the bird
+        """
+        k = np.arange(1, frames + 1)[:, None]
+        active = k <= self.span()
+        in_prev = self.has_prev & (k <= self.prev_last - self.start)
+        in_cur = (k >= self.first - self.start) & active
+        lo = np.maximum(np.where(in_prev, self.prev_lo, np.int16(CEILING_Y)),
+                        np.where(in_cur, self.band_lo, np.int16(CEILING_Y)))
+        hi = np.minimum(np.where(in_prev, self.prev_hi, np.int16(FLOOR_Y)),
+                        np.where(in_cur, self.band_hi, np.int16(FLOOR_Y)))
+        return lo, hi, active, in_cur
+
+
+def analyze_arrays(left, width, top, bottom, starts, gravity, jump_power=JUMP_POWER, pipe_speed=PIPE_SPEED):
+    """
+    (status, margin) arrays for pipes given as left-sorted geometry arrays. `starts` marks the pipes a run
+    begins at, so several levels sharing a gravity can be concatenated and checked in one call.
+
+    Transition t starts as the bird leaves pipe t-1 (spawn for a run's first pipe) and ends when it clears
+    pipe t, all transitions run side by side. The state is a y interval per "frames since the last flap"
+    column, each column stands for every flap schedule whose last flap was that long ago, so one step of
+    the arrays integrates all schedules at once. A transition starts from pipe t-1's whole gap at any
+    velocity, so "impossible" means no flap sequence gets through from anywhere in the previous gap.
+    After a long empty stretch every state has had time to mix, so such a transition starts a fixed
+    number of frames before its pipe from the whole open sky instead, which keeps the arrays bounded.
+    """
+    return _analyze_transitions(_Transitions(left, width, top, bottom, starts, gravity, jump_power, pipe_speed))
+
+
+def passable_arrays(left, width, top, bottom, starts, gravity, jump_power=JUMP_POWER, pipe_speed=PIPE_SPEED):
+    """
+    Per pipe, True exactly where analyze_arrays' status is not IMPOSSIBLE, for callers that don't need
+    the margins. A single bird that flaps whenever it would sink below a target height is enough to show
+    a transition isn't impossible, since the intervals contain every real flight. A few targets are
+    tried on whatever is still unproven, only what none gets through goes through the full analysis.
+    """
+    transitions = _Transitions(left, width, top, bottom, starts, gravity, jump_power, pipe_speed)
+    passable = np.zeros(len(transitions), dtype=bool)
+    rows = np.arange(len(transitions))
+    for target in _flap_targets(transitions):
+        if not len(rows):
+            return passable
+        flown = _flies_through(transitions.take(rows), target[rows])
+        passable[rows[flown]] = True
+        rows = rows[~flown]
+    if len(rows):
+        status, _ = _analyze_transitions(transitions.take(rows))
+        passable[rows] = status != IMPOSSIBLE
+    return passable
+
+
+def _flap_targets(transitions):
+    """Heights to hold the bird at: mid-gap, low enough that a flap peaks just under the gap's top, gap bottom"""
+    lo = transitions.band_lo.astype(np.int64)
+    hi = transitions.band_hi.astype(np.int64)
+    rise = -int(np.cumsum(transitions.steps).min())
+    return (lo + hi) // 2, np.minimum(hi, lo + rise + 2), hi - 1
+
+
+def _flies_through(transitions, target):
+    """Whether a bird flapping as soon as it would sink below `target` stays inside every band"""
+    steps, columns = transitions.steps, transitions.columns
+    span = transitions.span()
+    frames = int(max(1, span.max(initial=0)))
+    lo, hi, active, _ = transitions.bands(frames)
+    y = np.where(transitions.seeded, np.clip(target, transitions.prev_lo, transitions.prev_hi), BIRD_START_Y)
+    column = np.full(len(transitions), transitions.spawn_column)
+    # a previous gap too narrow for the bird leaves nowhere to start from
+    inside = ~transitions.seeded | (transitions.prev_lo <= transitions.prev_hi)
+    for f in range(frames):
+        fall = y + steps[np.minimum(column + 1, columns - 1)]
+        # no flap within FLAP_COOLDOWN frames of the last one, the key has to come up first
+        flap = (column >= FLAP_COOLDOWN - 1) & (fall > target)
+        y = np.where(flap, y + steps[0], fall)
+        column = np.where(flap, 0, column + 1)
+        inside &= ~active[f] | ((lo[f] <= y) & (y <= hi[f]) & (column < columns))
+    return inside
+
+
+def _analyze_transitions(transitions):
+    count = len(transitions)
+    steps, columns = transitions.steps, transitions.columns
+    span = transitions.span()
+    frames = int(max(1, span.max(initial=0)))
+
+    # longest transitions first: frame f only steps the leading `running[f]` transitions that haven't
+    # cleared their pipe yet, so the work follows the total length of the transitions rather than
+    # count times the longest one
+    by_span = np.argsort(-span, kind='stable')
+    transitions = transitions.take(by_span)
+    running = np.searchsorted(-span[by_span], -np.arange(frames), side='left')
+    lo, hi, active, in_cur = transitions.bands(frames)
+    bands = np.empty((frames, 2, 1, count), dtype=np.int16)
+    bands[:, 0, 0] = lo
+    np.negative(hi, out=bands[:, 1, 0])
+
+    # reachable y interval per frames-since-flap column and transition, stored as (lo, -hi) so both
+    # bounds shift, clamp and reduce with the same calls; int16 with transitions innermost keeps every
+    # step a short contiguous sweep
+    seeded = transitions.seeded
+    state = np.full((2, columns, count), _EMPTY, dtype=np.int16)
+    state[0, 1:, seeded] = transitions.prev_lo[seeded, None]
+    state[1, 1:, seeded] = -transitions.prev_hi[seeded, None]
+    state[0, transitions.spawn_column, ~seeded] = BIRD_START_Y
+    state[1, transitions.spawn_column, ~seeded] = -BIRD_START_Y
+
+    signed_steps = np.stack((steps, -steps)).astype(np.int16)[:, :, None]
+
+    alive = np.ones(count, dtype=bool)
+    margin = np.full(count, _EMPTY, dtype=np.int32)
+    after = np.empty_like(state)
+    negated = np.empty((columns, count), dtype=np.int16)
+    empty = np.empty((columns, count), dtype=bool)
+    extent = np.empty((2, count), dtype=np.int16)
+    # columns a flap may start from, and the ones too soon after the last flap
+    ready = slice(FLAP_COOLDOWN - 1, None)
+    cooling = slice(0, FLAP_COOLDOWN - 1)
+    flappable = np.min(state[:, ready], axis=1)
+    for f in range(frames):
+        m = running[f]
+        # transitions past m are done, their columns in either buffer are never read again
+        now, nxt = state[:, :, :m], after[:, :, :m]
+        flap, neg, emp = flappable[:, :m], negated[:, :m], empty[:, :m]
+        # flap from any column past the cooldown (the key has to come up first), or keep falling one column on
+        np.add(flap, signed_steps[:, 0], out=nxt[:, 0])
+        np.add(now[:, :-1], signed_steps[:, 1:], out=nxt[:, 1:])
+        np.maximum(nxt, bands[f, :, :, :m], out=nxt)
+        # intervals the band emptied are pushed up to the sentinel (masks are cheaper as arithmetic than
+        # copyto, and as uint8 than as bool), a sentinel only drifts by the steps of the columns it walks through, so it can't overflow
+        np.negative(nxt[1], out=neg)
+        np.greater(nxt[0], neg, out=emp)
+        np.multiply(emp.view(np.uint8), np.int16(_EMPTY - _FLOOR), out=neg)
+        np.add(neg, _FLOOR, out=neg)
+        np.maximum(nxt, neg, out=nxt)
+        state, after = after, state
+
+        # the hull over the ready columns is also next frame's flap source
+        np.min(nxt[:, ready], axis=1, out=flap)
+        np.minimum(flap, np.min(nxt[:, cooling], axis=1), out=extent[:, :m])
+        reach = -extent[1, :m].astype(np.int32) - extent[0, :m]
+        alive[:m] &= ~active[f, :m] | (reach >= 0)
+        np.minimum(margin[:m], np.where(in_cur[f, :m], reach, _EMPTY), out=margin[:m])
+
+    margin = np.where(alive, margin, 0)
+    status = np.where(~alive, IMPOSSIBLE, np.where(margin < TIGHT_MARGIN, TIGHT, OK)).astype(np.int8)
+    # back to the order the transitions came in
+    result_status = np.empty_like(status)
+    result_margin = np.empty_like(margin)
+    result_status[by_span] = status
+    result_margin[by_span] = margin
+    return result_status, result_margin
+
+
+def analyze_level(level):
+    return analyze_pipes(level.pipes, level.gravity)
+
+
+def bench(count):
+    from level_model import Level, clamp_gap_top
+    rng = np.random.default_rng(0)
+    level = Level("Analyzer Bench")
+    for i in range(count):
+        gap = int(rng.integers(100, 200))
+        level.add_pipe(400.0 + i * 250, clamp_gap_top(int(rng.integers(0, 600)), gap), 60, gap)
+    analyze_level(level)
+    runs = 10
+    start = time.perf_counter()
+    for _ in range(runs):
+        analysis = analyze_level(level)
+    elapsed = (time.perf_counter() - start) / runs
+    print(f"{count} pipes: {elapsed * 1000:.1f} ms per analysis, {analysis.counts()}")
+
+
+def main(argv=None):
+    from level_io import load_level_file
+    parser = argparse.ArgumentParser(description="Check that every pipe of a level can be flown through")
+    parser.add_argument("levels", nargs="*")
+    parser.add_argument("--bench", type=int, metavar="N", help="time the analyzer on N generated pipes")
+    args = parser.parse_args(argv)
+    if args.bench:
+        bench(args.bench)
+        return 0
+
+    failed = False
+    for path in args.levels:
+        level = load_level_file(path)
+        analysis = analyze_level(level)
+        print(f"{path}: {len(level.pipes)} pipes, {analysis.counts()}")
+        for index, status, margin in analysis.problems():
+            pipe = level.pipes[index]
+            print(f"  pipe {index} at x={pipe['x']:.0f}: {status} (reachable band {margin:.0f}px)")
+            failed |= status == 'impossible'
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
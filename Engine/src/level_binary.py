@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Packed binary level format (.fblv)
+A versioned header followed by flat little-endian columns, converts losslessly to and from the JSON level
+
+    python level_binary.py ../levels/level1_easy.json level1_easy.fblv
+    python level_binary.py level1_easy.fblv level1_easy.json
+
+Layout, the header is padded to 8 bytes so every f64 column and the i32 column after them start on an 8 byte
+boundary, the u8 column follows the widths and is only 4 byte aligned when the pipe count is odd:
+    header    magic 'FBLV', u16 version, u16 header size, f64 gravity, u8 bgR/bgG/bgB, u8 pad,
+              u32 pipe count, u32 power-up count, u16 name length, utf-8 name, zero pad
+    f64       pipe x, pipe gap_top, pipe gap_height, power-up x, power-up y
+    i32       pipe width
+    u8        power-up type code (index into level_model.POWERUP_TYPES)
+"""
+import argparse
+import mmap
+import struct
+import sys
+from array import array
+
+from level_model import Level, POWERUP_TYPES, POWERUP_CODES
+
+MAGIC = b'FBLV'
+VERSION = 1
+EXTENSION = '.fblv'
+
+_HEADER = struct.Struct('<4sHHdBBBBIIH')
+# the padded header size is a u16 and the header holds the name
+MAX_NAME_BYTES = (0xFFFF & ~7) - _HEADER.size
+
+
+def _pad8(n):
+    return (n + 7) & ~7
+
+
+def _column(typecode, values):
+    col = array(typecode, values)
+    if sys.byteorder != 'little':
+        col.byteswap()
+    return col.tobytes()
+
+
+def pack_level(level):
+    name = level.name.encode('utf-8')
+    if len(name) > MAX_NAME_BYTES:
+        raise ValueError(f"level name is {len(name)} bytes of UTF-8, a packed level holds at most {MAX_NAME_BYTES}")
+    header_size = _pad8(_HEADER.size + len(name))
+    header = _HEADER.pack(MAGIC, VERSION, header_size, float(level.gravity), level.bg_r, level.bg_g, level.bg_b, 0,
+                          len(level.pipes), len(level.powerups), len(name)) + name
+    pipes = level.pipes
+    powerups = level.powerups
+    body = b''.join((
+        _column('d', [p['x'] for p in pipes]),
+        _column('d', [p['gap_top'] for p in pipes]),
+        _column('d', [p['gap_height'] for p in pipes]),
+        _column('d', [p['x'] for p in powerups]),
+        _column('d', [p['y'] for p in powerups]),
+        _column('i', [p['width'] for p in pipes]),
+        _column('B', [POWERUP_CODES[p['type']] for p in powerups]),
+    ))
+    return header.ljust(header_size, b'\0') + body
+
+
+def write_level_binary(level, filepath):
+    data = pack_level(level)
+    with open(filepath, 'wb') as f:
+        f.write(data)
+    return len(data)
+
+
+class BinaryLevelView:
+    """
+    Zero-copy view over a packed level, columns are memoryviews straight into the buffer
+    (a memory-mapped file when opened by path) and work with numpy.frombuffer as they are
+    """
+
+    def __init__(self, buffer):
+        self._mmap = None
+        self._buffer = memoryview(buffer)
+        (magic, version, header_size, self.gravity, self.bg_r, self.bg_g, self.bg_b, _,
+         self.pipe_count, self.powerup_count, name_len) = _HEADER.unpack_from(self._buffer)
+        if magic != MAGIC:
+            raise ValueError("not a packed level file")
+        if version > VERSION:
+            raise ValueError(f"packed level version {version} is newer than supported ({VERSION})")
+        self.version = version
+        self.name = bytes(self._buffer[_HEADER.size:_HEADER.size + name_len]).decode('utf-8')
+
+        offset = header_size
+        n = self.pipe_count
+        m = self.powerup_count
+        self.pipe_x, offset = self._slice(offset, 'd', n)
+        self.pipe_gap_top, offset = self._slice(offset, 'd', n)
+        self.pipe_gap_height, offset = self._slice(offset, 'd', n)
+        self.powerup_x, offset = self._slice(offset, 'd', m)
+        self.powerup_y, offset = self._slice(offset, 'd', m)
+        self.pipe_width, offset = self._slice(offset, 'i', n)
+        self.powerup_type, offset = self._slice(offset, 'B', m)
+
+    def _slice(self, offset, typecode, count):
+        size = struct.calcsize(typecode) * count
+        end = offset + size
+        if end > len(self._buffer):
+            raise ValueError("packed level file is truncated")
+        raw = self._buffer[offset:end]
+        if sys.byteorder != 'little' and typecode != 'B':
+            col = array(typecode, raw)
+            col.byteswap()
+            return memoryview(col), end
+        return raw.cast(typecode), end
+
+    @classmethod
+    def open(cls, filepath):
+        with open(filepath, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = cls(mapped)
+        view._mmap = mapped
+        return view
+
+    def close(self):
+        # every exported memoryview has to go before the mapping can close
+        for attr in ('pipe_x', 'pipe_gap_top', 'pipe_gap_height', 'powerup_x', 'powerup_y', 'pipe_width',
+                     'powerup_type'):
+            getattr(self, attr).release()
+        self._buffer.release()
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def to_level(self):
+        level = Level(self.name, self.gravity, (self.bg_r, self.bg_g, self.bg_b))
+        for x, gap_top, width, gap_height in zip(self.pipe_x, self.pipe_gap_top, self.pipe_width,
+                                                 self.pipe_gap_height):
+            level.add_pipe(x, gap_top, width, gap_height)
+        for x, y, code in zip(self.powerup_x, self.powerup_y, self.powerup_type):
+            level.add_powerup(x, y, POWERUP_TYPES[code])
+        return level
+
+
+def read_level_binary(filepath):
+    with BinaryLevelView.open(filepath) as view:
+        return view.to_level()
+
+
+def is_binary_level(filepath):
+    return filepath.lower().endswith(EXTENSION)
+
+
+def main(argv=None):
+    from level_io import load_level_file, save_level_file, level_to_json
+    parser = argparse.ArgumentParser(description="Convert between JSON and packed binary levels")
+    parser.add_argument("source")
+    parser.add_argument("dest")
+    args = parser.parse_args(argv)
+
+    level = read_level_binary(args.source) if is_binary_level(args.source) else load_level_file(args.source)
+    if is_binary_level(args.dest):
+        size = write_level_binary(level, args.dest)
+        # packed -> unpacked has to give back exactly the same engine JSON
+        if level_to_json(read_level_binary(args.dest)) != level_to_json(level):
+            print("Round trip mismatch!")
+            return 1
+    else:
+        size = save_level_file(level, args.dest)
+    print(f"Wrote {args.dest} ({size} bytes, {len(level.pipes)} pipes, {len(level.powerups)} power-ups)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
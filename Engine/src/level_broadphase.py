@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Collision broadphase section for engine level JSON
+An optional top-level "broadphase" object listing every collider as an x span sorted by left edge, with its
+tag as a small integer code and the index of its GameObject. Pipes all scroll at the same speed, so the order
+never changes at runtime: the engine can offset the bird's x by the scroll distance and binary-search the
+left edges for the few colliders near it instead of walking and string-comparing every object each frame.
+The engine's loader ignores keys it doesn't know, so files with the section still load everywhere.
+
+    "broadphase": {"version": 1, "tags": ["ground", "pipe", ...], "maxWidth": 800,
+                   "left": [...], "right": [...], "tag": [...], "object": [...]}
+
+    python level_broadphase.py verify ../levels
+    python level_broadphase.py add level.json
+"""
+import argparse
+import json
+import os
+import sys
+from bisect import bisect_left, bisect_right
+
+BROADPHASE_VERSION = 1
+# code = index, fixed so the engine can switch on the integers, tags not listed here get their own codes after
+TAG_CODES = ("ground", "pipe", "powerup_invincibility", "powerup_speed", "powerup_shrink")
+# spans verify() runs test lookups around
+QUERY_SAMPLES = 200
+
+
+def collider_spans(objects):
+    """(left, right, tag, object index) of every GameObject with a Collider, in file order"""
+    spans = []
+    for i, obj in enumerate(objects):
+        x = None
+        collider = None
+        for component in obj.get("components", []):
+            if component.get("type") == "Transform":
+                x = component.get("x", 0.0)
+            elif component.get("type") == "Collider":
+                collider = component
+        if collider is None:
+            continue
+        # the engine's Transform defaults to the origin when a file leaves it out
+        left = float(x or 0.0)
+        spans.append((left, left + collider.get("width", 0), collider.get("tag", ""), i))
+    return spans
+
+
+def build_broadphase(objects):
+    spans = sorted(collider_spans(objects), key=lambda span: (span[0], span[3]))
+    tags = list(TAG_CODES)
+    codes = {tag: code for code, tag in enumerate(tags)}
+    for _, _, tag, _ in spans:
+        if tag not in codes:
+            codes[tag] = len(tags)
+            tags.append(tag)
+    return {
+        "version": BROADPHASE_VERSION,
+        "tags": tags,
+        "maxWidth": max((right - left for left, right, _, _ in spans), default=0),
+        "left": [left for left, _, _, _ in spans],
+        "right": [right for _, right, _, _ in spans],
+        "tag": [codes[tag] for _, _, tag, _ in spans],
+        "object": [i for _, _, _, i in spans],
+    }
+
+
+def query(section, lo, hi):
+    """Object indexes whose span overlaps [lo, hi], the lookup the engine would do around the bird"""
+    left = section["left"]
+    start = bisect_left(left, lo - section["maxWidth"])
+    end = bisect_right(left, hi)
+    right = section["right"]
+    return [section["object"][i] for i in range(start, end) if right[i] >= lo]
+
+
+def verify(data):
+    """Problems found comparing a level's broadphase section with its gameObjects, empty when they match"""
+    from level_io import expand_level
+    data = expand_level(data)
+    section = data.get("broadphase")
+    if section is None:
+        return ["no broadphase section"]
+    if section.get("version") != BROADPHASE_VERSION:
+        return [f"unknown broadphase version {section.get('version')!r}"]
+    columns = ("left", "right", "tag", "object")
+    lengths = {len(section.get(column, ())) for column in columns}
+    if len(lengths) != 1:
+        return ["broadphase columns have different lengths"]
+
+    problems = []
+    left = section["left"]
+    if any(a > b for a, b in zip(left, left[1:])):
+        problems.append("spans are not sorted by left edge")
+    tags = section.get("tags", [])
+    if list(tags[:len(TAG_CODES)]) != list(TAG_CODES):
+        problems.append("tag codes don't start with the fixed engine table")
+    widths = [r - l for l, r in zip(left, section["right"])]
+    if widths and max(widths) > section.get("maxWidth", 0):
+        problems.append(f"maxWidth {section.get('maxWidth')} is smaller than the widest span {max(widths)}")
+
+    objects = data.get("gameObjects", [])
+    expected = {i: (l, r, tag) for l, r, tag, i in collider_spans(objects)}
+    seen = set()
+    for l, r, code, i in zip(*(section[column] for column in columns)):
+        name = objects[i].get("name") if isinstance(i, int) and 0 <= i < len(objects) else None
+        if i not in expected:
+            problems.append(f"span for object {i} ({name}) which has no collider")
+            continue
+        if i in seen:
+            problems.append(f"object {i} ({name}) is listed twice")
+        seen.add(i)
+        tag = tags[code] if isinstance(code, int) and 0 <= code < len(tags) else None
+        if (l, r, tag) != expected[i]:
+            problems.append(f"object {i} ({name}): index has {(l, r, tag)}, object has {expected[i]}")
+    for i in sorted(set(expected) - seen):
+        problems.append(f"object {i} ({objects[i].get('name')}) has a collider but no span")
+    if problems:
+        return problems
+
+    # the lookup itself must find exactly what a full scan finds, checked on windows around sampled spans
+    step = max(1, len(left) // QUERY_SAMPLES)
+    for lo in left[::step]:
+        for window in ((lo, lo), (lo - 50, lo + 50), (lo + 10, lo + 400)):
+            brute = sorted(i for i, (l, r, _) in expected.items() if l <= window[1] and r >= window[0])
+            if sorted(query(section, *window)) != brute:
+                problems.append(f"query {window} disagrees with a full scan")
+                return problems
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check or add the collision broadphase section of level files")
+    parser.add_argument("command", choices=("verify", "add"))
+    parser.add_argument("levels", nargs="+", help="level files or directories")
+    parser.add_argument("--missing-ok", action="store_true", help="verify: skip files without a section")
+    args = parser.parse_args(argv)
+
+    from level_io import level_files
+    failed = 0
+    for path in level_files(args.levels):
+        with open(path, 'r') as f:
+            data = json.load(f)
+        if args.command == "add":
+            from level_io import expand_level
+            data["broadphase"] = build_broadphase(expand_level(data).get("gameObjects", []))
+            with open(path, 'w') as f:
+                json.dump(data, f, indent=2)
+            print(f"{path}: {len(data['broadphase']['left'])} colliders indexed")
+            continue
+        if "broadphase" not in data and args.missing_ok:
+            continue
+        problems = verify(data)
+        for problem in problems:
+            print(f"{path}: {problem}")
+        if problems:
+            failed += 1
+        else:
+            print(f"{path}: ok, {len(data['broadphase']['left'])} colliders")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
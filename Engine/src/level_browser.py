@@ -0,0 +1,91 @@
+"""
+Thumbnail browser shown by the editor's Load button
+Lists the level files in a directory as a grid of thumbnails from level_thumbnail's cache. The window opens
+right away with empty cells, thumbnails are filled in a few per event-loop turn so hundreds of files never
+stall the UI, and only the first visit to a changed file pays for parsing it.
+"""
+import os
+import tkinter as tk
+
+from level_io import level_files, LEVEL_EXTENSIONS
+from level_thumbnail import THUMB_SIZE
+
+COLUMNS = 3
+CELL_PADDING = 10
+LABEL_HEIGHT = 18
+# thumbnails loaded per event-loop turn
+BATCH = 4
+
+
+class LevelBrowser:
+    def __init__(self, root, directory, cache, on_pick, on_other):
+        self.root = root
+        self.cache = cache
+        self.on_pick = on_pick
+        self.on_other = on_other
+        try:
+            self.paths = level_files([directory], LEVEL_EXTENSIONS) if os.path.isdir(directory) else []
+        except OSError:
+            self.paths = []
+        # PhotoImages only live as long as a Python reference to them does
+        self.images = {}
+
+        self.window = tk.Toplevel(root)
+        self.window.title("Load Level")
+        buttons = tk.Frame(self.window)
+        buttons.pack(side=tk.BOTTOM, fill=tk.X, pady=5)
+        tk.Button(buttons, text="Other File...", command=self.pick_other, width=12).pack(side=tk.LEFT, padx=5)
+        tk.Button(buttons, text="Cancel", command=self.window.destroy, width=12).pack(side=tk.RIGHT, padx=5)
+
+        cell_w = THUMB_SIZE[0] + CELL_PADDING
+        cell_h = THUMB_SIZE[1] + LABEL_HEIGHT + CELL_PADDING
+        rows = (len(self.paths) + COLUMNS - 1) // COLUMNS
+        scrollbar = tk.Scrollbar(self.window, orient=tk.VERTICAL)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.canvas = tk.Canvas(self.window, width=COLUMNS * cell_w, height=min(rows, 5) * cell_h or cell_h,
+                                scrollregion=(0, 0, COLUMNS * cell_w, rows * cell_h), yscrollcommand=scrollbar.set,
+                                bg='white')
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.config(command=self.canvas.yview)
+        if not self.paths:
+            self.canvas.create_text(COLUMNS * cell_w // 2, cell_h // 2, text=f"No levels in {directory}")
+
+        self.cells = []
+        for i, path in enumerate(self.paths):
+            x = (i % COLUMNS) * cell_w + CELL_PADDING // 2
+            y = (i // COLUMNS) * cell_h + CELL_PADDING // 2
+            tag = f"level{i}"
+            self.canvas.create_rectangle(x, y, x + THUMB_SIZE[0], y + THUMB_SIZE[1], fill='lightgray',
+                                         outline='gray', tags=tag)
+            image = self.canvas.create_image(x, y, anchor=tk.NW, tags=tag)
+            self.canvas.create_text(x, y + THUMB_SIZE[1] + 2, anchor=tk.NW, text=os.path.basename(path), tags=tag)
+            self.canvas.tag_bind(tag, '<Button-1>', lambda event, path=path: self.pick(path))
+            self.cells.append(image)
+        self.next = 0
+        self.root.after(1, self.load_batch)
+
+    def load_batch(self):
+        try:
+            if not self.window.winfo_exists():
+                return
+        except tk.TclError:
+            return
+        for i in range(self.next, min(self.next + BATCH, len(self.paths))):
+            try:
+                ppm = self.cache.get(self.paths[i])
+            except Exception:
+                # unreadable files keep their gray cell, the load itself reports the error if picked
+                continue
+            self.images[i] = tk.PhotoImage(data=ppm)
+            self.canvas.itemconfig(self.cells[i], image=self.images[i])
+        self.next += BATCH
+        if self.next < len(self.paths):
+            self.root.after(1, self.load_batch)
+
+    def pick(self, path):
+        self.window.destroy()
+        self.on_pick(path)
+
+    def pick_other(self):
+        self.window.destroy()
+        self.on_other()
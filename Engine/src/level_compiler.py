@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Headless batch level compiler
+Turns compact pipe/power-up specs into engine level JSON without Tk, spread over a process pool
+
+    python level_compiler.py specs.jsonl -o ../levels
+    python level_compiler.py --bench 2000
+
+A spec file holds one spec, a JSON list of specs, or one spec per line (.jsonl), see Level.from_spec
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from level_model import Level, POWERUP_TYPES, LEVEL_HEIGHT, clamp_gap_top
+from level_io import save_level_file
+
+
+def read_specs(path):
+    with open(path, 'r') as f:
+        if path.endswith('.jsonl'):
+            return [json.loads(line) for line in f if line.strip()]
+        data = json.load(f)
+    return data if isinstance(data, list) else [data]
+
+
+def compile_spec(job):
+    spec, out_dir = job
+    level = Level.from_spec(spec)
+    filepath = os.path.join(out_dir, level.file_name())
+    return filepath, save_level_file(level, filepath)
+
+
+def compile_specs(specs, out_dir, workers=None):
+    """
+    Compiles every spec into out_dir, returns [(path, bytes written)] in spec order. Specs whose names
+    map to the same file are rejected up front rather than left to overwrite each other.
+    """
+    names = {}
+    for i, spec in enumerate(specs):
+        names.setdefault(Level(spec.get("name", "My Level")).file_name(), []).append(i)
+    clashes = {name: found for name, found in names.items() if len(found) > 1}
+    if clashes:
+        raise ValueError("specs would overwrite each other: " + "; ".join(
+            f"{name} from specs {', '.join(str(i) for i in found)}" for name, found in sorted(clashes.items())))
+    os.makedirs(out_dir, exist_ok=True)
+    jobs = [(spec, out_dir) for spec in specs]
+    if workers == 1 or len(jobs) < 2:
+        return [compile_spec(job) for job in jobs]
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(jobs) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(compile_spec, jobs, chunksize=chunksize))
+
+
+def synthetic_specs(count, pipes_per_level=40, seed=0):
+    rng = random.Random(seed)
+    specs = []
+    for n in range(count):
+        pipes = []
+        x = 400
+        for _ in range(pipes_per_level):
+            x += rng.randint(200, 350)
+            gap = rng.randint(100, 200)
+            pipes.append([x, clamp_gap_top(rng.randint(0, LEVEL_HEIGHT), gap), rng.choice((50, 60, 70)), gap])
+        powerups = [[rng.randint(400, x), rng.randint(100, 450), rng.choice(POWERUP_TYPES)] for _ in range(4)]
+        specs.append({"name": f"Bench Level {n}", "pipes": pipes, "powerups": powerups})
+    return specs
+
+
+def bench(count, workers=None):
+    specs = synthetic_specs(count)
+    with tempfile.TemporaryDirectory() as out_dir:
+        for label, n in (("serial", 1), ("pool", workers)):
+            start = time.perf_counter()
+            results = compile_specs(specs, out_dir, n)
+            elapsed = time.perf_counter() - start
+            total = sum(size for _, size in results)
+            print(f"{label:>6}: {count} levels in {elapsed:.3f}s, {count / elapsed:.0f} levels/s, "
+                  f"{total / 1e6:.1f} MB written")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile compact level specs into engine level JSON")
+    parser.add_argument("specs", nargs="*", help="spec files (.json or .jsonl)")
+    parser.add_argument("-o", "--out", default="../levels", help="output directory")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--bench", type=int, metavar="N", help="compile N synthetic levels and report levels/s")
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        bench(args.bench, args.jobs)
+        return 0
+    if not args.specs:
+        parser.error("no spec files given")
+
+    specs = []
+    for path in args.specs:
+        specs.extend(read_specs(path))
+    start = time.perf_counter()
+    try:
+        results = compile_specs(specs, args.out, args.jobs)
+    except ValueError as e:
+        parser.error(str(e))
+    elapsed = time.perf_counter() - start
+    print(f"Compiled {len(results)} levels into {args.out} in {elapsed:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Monte-Carlo level difficulty estimator
+Replays thousands of bot runs per level with randomized, reaction-delayed flap policies under the level's
+gravity and pipe layout, all runs of a level step together as arrays and levels fan out over a process pool
+
+    python level_difficulty.py ../levels
+    python level_difficulty.py ../levels/level3_hard.json --runs 5000 --curve
+    python level_difficulty.py ../levels --json scores.json
+    python level_difficulty.py --bench 32
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from flap_physics import (BIRD_SIZE, BIRD_START_Y, CEILING_Y, FLAP_COOLDOWN, FLOOR_Y, FRAME_DT, JUMP_POWER,
+                          PIPE_SPEED, hop_height, pipe_arrays, pipe_frames)
+from level_model import Level
+
+DEFAULT_RUNS = 4000
+
+# bot policy, drawn per run: it flaps when the bird it saw REACTION frames ago sits below its aim point
+REACTION_FRAMES = (2, 10)
+# aim point offset from the gap centre, as a fraction of the gap height (normal sigma)
+AIM_SPREAD = 0.15
+# per-frame judgement noise on the aim point, px
+JITTER = 6.0
+# chance a wanted flap comes too late for this frame
+LAPSE = 0.03
+
+# score = chance (%) a run doesn't finish the level, labels as the shipped levels are named. Not the mean chance of
+# dying on each pipe: the first pipes weed out the weakest bots, so averaging in the easy-looking pipes after them
+# made a level with one pipe score higher than a long hard one
+LABELS = ((35.5, 'easy'), (41.5, 'medium'), (float('inf'), 'hard'))
+
+
+class DifficultyEstimate:
+    """Outcome of the bot runs on one level"""
+
+    def __init__(self, name, gravity, runs, survival):
+        self.name = name
+        self.gravity = gravity
+        self.runs = runs
+        # survival[k] = fraction of runs that cleared at least k pipes
+        self.survival = survival
+        self.pipes = len(survival) - 1
+        self.completion = float(survival[-1])
+        self.mean_cleared = float(survival[1:].sum())
+        self.score = (1.0 - self.completion) * 100
+        self.label = next(label for limit, label in LABELS if self.score < limit)
+
+    def summary(self):
+        return f"Difficulty {self.score:.1f} ({self.label}), {self.completion:.0%} of bots finish"
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "gravity": self.gravity,
+            "pipes": self.pipes,
+            "runs": self.runs,
+            "completion": round(self.completion, 4),
+            "meanCleared": round(self.mean_cleared, 3),
+            "score": round(self.score, 2),
+            "label": self.label,
+            "survival": [round(float(s), 4) for s in self.survival],
+        }
+
+
+def frame_geometry(pipes, pipe_speed=PIPE_SPEED):
+    """
+    Per-frame safe y band, aim target and pipes-cleared count for a level, shared by every run.
+    Index k is the state after k frames, pipes that overlap the bird at the same frame both apply.
+    """
+    order, left, width, top, bottom = pipe_arrays(pipes)
+    first, last = pipe_frames(left, width, pipe_speed)
+    frames = int(last.max()) + 1 if len(pipes) else 1
+
+    lo = np.full(frames + 1, CEILING_Y, dtype=np.float64)
+    hi = np.full(frames + 1, FLOOR_Y, dtype=np.float64)
+    band_lo = np.ceil(top)
+    band_hi = np.floor(bottom) - BIRD_SIZE
+    for a, b, pipe_lo, pipe_hi in zip(first, last, band_lo, band_hi):
+        np.maximum(lo[a:b + 1], pipe_lo, out=lo[a:b + 1])
+        np.minimum(hi[a:b + 1], pipe_hi, out=hi[a:b + 1])
+
+    k = np.arange(frames + 1)
+    cleared = np.searchsorted(np.sort(last), k, side='left')
+    if len(pipes):
+        # the bot steers for the first pipe it hasn't got past yet
+        target = np.minimum(np.searchsorted(np.maximum.accumulate(last), k, side='left'), len(pipes) - 1)
+        centre = ((top + bottom) / 2 - BIRD_SIZE / 2)[target]
+        gap = (bottom - top)[target]
+    else:
+        centre = np.full(frames + 1, float(BIRD_START_Y))
+        gap = np.zeros(frames + 1)
+    return frames, lo, hi, cleared, centre, gap
+
+
+def hop_offset(jump_power, gravity):
+    """
+    How far below its aim point a bot flaps: half a hop, so the arc after the flap is centred on the aim point
+    instead of lying entirely above it
+    """
+    return hop_height(jump_power, gravity) / 2
+
+
+def simulate(pipes, gravity, runs=DEFAULT_RUNS, rng=None, jump_power=JUMP_POWER, pipe_speed=PIPE_SPEED):
+    """Pipes cleared by each of `runs` bot runs"""
+    rng = rng if rng is not None else np.random.default_rng()
+    frames, lo, hi, cleared, centre, gap = frame_geometry(pipes, pipe_speed)
+
+    delay = rng.integers(REACTION_FRAMES[0], REACTION_FRAMES[1] + 1, runs)
+    aim = rng.normal(0.0, AIM_SPREAD, runs)
+    history = np.full((REACTION_FRAMES[1] + 1, runs), float(BIRD_START_Y))
+    columns = np.arange(runs)
+
+    y = np.full(runs, float(BIRD_START_Y))
+    v = np.zeros(runs)
+    # frames since each bot's last flap
+    since = np.full(runs, FLAP_COOLDOWN)
+    alive = np.ones(runs, dtype=bool)
+    death = np.full(runs, frames)
+    lift = hop_offset(jump_power, gravity)
+    for f in range(frames):
+        history[f % len(history)] = y
+        seen = history[(f - delay) % len(history), columns]
+        target = centre[f] + lift + aim * gap[f] + rng.normal(0.0, JITTER, runs)
+        flap = (seen > target) & (since >= FLAP_COOLDOWN) & (rng.random(runs) >= LAPSE)
+        v = np.where(flap, jump_power, v) + gravity * FRAME_DT
+        y += np.trunc(v * FRAME_DT)
+        since = np.where(flap, 1, since + 1)
+
+        dead = alive & ((y < lo[f + 1]) | (y > hi[f + 1]))
+        if dead.any():
+            death[dead] = f + 1
+            alive &= ~dead
+            if not alive.any():
+                break
+    return np.where(alive, len(pipes), cleared[death])
+
+
+def seed_for(level, seed):
+    """Seed for a level's runs, so the same level gets the same runs from the CLI, the editor or a sweep"""
+    return np.random.SeedSequence([seed, zlib.crc32(level.name.encode('utf-8'))])
+
+
+def estimate_level(level, runs=DEFAULT_RUNS, seed=0):
+    rng = np.random.default_rng(seed_for(level, seed))
+    outcome = simulate(level.pipes, level.gravity, runs, rng)
+    counts = np.bincount(outcome, minlength=len(level.pipes) + 1)
+    survival = counts[::-1].cumsum()[::-1] / runs
+    return DifficultyEstimate(level.name, level.gravity, runs, survival)
+
+
+def estimate_job(job):
+    source, runs, seed = job
+    if isinstance(source, dict):
+        level = Level.from_spec(source)
+    else:
+        from level_io import load_any_level_file
+        level = load_any_level_file(source)
+    return estimate_level(level, runs, seed)
+
+
+def estimate_levels(sources, runs=DEFAULT_RUNS, seed=0, workers=None):
+    """Scores level files (or specs) one level per task, returns estimates in input order"""
+    jobs = [(source, runs, seed) for source in sources]
+    if workers == 1 or len(jobs) < 2:
+        return [estimate_job(job) for job in jobs]
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(estimate_job, jobs))
+
+
+def bench(count, runs, workers=None):
+    from level_compiler import synthetic_specs
+    specs = synthetic_specs(count, pipes_per_level=20)
+    for label, n in (("serial", 1), ("pool", workers)):
+        start = time.perf_counter()
+        estimate_levels(specs, runs, workers=n)
+        elapsed = time.perf_counter() - start
+        print(f"{label:>6}: {count} levels x {runs} runs in {elapsed:.2f}s, "
+              f"{count * runs / elapsed:.0f} runs/s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Estimate level difficulty from simulated bot runs")
+    parser.add_argument("levels", nargs="*", help="level files or directories")
+    parser.add_argument("-n", "--runs", type=int, default=DEFAULT_RUNS, help="bot runs per level")
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--curve", action="store_true", help="print each level's survival curve")
+    parser.add_argument("--json", metavar="PATH", help="also write the estimates as JSON")
+    parser.add_argument("--bench", type=int, metavar="N", help="score N synthetic levels and report runs/s")
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        bench(args.bench, args.runs, args.jobs)
+        return 0
+    from level_io import LEVEL_EXTENSIONS, level_files
+    paths = level_files(args.levels, LEVEL_EXTENSIONS)
+    if not paths:
+        parser.error("no level files given")
+
+    start = time.perf_counter()
+    estimates = estimate_levels(paths, args.runs, args.seed, args.jobs)
+    elapsed = time.perf_counter() - start
+
+    print(f"{'level':<32} {'pipes':>5} {'finish':>7} {'cleared':>8} {'score':>6}  label")
+    for path, estimate in zip(paths, estimates):
+        print(f"{os.path.basename(path):<32} {estimate.pipes:>5} {estimate.completion:>7.1%} "
+              f"{estimate.mean_cleared:>8.2f} {estimate.score:>6.1f}  {estimate.label}")
+        if args.curve:
+            print("    survival " + " ".join(f"{s:.2f}" for s in estimate.survival))
+    print(f"{len(paths)} levels x {args.runs} runs in {elapsed:.2f}s")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump([dict(estimate.to_dict(), path=path) for path, estimate in zip(paths, estimates)], f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Seeded procedural level generator
+Draws whole batches of pipe sequences as arrays within a set of difficulty bounds, clamps them the way the
+editor's add_pipe does and drops every level the reachability analyzer finds an impossible pipe in.
+The same seed and bounds always give the same stream of levels.
+
+    python level_generator.py -n 1000 -o ../levels/endless --preset hard --seed 7
+    python level_generator.py -n 500 -o out --binary
+    python level_generator.py --bench 5000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+from level_model import Level, POWERUP_TYPES, LEVEL_HEIGHT, GROUND_HEIGHT, GAP_TOP_MARGIN, DEFAULT_GRAVITY
+from level_analyzer import analyze_arrays, passable_arrays, TIGHT
+from level_binary import write_level_binary, EXTENSION
+from level_compiler import compile_specs
+
+# first pipe's x, far enough right that the bird has time to settle after spawning
+START_X = 400
+
+PRESETS = {
+    'easy': dict(spacing=(260, 340), gap_height=(160, 200), gap_step=120, gravity=800.0),
+    'medium': dict(spacing=(220, 300), gap_height=(130, 170), gap_step=180, gravity=900.0),
+    'hard': dict(spacing=(180, 260), gap_height=(110, 150), gap_step=240, gravity=1000.0),
+}
+
+
+class GeneratorBounds:
+    """Difficulty bounds for generated levels, (low, high) ranges are inclusive"""
+
+    def __init__(self, pipes=(20, 40), spacing=(220, 320), gap_height=(130, 190), width=(50, 70),
+                 gap_step=180, powerups=(0, 3), gravity=DEFAULT_GRAVITY, allow_tight=True):
+        self.pipes = pipes
+        self.spacing = spacing
+        self.gap_height = gap_height
+        self.width = width
+        # largest change of gap centre between neighbouring pipes
+        self.gap_step = gap_step
+        self.powerups = powerups
+        self.gravity = gravity
+        self.allow_tight = allow_tight
+
+    @classmethod
+    def preset(cls, name, **overrides):
+        return cls(**dict(PRESETS[name], **overrides))
+
+
+class LevelGenerator:
+    """
+    Endless, lazily evaluated stream of playable levels. Levels are drawn `batch` at a time and the whole
+    batch goes through one reachability check, `generated` and `rejected` count what was drawn so far.
+    """
+
+    def __init__(self, seed=0, bounds=None, batch=256, name="Endless"):
+        self.seed = seed
+        self.bounds = bounds or GeneratorBounds()
+        self.batch = batch
+        self.name = name
+        self.generated = 0
+        self.rejected = 0
+
+    def __iter__(self):
+        seeds = np.random.SeedSequence(self.seed)
+        index = 0
+        while True:
+            rng = np.random.default_rng(seeds.spawn(1)[0])
+            for level in self._batch(rng):
+                level.name = f"{self.name} {self.seed}-{index}"
+                index += 1
+                yield level
+
+    def _batch(self, rng):
+        b = self.bounds
+        size = self.batch
+        counts = rng.integers(b.pipes[0], b.pipes[1] + 1, size)
+        slots = int(counts.max())
+        valid = np.arange(slots)[None, :] < counts[:, None]
+
+        spacing = rng.integers(b.spacing[0], b.spacing[1] + 1, (size, slots))
+        spacing[:, 0] = START_X
+        x = np.cumsum(spacing, axis=1).astype(np.float64)
+        width = rng.integers(b.width[0], b.width[1] + 1, (size, slots))
+        gap_height = rng.integers(b.gap_height[0], b.gap_height[1] + 1, (size, slots))
+
+        # gap centres walk by at most gap_step, then the same clamp as level_model.clamp_gap_top
+        step = rng.integers(-b.gap_step, b.gap_step + 1, (size, slots))
+        centre = np.empty((size, slots), dtype=np.int64)
+        centre[:, 0] = rng.integers(GAP_TOP_MARGIN + b.gap_height[1] // 2,
+                                    LEVEL_HEIGHT - GROUND_HEIGHT - b.gap_height[1] // 2, size)
+        for j in range(1, slots):
+            centre[:, j] = np.clip(centre[:, j - 1] + step[:, j], GAP_TOP_MARGIN,
+                                   LEVEL_HEIGHT - GROUND_HEIGHT)
+        gap_top = np.maximum(centre - gap_height // 2, GAP_TOP_MARGIN)
+        gap_top = np.minimum(gap_top, LEVEL_HEIGHT - GROUND_HEIGHT - gap_height)
+
+        # spacing is wider than any pipe, so x order is left-edge order and every level's run is sorted
+        starts = np.zeros((size, slots), dtype=bool)
+        starts[:, 0] = True
+        pipes = ((x - width // 2)[valid], width[valid], gap_top[valid].astype(np.float64),
+                 (gap_top + gap_height)[valid].astype(np.float64), starts[valid], b.gravity)
+        if b.allow_tight:
+            # only impossible pipes matter, most transitions are settled without the full interval analysis
+            bad = ~passable_arrays(*pipes)
+        else:
+            bad = analyze_arrays(*pipes)[0] >= TIGHT
+        offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        rejected = np.logical_or.reduceat(bad, offsets)
+        self.generated += size
+        self.rejected += int(rejected.sum())
+
+        powerup_counts = rng.integers(b.powerups[0], b.powerups[1] + 1, size)
+        for i in np.flatnonzero(~rejected):
+            n = int(counts[i])
+            level = Level(gravity=b.gravity)
+            for px, top, w, gap in zip(x[i, :n].tolist(), gap_top[i, :n].tolist(), width[i, :n].tolist(),
+                                       gap_height[i, :n].tolist()):
+                level.add_pipe(px, top, w, gap)
+            # power-ups sit halfway between two pipes, between their gap centres, a one-pipe level gets none
+            for j in (rng.integers(0, n - 1, int(powerup_counts[i])).tolist() if n >= 2 else ()):
+                level.add_powerup((x[i, j] + x[i, j + 1]) / 2, float(centre[i, j] + centre[i, j + 1]) / 2,
+                                  POWERUP_TYPES[int(rng.integers(len(POWERUP_TYPES)))])
+            yield level
+
+
+def generate_levels(count, seed=0, bounds=None, batch=256):
+    """The first `count` levels of a seed's stream, as a lazy iterator"""
+    stream = iter(LevelGenerator(seed, bounds, batch))
+    for _ in range(count):
+        yield next(stream)
+
+
+def write_levels(levels, out_dir, binary=False, workers=None, chunk=1000):
+    """Writes a level stream into out_dir `chunk` levels at a time, returns (levels, bytes) written"""
+    os.makedirs(out_dir, exist_ok=True)
+    written = total = 0
+    pending = []
+    for level in levels:
+        pending.append(level)
+        if len(pending) == chunk:
+            total += _flush(pending, out_dir, binary, workers)
+            written += len(pending)
+            pending = []
+    if pending:
+        total += _flush(pending, out_dir, binary, workers)
+        written += len(pending)
+    return written, total
+
+
+def _flush(levels, out_dir, binary, workers):
+    if binary:
+        return sum(write_level_binary(level, os.path.join(out_dir, os.path.splitext(level.file_name())[0] + EXTENSION))
+                   for level in levels)
+    return sum(size for _, size in compile_specs([level.to_spec() for level in levels], out_dir, workers))
+
+
+def bench(count, bounds):
+    generator = LevelGenerator(0, bounds)
+    stream = iter(generator)
+    start = time.perf_counter()
+    pipes = sum(len(next(stream).pipes) for _ in range(count))
+    elapsed = time.perf_counter() - start
+    print(f"{count} levels ({pipes} pipes) in {elapsed:.2f}s, {count / elapsed:.0f} levels/s, "
+          f"{generator.rejected} of {generator.generated} drawn were rejected")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate playable endless-mode levels from a seed")
+    parser.add_argument("-n", "--count", type=int, default=100)
+    parser.add_argument("-o", "--out", default="generated", help="output directory")
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    parser.add_argument("--preset", choices=sorted(PRESETS), default=None)
+    parser.add_argument("--strict", action="store_true", help="also reject levels with tight pipes")
+    parser.add_argument("--binary", action="store_true", help="write packed .fblv files instead of JSON")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes for JSON output")
+    parser.add_argument("--bench", type=int, metavar="N", help="time generating N levels without writing")
+    args = parser.parse_args(argv)
+
+    overrides = dict(allow_tight=not args.strict)
+    bounds = GeneratorBounds.preset(args.preset, **overrides) if args.preset else GeneratorBounds(**overrides)
+    if args.bench:
+        bench(args.bench, bounds)
+        return 0
+
+    start = time.perf_counter()
+    written, size = write_levels(generate_levels(args.count, args.seed, bounds), args.out, args.binary, args.jobs)
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {written} levels ({size / 1e6:.1f} MB) into {args.out} in {elapsed:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,331 @@
+"""
+Level serializer
+Converts a level_model.Level to and from the engine's Level/GameObject JSON read by LevelManager.loadLevel
+
+Files can also be written compact: a "prefabs" table holds what every pipe or power-up of a kind shares and
+gameObjects lists instances like {"prefab": "pipe", "x", "gap_top", "gap_height", "width"}, any prefab field
+can be overridden per instance. The engine itself doesn't read prefabs, expand_level (or level_prefab.py)
+turns a compact file back into the plain form before it ships.
+"""
+import json
+import os
+
+from level_model import (Level, LEVEL_WIDTH, LEVEL_HEIGHT, GROUND_HEIGHT, POWERUP_TAGS, TAG_TO_POWERUP,
+                         DEFAULT_GRAVITY, DEFAULT_BG)
+from level_stream import load_level_stream
+from level_binary import read_level_binary, is_binary_level, EXTENSION
+from level_broadphase import build_broadphase
+
+PIPE_COLOR = (34, 139, 34)
+GROUND_COLOR = (139, 69, 19)
+POWERUP_COLOR = (255, 255, 0)
+POWERUP_SIZE = 20
+# what load_any_level_file reads
+LEVEL_EXTENSIONS = ('.json', EXTENSION)
+
+# kind says how an instance expands, the rest are the shared values an instance may override
+PREFABS = {
+    "pipe": {"kind": "pipe", "r": PIPE_COLOR[0], "g": PIPE_COLOR[1], "b": PIPE_COLOR[2], "tag": "pipe"},
+}
+for _ptype, _tag in POWERUP_TAGS.items():
+    PREFABS[_ptype] = {"kind": "powerup", "size": POWERUP_SIZE, "r": POWERUP_COLOR[0], "g": POWERUP_COLOR[1],
+                       "b": POWERUP_COLOR[2], "tag": _tag}
+
+
+def game_object(name, x, y, width, height, color, tag, is_trigger=False):
+    """One GameObject with the Transform/Sprite/Collider triple every level object uses"""
+    return {
+        "type": "GameObject",
+        "name": name,
+        "active": True,
+        "components": [
+            {
+                "type": "Transform",
+                "x": x,
+                "y": y,
+                "rotation": 0.0,
+                "scaleX": 1.0,
+                "scaleY": 1.0
+            },
+            {
+                "type": "Sprite",
+                "width": width,
+                "height": height,
+                "r": color[0],
+                "g": color[1],
+                "b": color[2]
+            },
+            {
+                "type": "Collider",
+                "width": width,
+                "height": height,
+                "isTrigger": is_trigger,
+                "tag": tag
+            }
+        ]
+    }
+
+
+def pipe_objects(i, pipe, height=LEVEL_HEIGHT, color=PIPE_COLOR, tag="pipe"):
+    px = pipe['x']
+    gap_top = pipe['gap_top']
+    pipe_width = pipe['width']
+    gap_bottom = gap_top + pipe['gap_height']
+    bottom_height = height - GROUND_HEIGHT - gap_bottom
+    left = float(px - pipe_width // 2)
+    return (game_object(f"Pipe{i}_Top", left, 0.0, pipe_width, int(gap_top), color, tag),
+            game_object(f"Pipe{i}_Bottom", left, float(gap_bottom), pipe_width, int(bottom_height),
+                        color, tag))
+
+
+def powerup_object(i, powerup, size=POWERUP_SIZE, color=POWERUP_COLOR, tag=None):
+    return game_object(f"PowerUp_{powerup['type']}_{i}", float(powerup['x']), float(powerup['y']),
+                       size, size, color, tag or POWERUP_TAGS.get(powerup['type'], 'powerup'), is_trigger=True)
+
+
+def expand_objects(prefabs, objects):
+    """
+    gameObjects with every prefab instance replaced by the full objects it stands for. Pipes and power-ups are
+    numbered in order like level_to_json does, an instance's "index" restarts the count at its own number.
+    """
+    expanded = []
+    pipes = powerups = 0
+    for obj in objects:
+        name = obj.get("prefab")
+        if name is None:
+            expanded.append(obj)
+            continue
+        if name not in prefabs:
+            raise ValueError(f"unknown prefab {name!r}")
+        fields = dict(prefabs[name], **obj)
+        color = (fields["r"], fields["g"], fields["b"])
+        if fields["kind"] == "pipe":
+            pipes = fields.get("index", pipes)
+            expanded.extend(pipe_objects(pipes, fields, color=color, tag=fields["tag"]))
+            pipes += 1
+        elif fields["kind"] == "powerup":
+            powerups = fields.get("index", powerups)
+            powerup = {'x': fields['x'], 'y': fields['y'], 'type': TAG_TO_POWERUP.get(fields["tag"], name)}
+            expanded.append(powerup_object(powerups, powerup, fields["size"], color, fields["tag"]))
+            powerups += 1
+        else:
+            raise ValueError(f"prefab {name!r} has unknown kind {fields['kind']!r}")
+    return expanded
+
+
+def expand_level(data):
+    """The plain engine form of a level dict, data itself is left alone"""
+    if "prefabs" not in data:
+        return data
+    expanded = {key: value for key, value in data.items() if key != "prefabs"}
+    expanded["gameObjects"] = expand_objects(data["prefabs"], data.get("gameObjects", []))
+    return expanded
+
+
+def compact_objects(objects, prefabs=PREFABS):
+    """
+    Inverse of expand_objects: objects that expand_objects would reproduce exactly become instances, with
+    overrides for colors or tags that differ from the prefab and an index where the numbering skips.
+    Anything else is kept as it is.
+    """
+    compacted = []
+    pipes = powerups = 0
+    i = 0
+    while i < len(objects):
+        obj = objects[i]
+        name = obj.get("name", "")
+        number = _number(name)
+        if name == f"Pipe{number}_Top" and i + 1 < len(objects):
+            x, _, width, height, color, tag = _fields(obj)
+            _, bottom_y, _, _, _, _ = _fields(objects[i + 1])
+            instance = _instance(prefabs, "pipe", {'x': x + width // 2, 'gap_top': height,
+                                                   'gap_height': bottom_y - height, 'width': width},
+                                 color, tag, number)
+            if instance is not None and expand_objects(prefabs, [instance]) == objects[i:i + 2]:
+                if number == pipes:
+                    del instance["index"]
+                compacted.append(instance)
+                pipes = number + 1
+                i += 2
+                continue
+        if name.startswith("PowerUp_") and number is not None:
+            x, y, _, _, color, tag = _fields(obj)
+            ptype = TAG_TO_POWERUP.get(tag)
+            instance = ptype and _instance(prefabs, ptype, {'x': x, 'y': y}, color, tag, number)
+            if instance and expand_objects(prefabs, [instance]) == [obj]:
+                if number == powerups:
+                    del instance["index"]
+                compacted.append(instance)
+                powerups = number + 1
+                i += 1
+                continue
+        compacted.append(obj)
+        i += 1
+    return compacted
+
+
+def _number(name):
+    """The object number in Pipe3_Top or PowerUp_speed_3, None if there is none"""
+    digits = name[4:name.find("_")] if name.startswith("Pipe") else name[name.rfind("_") + 1:]
+    return int(digits) if digits.isdigit() else None
+
+
+def _fields(obj):
+    """(x, y, sprite width, sprite height, color, tag) of a GameObject"""
+    x = y = 0.0
+    width = height = 0
+    color = (0, 0, 0)
+    tag = None
+    for comp in obj.get("components", []):
+        kind = comp.get("type")
+        if kind == "Transform":
+            x, y = comp.get("x", 0.0), comp.get("y", 0.0)
+        elif kind == "Sprite":
+            width, height = comp.get("width", 0), comp.get("height", 0)
+            color = (comp.get("r", 0), comp.get("g", 0), comp.get("b", 0))
+        elif kind == "Collider":
+            tag = comp.get("tag")
+    return x, y, width, height, color, tag
+
+
+def _instance(prefabs, name, fields, color, tag, number):
+    if name not in prefabs:
+        return None
+    instance = {"prefab": name}
+    instance.update(fields)
+    prefab = prefabs[name]
+    for field, value in zip(("r", "g", "b", "tag"), (*color, tag)):
+        if prefab.get(field) != value:
+            instance[field] = value
+    # compact_objects drops it again where the numbering doesn't skip
+    instance["index"] = number
+    return instance
+
+
+def level_to_json(level, broadphase=False, prefabs=False):
+    """
+    Pipes and power-ups are written in x order (ties keep placement order) and numbered in that order,
+    broadphase adds the collider index from level_broadphase, prefabs writes the compact form
+    """
+    objects = [game_object("Ground", 0.0, float(LEVEL_HEIGHT - GROUND_HEIGHT), LEVEL_WIDTH, GROUND_HEIGHT,
+                           GROUND_COLOR, "ground")]
+    pipes = sorted(level.pipes, key=lambda pipe: pipe['x'])
+    powerups = sorted(level.powerups, key=lambda powerup: powerup['x'])
+    if prefabs:
+        objects.extend({"prefab": "pipe", "x": pipe['x'], "gap_top": pipe['gap_top'],
+                        "gap_height": pipe['gap_height'], "width": pipe['width']} for pipe in pipes)
+        objects.extend({"prefab": powerup['type'], "x": powerup['x'], "y": powerup['y']} for powerup in powerups)
+    else:
+        for i, pipe in enumerate(pipes):
+            objects.extend(pipe_objects(i, pipe))
+        for i, powerup in enumerate(powerups):
+            objects.append(powerup_object(i, powerup))
+    data = {
+        "type": "Level",
+        "name": level.name,
+        "width": LEVEL_WIDTH,
+        "height": LEVEL_HEIGHT,
+        # std.json's .floating throws on an integer literal
+        "gravity": float(level.gravity),
+        "bgR": level.bg_r,
+        "bgG": level.bg_g,
+        "bgB": level.bg_b,
+    }
+    if prefabs:
+        # ahead of gameObjects so the streaming loader has the table before the first instance
+        data["prefabs"] = PREFABS
+    data["gameObjects"] = objects
+    if broadphase:
+        # object indexes always refer to the expanded list the engine sees
+        data["broadphase"] = build_broadphase(expand_objects(PREFABS, objects) if prefabs else objects)
+    return data
+
+
+def level_from_json(data):
+    data = expand_level(data)
+    level = Level(data.get("name", "Loaded Level"), data.get("gravity", DEFAULT_GRAVITY),
+                  (data.get("bgR", DEFAULT_BG[0]), data.get("bgG", DEFAULT_BG[1]), data.get("bgB", DEFAULT_BG[2])))
+    pipe_pairs = {}
+
+    for obj in data.get("gameObjects", []):
+        name = obj.get("name", "")
+        if "Pipe" in name and name != "Ground":
+            x = y = width = height = 0
+            for comp in obj.get("components", []):
+                if comp.get("type") == "Transform":
+                    x = comp.get("x", 0)
+                    y = comp.get("y", 0)
+                if comp.get("type") == "Sprite":
+                    width = comp.get("width", 60)
+                    height = comp.get("height", 100)
+            if "_Top" in name:
+                pipe_num = name.replace("Pipe", "").replace("_Top", "")
+                if pipe_num not in pipe_pairs:
+                    pipe_pairs[pipe_num] = {}
+                pipe_pairs[pipe_num]["top"] = (x + width//2, height)
+                pipe_pairs[pipe_num]["width"] = width
+            elif "_Bottom" in name:
+                pipe_num = name.replace("Pipe", "").replace("_Bottom", "")
+                if pipe_num not in pipe_pairs:
+                    pipe_pairs[pipe_num] = {}
+                pipe_pairs[pipe_num]["bottom_y"] = y
+
+    for pipe_num, pipe_data in pipe_pairs.items():
+        if "top" in pipe_data and "bottom_y" in pipe_data:
+            x, top_height = pipe_data["top"]
+            gap_top = top_height
+            gap_bottom = pipe_data["bottom_y"]
+            level.add_pipe(x, gap_top, pipe_data.get("width", 60), gap_bottom - gap_top)
+
+    for obj in data.get("gameObjects", []):
+        name = obj.get("name", "")
+        if "PowerUp" in name:
+            x = y = 0
+            tag = ""
+            for comp in obj.get("components", []):
+                if comp.get("type") == "Transform":
+                    x = comp.get("x", 0)
+                    y = comp.get("y", 0)
+                if comp.get("type") == "Collider":
+                    tag = comp.get("tag", "")
+            powerup_type = TAG_TO_POWERUP.get(tag)
+            if powerup_type:
+                level.add_powerup(x, y, powerup_type)
+    return level
+
+
+def save_level_file(level, filepath, broadphase=False, prefabs=False):
+    """Writes the level the way the editor always has, returns the number of bytes written"""
+    text = json.dumps(level_to_json(level, broadphase, prefabs), indent=2)
+    with open(filepath, 'w') as f:
+        f.write(text)
+    return len(text)
+
+
+def load_level_file(filepath):
+    # single pass over gameObjects without building the whole dict tree, see level_stream
+    return load_level_stream(filepath)
+
+
+def load_any_level_file(filepath):
+    """JSON or packed binary level, picked by extension"""
+    if is_binary_level(filepath):
+        return read_level_binary(filepath)
+    return load_level_file(filepath)
+
+
+def level_files(paths, extensions=('.json',)):
+    """
+    Level files from the given files and directories. A directory gives the files directly in it with one
+    of the extensions, in name order, and like the game's own level list it doesn't look into subfolders
+    such as levels/autosave. Files named directly are kept as given. Pass LEVEL_EXTENSIONS for tools that
+    read packed levels too.
+    """
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            found.extend(os.path.join(path, name) for name in sorted(os.listdir(path))
+                         if name.endswith(extensions) and os.path.isfile(os.path.join(path, name)))
+        else:
+            found.append(path)
+    return found
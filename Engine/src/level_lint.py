@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Level linter
+Checks engine level JSON against what LevelManager.loadLevel actually parses (std.json's typed getters throw
+on an int where a float is read and the other way round) and against what load_level would silently drop:
+unpaired pipe halves, unknown power-up tags, gaps outside the playfield, overlapping pipes and duplicate
+names. Prefab-form files (see level_io) are an error, the engine only loads them expanded. Files are checked on a process pool and results are cached by content hash, so reruns only look at
+files that changed.
+
+    python level_lint.py ../levels
+    python level_lint.py ../levels --json lint.json -j 8
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor
+
+from level_model import LEVEL_HEIGHT, GROUND_HEIGHT, GAP_TOP_MARGIN, TAG_TO_POWERUP
+from level_io import expand_level, level_files
+
+# bump whenever a rule changes so cached results from older rules are thrown away
+LINT_VERSION = 4
+# next to this file, so runs from any working directory share it
+DEFAULT_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".level_lint_cache.json")
+
+ERROR = "error"
+WARNING = "warning"
+
+# JSON field types the engine's deserialize() reads, bool is checked before int since it is one in Python
+FLOAT = 'float'
+INT = 'int'
+STRING = 'string'
+BOOL = 'bool'
+LEVEL_FIELDS = {'name': STRING, 'width': INT, 'height': INT, 'gravity': FLOAT,
+                'bgR': INT, 'bgG': INT, 'bgB': INT}
+OBJECT_FIELDS = {'name': STRING, 'active': BOOL}
+COMPONENT_FIELDS = {
+    'Transform': {'x': FLOAT, 'y': FLOAT, 'rotation': FLOAT, 'scaleX': FLOAT, 'scaleY': FLOAT},
+    'Sprite': {'width': INT, 'height': INT, 'r': INT, 'g': INT, 'b': INT, 'texturePath': STRING},
+    'Physics': {'velocityX': FLOAT, 'velocityY': FLOAT, 'gravity': FLOAT, 'friction': FLOAT, 'useGravity': BOOL},
+    'Collider': {'width': INT, 'height': INT, 'isTrigger': BOOL, 'tag': STRING},
+}
+# what load_level reads off every pipe half and power-up: position, size and collision
+REQUIRED_COMPONENTS = ('Transform', 'Sprite', 'Collider')
+# values the engine casts to ubyte
+BYTE_FIELDS = ('bgR', 'bgG', 'bgB', 'r', 'g', 'b')
+PLAYFIELD_BOTTOM = LEVEL_HEIGHT - GROUND_HEIGHT
+
+
+def _type_of(value):
+    if isinstance(value, bool):
+        return BOOL
+    if isinstance(value, int):
+        return INT
+    if isinstance(value, float):
+        return FLOAT
+    if isinstance(value, str):
+        return STRING
+    return type(value).__name__
+
+
+def issue(severity, code, message, obj=None):
+    return {'severity': severity, 'code': code, 'object': obj, 'message': message}
+
+
+def _check_fields(data, fields, issues, where, obj=None):
+    for field, expected in fields.items():
+        if field not in data:
+            continue
+        value = data[field]
+        actual = _type_of(value)
+        if actual != expected:
+            issues.append(issue(ERROR, 'type', f"{where}.{field} is {actual} {value!r}, the engine reads {expected}",
+                                obj))
+        elif field in BYTE_FIELDS and not 0 <= value <= 255:
+            issues.append(issue(ERROR, 'range', f"{where}.{field} = {value} does not fit a byte", obj))
+
+
+def _components(obj, name, issues):
+    """Transform/Sprite/Collider dicts of a GameObject (the last one wins, like the engine), schema-checked"""
+    found = {}
+    components = obj.get('components', [])
+    if not isinstance(components, list):
+        issues.append(issue(ERROR, 'schema', "components is not a list", name))
+        return found
+    for component in components:
+        if not isinstance(component, dict):
+            issues.append(issue(ERROR, 'schema', "component is not an object", name))
+            continue
+        kind = component.get('type')
+        if kind is None:
+            # the engine skips these without a word
+            issues.append(issue(WARNING, 'schema', "component without a type is ignored", name))
+            continue
+        if kind not in COMPONENT_FIELDS:
+            issues.append(issue(WARNING, 'schema', f"unknown component type {kind!r} is ignored", name))
+            continue
+        _check_fields(component, COMPONENT_FIELDS[kind], issues, kind, name)
+        found[kind] = component
+    return found
+
+
+def _number(component, field, default=0):
+    value = (component or {}).get(field, default)
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else default
+
+
+def lint_data(data):
+    """Issues for one parsed level file, in file order"""
+    issues = []
+    if not isinstance(data, dict):
+        return [issue(ERROR, 'schema', "top level is not an object")]
+    if "prefabs" in data:
+        # loadLevel doesn't know the prefab form, instances come out without components and the level has no pipes
+        issues.append(issue(ERROR, 'prefab', "the engine does not read prefabs, run "
+                                             "'level_prefab.py expand' before shipping this file"))
+        # the rest is checked as the file will read once expanded
+        try:
+            data = expand_level(data)
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            issues.append(issue(ERROR, 'prefab', f"cannot expand prefabs: {e!r}"))
+            return issues
+    if data.get('type') != 'Level':
+        issues.append(issue(ERROR, 'schema', f"type is {data.get('type')!r}, expected 'Level'"))
+    _check_fields(data, LEVEL_FIELDS, issues, 'Level')
+    objects = data.get('gameObjects', [])
+    if not isinstance(objects, list):
+        issues.append(issue(ERROR, 'schema', "gameObjects is not a list"))
+        return issues
+
+    names = {}
+    halves = {}
+    powerups = []
+    for obj in objects:
+        if not isinstance(obj, dict):
+            issues.append(issue(ERROR, 'schema', "gameObject is not an object"))
+            continue
+        name = obj.get('name', 'GameObject')
+        if obj.get('type') != 'GameObject':
+            issues.append(issue(WARNING, 'schema', f"type is {obj.get('type')!r}, expected 'GameObject'", name))
+        _check_fields(obj, OBJECT_FIELDS, issues, 'GameObject', name)
+        if not isinstance(name, str):
+            continue
+        names[name] = names.get(name, 0) + 1
+        components = _components(obj, name, issues)
+        if ("Pipe" in name and name != "Ground") or "PowerUp" in name:
+            missing = [kind for kind in REQUIRED_COMPONENTS if kind not in components]
+            if missing:
+                issues.append(issue(ERROR, 'component', f"missing {', '.join(missing)}, the game can't place or "
+                                                        "collide with it", name))
+
+        # same name matching as load_level, so anything it would skip shows up here
+        if "Pipe" in name and name != "Ground":
+            if "_Top" in name:
+                halves.setdefault(name.replace("Pipe", "").replace("_Top", ""), {})['top'] = (name, components)
+            elif "_Bottom" in name:
+                halves.setdefault(name.replace("Pipe", "").replace("_Bottom", ""), {})['bottom'] = (name, components)
+            else:
+                issues.append(issue(WARNING, 'pipe-name', "has 'Pipe' in its name but is neither _Top nor _Bottom, "
+                                                          "load_level ignores it", name))
+        if "PowerUp" in name:
+            tag = components.get('Collider', {}).get('tag')
+            if tag not in TAG_TO_POWERUP:
+                issues.append(issue(ERROR, 'powerup-tag', f"unknown power-up tag {tag!r}, load_level drops it "
+                                                          "and the game never triggers it", name))
+            powerups.append((name, components.get('Transform')))
+
+    for name, count in names.items():
+        if count > 1:
+            issues.append(issue(ERROR, 'duplicate-name', f"{count} objects share this name", name))
+
+    pipes = _check_pipes(halves, issues)
+    _check_overlaps(pipes, powerups, issues)
+    return issues
+
+
+def _check_pipes(halves, issues):
+    """Pairs up pipe halves, returns (name, left, right, gap_top, gap_bottom) for every complete pipe"""
+    pipes = []
+    for number, pair in halves.items():
+        if 'top' not in pair or 'bottom' not in pair:
+            name, _ = pair.get('top') or pair.get('bottom')
+            missing = "_Bottom" if 'top' in pair else "_Top"
+            issues.append(issue(ERROR, 'pipe-pair', f"no matching Pipe{number}{missing}, load_level skips this pipe",
+                                name))
+            continue
+        top_name, top = pair['top']
+        bottom_name, bottom = pair['bottom']
+        top_x = _number(top.get('Transform'), 'x')
+        bottom_x = _number(bottom.get('Transform'), 'x')
+        width = _number(top.get('Sprite'), 'width', 60)
+        if top_x != bottom_x or width != _number(bottom.get('Sprite'), 'width', 60):
+            issues.append(issue(WARNING, 'pipe-pair', f"halves are misaligned (x {top_x} vs {bottom_x}), "
+                                                      "load_level uses the top half", top_name))
+        gap_top = _number(top.get('Sprite'), 'height', 100)
+        gap_bottom = _number(bottom.get('Transform'), 'y')
+        if gap_bottom <= gap_top:
+            issues.append(issue(ERROR, 'gap', f"halves overlap, gap is {gap_bottom - gap_top}px", top_name))
+        elif gap_top < 0 or gap_bottom > PLAYFIELD_BOTTOM:
+            issues.append(issue(ERROR, 'gap', f"gap {gap_top}..{gap_bottom} is outside the playfield "
+                                              f"0..{PLAYFIELD_BOTTOM}", top_name))
+        elif gap_top < GAP_TOP_MARGIN:
+            issues.append(issue(WARNING, 'gap', f"gap starts {gap_top}px from the top, the editor keeps "
+                                                f"{GAP_TOP_MARGIN}px", top_name))
+        pipes.append((top_name, top_x, top_x + width, gap_top, gap_bottom))
+    return pipes
+
+
+def _check_overlaps(pipes, powerups, issues):
+    # sweep in left-edge order, a pipe overlaps any earlier one whose right edge it starts before
+    pipes.sort(key=lambda pipe: pipe[1])
+    reach_name, reach = None, float('-inf')
+    for name, left, right, _, _ in pipes:
+        if left < reach:
+            issues.append(issue(WARNING, 'overlap', f"overlaps {reach_name}", name))
+        if right > reach:
+            reach_name, reach = name, right
+
+    # a power-up can only sit inside pipes whose left edge is within the widest pipe of it
+    lefts = [pipe[1] for pipe in pipes]
+    widest = max((right - left for _, left, right, _, _ in pipes), default=0)
+    for name, transform in powerups:
+        x = _number(transform, 'x')
+        y = _number(transform, 'y')
+        if not 0 <= y <= PLAYFIELD_BOTTOM:
+            issues.append(issue(WARNING, 'bounds', f"power-up at y={y} is outside the playfield", name))
+        for i in range(bisect_left(lefts, x - widest), bisect_right(lefts, x)):
+            pipe_name, left, right, gap_top, gap_bottom = pipes[i]
+            if left <= x < right and not gap_top <= y <= gap_bottom:
+                issues.append(issue(WARNING, 'overlap', f"sits inside {pipe_name}, out of reach", name))
+                break
+
+
+def file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def lint_file(path):
+    """(path, issues) for one file, parse errors are reported as issues rather than raised"""
+    try:
+        with open(path, 'rb') as f:
+            data = json.loads(f.read())
+    except (OSError, UnicodeDecodeError, ValueError) as e:
+        return path, [issue(ERROR, 'json', f"cannot parse: {e}")]
+    return path, lint_data(data)
+
+
+def load_cache(cache_path):
+    try:
+        with open(cache_path, 'r') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if cache.get('version') != LINT_VERSION:
+        return {}
+    return cache.get('files', {})
+
+
+def save_cache(cache_path, results):
+    with open(cache_path, 'w') as f:
+        json.dump({'version': LINT_VERSION, 'files': results}, f)
+
+
+def lint_files(paths, workers=None, cache=None):
+    """
+    {path: {'hash', 'issues', 'cached'}} for every path. cache maps content hash -> issues and is
+    updated in place, only files whose hash isn't in it get parsed.
+    """
+    cache = {} if cache is None else cache
+    hashes = {path: file_hash(path) for path in paths}
+    todo = [path for path in paths if hashes[path] not in cache]
+    if workers == 1 or len(todo) < 2:
+        fresh = [lint_file(path) for path in todo]
+    else:
+        workers = workers or os.cpu_count() or 1
+        chunksize = max(1, len(todo) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            fresh = list(pool.map(lint_file, todo, chunksize=chunksize))
+    for path, issues in fresh:
+        cache[hashes[path]] = issues
+    checked = set(todo)
+    return {path: {'hash': hashes[path], 'issues': cache[hashes[path]], 'cached': path not in checked}
+            for path in paths}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate engine level JSON files")
+    parser.add_argument("levels", nargs="+", help="level files or directories")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--json", metavar="PATH", help="write the results as JSON, - for stdout")
+    parser.add_argument("--cache", default=DEFAULT_CACHE, help=f"result cache file (default: {DEFAULT_CACHE})")
+    parser.add_argument("--no-cache", action="store_true", help="check every file again")
+    parser.add_argument("--strict", action="store_true", help="fail on warnings too")
+    args = parser.parse_args(argv)
+
+    paths = level_files(args.levels)
+    if not paths:
+        parser.error("no level files found")
+    cache = {} if args.no_cache else load_cache(args.cache)
+    start = time.perf_counter()
+    results = lint_files(paths, args.jobs, cache)
+    elapsed = time.perf_counter() - start
+    if not args.no_cache:
+        # only hashes of files that still exist are kept, so the cache doesn't grow forever
+        save_cache(args.cache, {result['hash']: result['issues'] for result in results.values()})
+
+    counts = {ERROR: 0, WARNING: 0}
+    for result in results.values():
+        for found in result['issues']:
+            counts[found['severity']] += 1
+    failed = counts[ERROR] or (args.strict and counts[WARNING])
+    cached = sum(result['cached'] for result in results.values())
+
+    if args.json:
+        report = {'files': [dict(result, path=path) for path, result in results.items()],
+                  'errors': counts[ERROR], 'warnings': counts[WARNING], 'ok': not failed}
+        if args.json == '-':
+            json.dump(report, sys.stdout, indent=2)
+            print()
+            return 1 if failed else 0
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    for path, result in results.items():
+        for found in result['issues']:
+            where = f" [{found['object']}]" if found['object'] else ""
+            print(f"{path}: {found['severity']} {found['code']}{where}: {found['message']}")
+    print(f"{len(paths)} files ({cached} unchanged, skipped) in {elapsed:.2f}s: "
+          f"{counts[ERROR]} errors, {counts[WARNING]} warnings")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
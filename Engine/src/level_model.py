@@ -0,0 +1,81 @@
+"""
+Tk-free level model shared by the editor and the command line tools
+Pipes are {x, gap_top, width, gap_height} dicts with x at the pipe centre, power-ups are {x, y, type}
+"""
+
+LEVEL_WIDTH = 800
+LEVEL_HEIGHT = 600
+GROUND_HEIGHT = 50
+GAP_TOP_MARGIN = 30
+
+DEFAULT_PIPE_WIDTH = 60
+DEFAULT_PIPE_GAP = 150
+DEFAULT_GRAVITY = 800.0
+DEFAULT_BG = (135, 206, 235)
+
+POWERUP_TYPES = ('invincibility', 'speed', 'shrink')
+POWERUP_TAGS = {
+    'invincibility': 'powerup_invincibility',
+    'speed': 'powerup_speed',
+    'shrink': 'powerup_shrink',
+}
+TAG_TO_POWERUP = {tag: ptype for ptype, tag in POWERUP_TAGS.items()}
+# compact type codes for column storage, indexes into POWERUP_TYPES
+POWERUP_CODES = {ptype: code for code, ptype in enumerate(POWERUP_TYPES)}
+
+
+def clamp_gap_top(gap_top, gap_height, height=LEVEL_HEIGHT):
+    """Same clamping the editor applies when a pipe is placed: 30px from the top, clear of the ground"""
+    if gap_top < GAP_TOP_MARGIN:
+        gap_top = GAP_TOP_MARGIN
+    if gap_top + gap_height > height - GROUND_HEIGHT:
+        gap_top = height - GROUND_HEIGHT - gap_height
+    return gap_top
+
+
+class Level:
+    def __init__(self, name="My Level", gravity=DEFAULT_GRAVITY, bg=DEFAULT_BG):
+        self.name = name
+        self.gravity = gravity
+        self.bg_r, self.bg_g, self.bg_b = bg
+        self.pipes = []
+        self.powerups = []
+
+    def add_pipe(self, x, gap_top, width=DEFAULT_PIPE_WIDTH, gap_height=DEFAULT_PIPE_GAP):
+        pipe = {'x': x, 'gap_top': gap_top, 'width': width, 'gap_height': gap_height}
+        self.pipes.append(pipe)
+        return pipe
+
+    def add_powerup(self, x, y, powerup_type):
+        powerup = {'x': x, 'y': y, 'type': powerup_type}
+        self.powerups.append(powerup)
+        return powerup
+
+    def file_name(self):
+        return self.name.replace(" ", "_") + ".json"
+
+    @classmethod
+    def from_spec(cls, spec):
+        """
+        Build a level from a compact spec:
+        {"name": ..., "gravity": ..., "bg": [r, g, b],
+         "pipes": [[x, gap_top, width, gap_height], ...], "powerups": [[x, y, type], ...]}
+        """
+        # the engine reads gravity as a float and pipe widths as ints, a spec may well write 900 and 60.0
+        level = cls(spec.get("name", "My Level"), float(spec.get("gravity", DEFAULT_GRAVITY)),
+                    tuple(spec.get("bg", DEFAULT_BG)))
+        for pipe in spec.get("pipes", []):
+            pipe = level.add_pipe(*pipe)
+            pipe['width'] = int(pipe['width'])
+        for powerup in spec.get("powerups", []):
+            level.add_powerup(*powerup)
+        return level
+
+    def to_spec(self):
+        return {
+            "name": self.name,
+            "gravity": self.gravity,
+            "bg": [self.bg_r, self.bg_g, self.bg_b],
+            "pipes": [[p['x'], p['gap_top'], p['width'], p['gap_height']] for p in self.pipes],
+            "powerups": [[p['x'], p['y'], p['type']] for p in self.powerups],
+        }
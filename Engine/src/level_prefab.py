@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Prefab converter for level files
+compact rewrites plain engine JSON into the prefab form (see level_io), expand turns it back into what the
+engine loads, and report compares sizes and load times of both forms. Conversions are lossless: an object
+only becomes an instance if expanding the instance gives the object back exactly, anything else stays as is.
+
+    python level_prefab.py compact ../levels -o compact
+    python level_prefab.py expand compact/*.json -o ../levels
+    python level_prefab.py report ../levels
+    python level_prefab.py --bench 20000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from level_io import PREFABS, compact_objects, expand_level, level_files, level_from_json, save_level_file
+from level_stream import load_level_stream
+
+
+def compact_level(data):
+    """The prefab form of a level dict, the table goes right ahead of gameObjects for the streaming loader"""
+    if "prefabs" in data:
+        return data
+    compact = {}
+    for key, value in data.items():
+        if key == "gameObjects":
+            compact["prefabs"] = PREFABS
+            value = compact_objects(value)
+        compact[key] = value
+    return compact
+
+
+def convert(path, out_path, mode):
+    with open(path, 'r') as f:
+        data = json.load(f)
+    converted = compact_level(data) if mode == "compact" else expand_level(data)
+    text = json.dumps(converted, indent=2)
+    with open(out_path, 'w') as f:
+        f.write(text)
+    return len(text)
+
+
+def _time(func, *args, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _load_json(path):
+    with open(path, 'r') as f:
+        return level_from_json(json.load(f))
+
+
+def report(paths):
+    """Prints size and load-time of every file in its plain and compact form"""
+    print(f"{'level':<28} {'plain':>10} {'compact':>10} {'saved':>6}  {'json load':>17}  {'stream load':>17}")
+    totals = [0, 0]
+    with tempfile.TemporaryDirectory() as tmp:
+        for path in paths:
+            plain_path = os.path.join(tmp, "plain.json")
+            compact_path = os.path.join(tmp, "compact.json")
+            plain = convert(path, plain_path, "expand")
+            compact = convert(plain_path, compact_path, "compact")
+            totals[0] += plain
+            totals[1] += compact
+            # both loaders have to agree on what the compact file holds
+            if vars(load_level_stream(compact_path)) != vars(load_level_stream(plain_path)):
+                raise AssertionError(f"{path}: compact form loads differently")
+            times = [_time(loader, file) for loader in (_load_json, load_level_stream)
+                     for file in (plain_path, compact_path)]
+            print(f"{os.path.basename(path):<28} {plain:>10,} {compact:>10,} {1 - compact / plain:>6.0%}  "
+                  f"{times[0] * 1000:>7.1f}->{times[1] * 1000:>6.1f}ms  {times[2] * 1000:>7.1f}->{times[3] * 1000:>6.1f}ms")
+    if len(paths) > 1:
+        print(f"{'total':<28} {totals[0]:>10,} {totals[1]:>10,} {1 - totals[1] / totals[0]:>6.0%}")
+
+
+def bench(pipes):
+    from level_generator import LevelGenerator, GeneratorBounds
+    bounds = GeneratorBounds(pipes=(pipes, pipes), powerups=(pipes // 20, pipes // 20))
+    level = next(iter(LevelGenerator(0, bounds, batch=1)))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, f"generated_{pipes}.json")
+        save_level_file(level, path)
+        report([path])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert level files to and from the prefab form")
+    parser.add_argument("command", nargs="?", choices=("compact", "expand", "report"))
+    parser.add_argument("levels", nargs="*", help="level files or directories")
+    parser.add_argument("-o", "--out", help="output directory (default: rewrite in place)")
+    parser.add_argument("--bench", type=int, metavar="N", help="report on a generated level with N pipes")
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        bench(args.bench)
+        return 0
+    paths = level_files(args.levels)
+    if args.command is None or not paths:
+        parser.error("a command and level files are required")
+    if args.command == "report":
+        report(paths)
+        return 0
+
+    if args.out:
+        os.makedirs(args.out, exist_ok=True)
+    before = after = 0
+    for path in paths:
+        out_path = os.path.join(args.out, os.path.basename(path)) if args.out else path
+        before += os.path.getsize(path)
+        after += convert(path, out_path, args.command)
+    print(f"{args.command}ed {len(paths)} files, {before:,} -> {after:,} bytes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Streaming level loader
+Walks the gameObjects array of an engine level file one object at a time and emits compact pipe and
+power-up records as it goes, so the whole dict tree of the file is never held in memory
+
+    python level_stream.py --bench 100000
+"""
+import argparse
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+from level_model import Level, TAG_TO_POWERUP, DEFAULT_GRAVITY, DEFAULT_BG
+
+CHUNK_SIZE = 1 << 16
+
+_decoder = json.JSONDecoder()
+_whitespace = re.compile(r'[ \t\n\r]*')
+# what can still follow the digits raw_decode stopped at when a number runs to the end of the buffer
+_number_rest = re.compile(r'[0-9.eE+-]*')
+
+
+class _Reader:
+    """Pulls JSON values out of a file through a sliding text buffer"""
+
+    def __init__(self, f, chunk_size=CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        while True:
+            self.pos = _whitespace.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ''
+
+    def take(self):
+        ch = self.peek()
+        self.pos += 1
+        return ch
+
+    def expect(self, ch):
+        found = self.take()
+        if found != ch:
+            raise ValueError(f"expected '{ch}' but found '{found}'")
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # a number can be cut off at the end of the buffer, 85 out of 85.5 or 1 out of 1e3, read on
+            # before trusting it
+            if (isinstance(value, (int, float)) and _number_rest.fullmatch(self.buf, end)
+                    and self._fill()):
+                continue
+            self.pos = end
+            return value
+
+
+def _object_fields(obj):
+    x = y = width = height = 0
+    tag = ""
+    for comp in obj.get("components", []):
+        kind = comp.get("type")
+        if kind == "Transform":
+            x = comp.get("x", 0)
+            y = comp.get("y", 0)
+        elif kind == "Sprite":
+            width = comp.get("width", 60)
+            height = comp.get("height", 100)
+        elif kind == "Collider":
+            tag = comp.get("tag", "")
+    return x, y, width, height, tag
+
+
+class LevelStream:
+    """
+    Iterates ('pipe', seq, x, gap_top, width, gap_height) and ('powerup', seq, x, y, type) records.
+    Pipe halves can come in any order, a pipe is emitted once both halves are seen and seq is the order
+    its first half appeared in. Top-level fields land in header, complete once iteration finishes.
+    """
+
+    def __init__(self, filepath, chunk_size=CHUNK_SIZE):
+        self.filepath = filepath
+        self.chunk_size = chunk_size
+        self.header = {}
+
+    def __iter__(self):
+        with open(self.filepath, 'r') as f:
+            reader = _Reader(f, self.chunk_size)
+            reader.expect('{')
+            if reader.peek() == '}':
+                return
+            while True:
+                key = reader.value()
+                reader.expect(':')
+                if key == "gameObjects":
+                    yield from self._objects(reader)
+                else:
+                    self.header[key] = reader.value()
+                ch = reader.take()
+                if ch == '}':
+                    return
+                if ch != ',':
+                    raise ValueError(f"expected ',' or '}}' but found '{ch}'")
+
+    def _objects(self, reader):
+        reader.expect('[')
+        if reader.peek() == ']':
+            reader.take()
+            return
+        pending = {}
+        pipe_seq = 0
+        powerup_seq = 0
+        while True:
+            obj = reader.value()
+            name = obj.get("name", "")
+            if "prefab" in obj:
+                # compact instances carry their fields directly, the prefab table came earlier in the header
+                fields = self._prefab_fields(obj)
+                if fields["kind"] == "pipe":
+                    yield ('pipe', pipe_seq, fields["x"], fields["gap_top"], fields["width"], fields["gap_height"])
+                    pipe_seq += 1
+                elif TAG_TO_POWERUP.get(fields["tag"]):
+                    yield ('powerup', powerup_seq, fields["x"], fields["y"], TAG_TO_POWERUP[fields["tag"]])
+                    powerup_seq += 1
+            elif "Pipe" in name and name != "Ground":
+                x, y, width, height, _ = _object_fields(obj)
+                if "_Top" in name:
+                    half = "top"
+                    pipe_num = name.replace("Pipe", "").replace("_Top", "")
+                elif "_Bottom" in name:
+                    half = "bottom"
+                    pipe_num = name.replace("Pipe", "").replace("_Bottom", "")
+                else:
+                    half = None
+                if half is not None:
+                    pair = pending.get(pipe_num)
+                    if pair is None:
+                        pair = pending[pipe_num] = [pipe_seq, None, None]
+                        pipe_seq += 1
+                    if half == "top":
+                        pair[1] = (x + width // 2, height, width)
+                    else:
+                        pair[2] = y
+                    if pair[1] is not None and pair[2] is not None:
+                        del pending[pipe_num]
+                        px, gap_top, width = pair[1]
+                        yield ('pipe', pair[0], px, gap_top, width, pair[2] - gap_top)
+            if "PowerUp" in name:
+                x, y, _, _, tag = _object_fields(obj)
+                powerup_type = TAG_TO_POWERUP.get(tag)
+                if powerup_type:
+                    yield ('powerup', powerup_seq, x, y, powerup_type)
+                    powerup_seq += 1
+            ch = reader.take()
+            if ch == ']':
+                return
+            if ch != ',':
+                raise ValueError(f"expected ',' or ']' but found '{ch}'")
+
+
+    def _prefab_fields(self, obj):
+        prefabs = self.header.get("prefabs")
+        if prefabs is None:
+            raise ValueError("prefab instance before the prefabs table, it has to come ahead of gameObjects")
+        if obj["prefab"] not in prefabs:
+            raise ValueError(f"unknown prefab {obj['prefab']!r}")
+        return dict(prefabs[obj["prefab"]], **obj)
+
+
+def load_level_stream(filepath):
+    stream = LevelStream(filepath)
+    pipes = []
+    powerups = []
+    for record in stream:
+        if record[0] == 'pipe':
+            pipes.append(record[1:])
+        else:
+            powerups.append(record[2:])
+    # pairs finish out of order when halves are far apart, put them back in first-seen order
+    pipes.sort(key=lambda record: record[0])
+
+    header = stream.header
+    level = Level(header.get("name", "Loaded Level"), header.get("gravity", DEFAULT_GRAVITY),
+                  (header.get("bgR", DEFAULT_BG[0]), header.get("bgG", DEFAULT_BG[1]),
+                   header.get("bgB", DEFAULT_BG[2])))
+    for _, x, gap_top, width, gap_height in pipes:
+        level.add_pipe(x, gap_top, width, gap_height)
+    for x, y, powerup_type in powerups:
+        level.add_powerup(x, y, powerup_type)
+    return level
+
+
+def _measure(mode, filepath):
+    import resource
+    from level_io import level_from_json
+    start = time.perf_counter()
+    if mode == "json":
+        with open(filepath, 'r') as f:
+            level = level_from_json(json.load(f))
+    else:
+        level = load_level_stream(filepath)
+    elapsed = time.perf_counter() - start
+    # VmHWM belongs to this exec'd image, ru_maxrss would include the parent that built the file
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if os.path.exists("/proc/self/status"):
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    peak_kb = int(line.split()[1])
+    print(json.dumps({"seconds": elapsed, "peak_kb": peak_kb, "pipes": len(level.pipes),
+                      "powerups": len(level.powerups)}))
+
+
+def bench(objects):
+    from level_io import save_level_file
+    rng = random.Random(0)
+    level = Level("Stream Bench")
+    pipes = objects * 9 // 20
+    for i in range(pipes):
+        gap = rng.randint(100, 200)
+        level.add_pipe(400 + i * 250, rng.randint(30, 550 - gap), 60, gap)
+    for i in range(objects - 1 - pipes * 2):
+        level.add_powerup(rng.randint(400, 400 + pipes * 250), rng.randint(50, 500), 'speed')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        filepath = os.path.join(tmp, "bench.json")
+        size = save_level_file(level, filepath)
+        print(f"{objects} objects, {size / 1e6:.1f} MB")
+        # fresh interpreter per loader so the peak RSS numbers don't bleed into each other
+        for mode in ("json", "stream"):
+            out = subprocess.run([sys.executable, os.path.abspath(__file__), "--measure", mode, filepath],
+                                 capture_output=True, text=True, check=True).stdout
+            result = json.loads(out)
+            print(f"{mode:>6}: {result['seconds']:.3f}s, peak RSS {result['peak_kb'] / 1024:.1f} MB, "
+                  f"{result['pipes']} pipes, {result['powerups']} power-ups")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Streaming level loader benchmark")
+    parser.add_argument("--bench", type=int, metavar="N", default=100000,
+                        help="compare loaders on a synthetic level with N game objects")
+    parser.add_argument("--measure", nargs=2, metavar=("MODE", "FILE"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.measure:
+        _measure(*args.measure)
+    else:
+        bench(args.bench)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,477 @@
+#!/usr/bin/env python3
+"""
+Column-backed pipe and power-up tables for the editor
+Fields live in flat typed arrays (power-up types as one-byte codes) instead of one dict per object.
+A row number is an object's key for its whole life, deleting only marks the row dead, so keys held
+by the canvas layer and the selection stay valid. Once dead rows outnumber live ones the editor swaps
+in a compacted() copy and renumbers whatever holds rows. Each table keeps its own x-sorted index for range
+queries and hit-tests. UI code reads and writes rows through small __slots__ views that also answer
+view['x'] the way the old dicts did.
+
+    python level_table.py --bench 100000
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+from array import array
+from itertools import compress
+
+from level_model import POWERUP_TYPES, POWERUP_CODES
+from spatial_index import SortedXIndex
+
+# half-extent of a power-up on the canvas, for the x index
+POWERUP_EXTENT = 15
+# bulk edits touching more rows than this go through the x index in one pass instead of row by row
+BULK_ROWS = 64
+# dead rows a table may carry before needs_compaction() says yes, so small levels never renumber
+COMPACT_MIN_DEAD = 1024
+
+
+class _Table:
+    __slots__ = ('live', 'count', 'index', 'revision')
+
+    def __init__(self):
+        self.live = bytearray()
+        self.count = 0
+        self.index = SortedXIndex()
+        # bumped by every change, lets autosave tell whether the table needs a new snapshot
+        self.revision = 0
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, row):
+        return row is not None and 0 <= row < len(self.live) and self.live[row] == 1
+
+    def __iter__(self):
+        """Live rows, oldest first"""
+        if self.count == len(self.live):
+            return iter(range(self.count))
+        return compress(range(len(self.live)), self.live)
+
+    def __getitem__(self, row):
+        if row not in self:
+            raise KeyError(row)
+        return self.view_class(self, row)
+
+    def keys(self):
+        return iter(self)
+
+    def values(self):
+        return (self.view_class(self, row) for row in self)
+
+    def items(self):
+        return ((row, self.view_class(self, row)) for row in self)
+
+    def _append_row(self, x, extent):
+        row = len(self.live)
+        self.live.append(1)
+        self.count += 1
+        self.revision += 1
+        self.index.insert(x, row, extent)
+        return row
+
+    def delete(self, row):
+        """Drops a row, its number is never reused until the table is cleared"""
+        if row not in self:
+            raise KeyError(row)
+        self.index.remove(self.x[row], row)
+        self.live[row] = 0
+        self.count -= 1
+        self.revision += 1
+
+    def revive(self, row):
+        """Brings a deleted row back with the fields it had, for undo"""
+        if row in self or not 0 <= row < len(self.live):
+            raise KeyError(row)
+        self.live[row] = 1
+        self.count += 1
+        self.revision += 1
+        self.index.insert(self.x[row], row, self._extent(row))
+
+    def delete_many(self, rows):
+        """delete() for a batch of rows, with at most one pass over the x index"""
+        rows = list(rows)
+        if len(rows) <= BULK_ROWS:
+            for row in rows:
+                self.delete(row)
+            return
+        for row in rows:
+            if row not in self:
+                raise KeyError(row)
+        for row in rows:
+            self.live[row] = 0
+        self.count -= len(rows)
+        self.revision += 1
+        self.index.remove_many(rows)
+
+    def revive_many(self, rows):
+        rows = list(rows)
+        if len(rows) <= BULK_ROWS:
+            for row in rows:
+                self.revive(row)
+            return
+        for row in rows:
+            if row in self or not 0 <= row < len(self.live):
+                raise KeyError(row)
+        for row in rows:
+            self.live[row] = 1
+        self.count += len(rows)
+        self.revision += 1
+        self.index.move_many(rows, [self.x[row] for row in rows])
+        self.index.grow(max(self._extent(row) for row in rows))
+
+    def needs_compaction(self):
+        dead = len(self.live) - self.count
+        return dead >= COMPACT_MIN_DEAD and dead > self.count
+
+    def compacted(self):
+        """A copy holding only the live rows, renumbered in row order, and the old row -> new row map"""
+        table = type(self)()
+        for name in self.__slots__:
+            getattr(table, name).extend(self._live(getattr(self, name)))
+        table.live = bytearray(b'\1' * self.count)
+        table.count = self.count
+        table.index.build([(x, row, table._extent(row)) for row, x in enumerate(table.x)])
+        return table, {row: new for new, row in enumerate(self)}
+
+    def nbytes(self):
+        """Rough memory held by the columns and the index"""
+        columns = sum(getattr(self, name).itemsize * len(self.live) for name in self.__slots__)
+        return columns + len(self.live) + 16 * len(self.index.keys)
+
+    def range(self, lo, hi):
+        """Rows with lo <= x <= hi, in x order"""
+        return self.index.range(lo, hi)
+
+    def near(self, x, extent=None):
+        return self.index.near(x, extent)
+
+    def sorted_by_x(self):
+        """Every live row, in x order (ties oldest first)"""
+        return list(self.index.keys)
+
+    def _live(self, column):
+        if self.count == len(self.live):
+            return column
+        return array(column.typecode, compress(column, self.live))
+
+    def snapshot(self):
+        """Copies of live_columns() that later edits can't touch, safe to hand to another thread"""
+        return tuple(column[:] for column in self.live_columns())
+
+
+class PipeView:
+    __slots__ = ('table', 'row')
+
+    def __init__(self, table, row):
+        self.table = table
+        self.row = row
+
+    @property
+    def x(self):
+        return self.table.x[self.row]
+
+    @property
+    def gap_top(self):
+        return self.table.gap_top[self.row]
+
+    @property
+    def width(self):
+        return self.table.width[self.row]
+
+    @property
+    def gap_height(self):
+        return self.table.gap_height[self.row]
+
+    def __getitem__(self, field):
+        return getattr(self, field)
+
+    def __setitem__(self, field, value):
+        self.table.update(self.row, **{field: value})
+
+    def to_dict(self):
+        return {'x': self.x, 'gap_top': self.gap_top, 'width': self.width, 'gap_height': self.gap_height}
+
+
+class PipeTable(_Table):
+    __slots__ = ('x', 'gap_top', 'width', 'gap_height')
+    view_class = PipeView
+
+    def __init__(self, pipes=()):
+        super().__init__()
+        self.x = array('d')
+        self.gap_top = array('d')
+        self.width = array('i')
+        self.gap_height = array('d')
+        if pipes:
+            self.extend(pipes)
+
+    def append(self, x, gap_top, width, gap_height):
+        self.x.append(x)
+        self.gap_top.append(gap_top)
+        self.width.append(int(width))
+        self.gap_height.append(gap_height)
+        return self._append_row(x, int(width) // 2)
+
+    def _extent(self, row):
+        return self.width[row] // 2
+
+    def extend(self, pipes):
+        """Bulk append of pipe dicts (or views), the index is rebuilt once at the end"""
+        pipes = list(pipes)
+        self.x.extend([pipe['x'] for pipe in pipes])
+        self.gap_top.extend([pipe['gap_top'] for pipe in pipes])
+        self.width.extend([int(pipe['width']) for pipe in pipes])
+        self.gap_height.extend([pipe['gap_height'] for pipe in pipes])
+        self.live.extend(b'\1' * len(pipes))
+        self.count += len(pipes)
+        self.revision += 1
+        self.index.build(zip(self.x, range(len(self.x)), [width // 2 for width in self.width]))
+
+    def update(self, row, x=None, gap_top=None, width=None, gap_height=None):
+        if row not in self:
+            raise KeyError(row)
+        self.revision += 1
+        if x is not None and x != self.x[row]:
+            self.index.remove(self.x[row], row)
+            self.x[row] = x
+            self.index.insert(x, row)
+        if gap_top is not None:
+            self.gap_top[row] = gap_top
+        if width is not None:
+            self.width[row] = int(width)
+            self.index.grow(int(width) // 2)
+        if gap_height is not None:
+            self.gap_height[row] = gap_height
+
+    def append_many(self, x, gap_top, width, gap_height):
+        """append() for columns of new pipes, returns their rows"""
+        first = len(self.live)
+        self.x.extend(x)
+        self.gap_top.extend(gap_top)
+        self.width.extend([int(value) for value in width])
+        self.gap_height.extend(gap_height)
+        rows = range(first, len(self.x))
+        self.live.extend(b'\1' * len(rows))
+        self.count += len(rows)
+        self.revision += 1
+        self.index.move_many(rows, x)
+        self.index.grow(max((self._extent(row) for row in rows), default=0))
+        return rows
+
+    def take(self, rows):
+        """(x, gap_top, width, gap_height) arrays of the given rows, in the order given"""
+        return tuple(array(column.typecode, [column[row] for row in rows])
+                     for column in (self.x, self.gap_top, self.width, self.gap_height))
+
+    def update_many(self, rows, x=None, gap_top=None, width=None, gap_height=None):
+        """
+        update() for a batch of rows, each field a sequence lined up with rows. Moving more than
+        BULK_ROWS rows goes through the x index in one pass rather than shifting each row through it.
+        """
+        rows = list(rows)
+        for row in rows:
+            if row not in self:
+                raise KeyError(row)
+        self.revision += 1
+        if x is not None:
+            if len(rows) > BULK_ROWS:
+                self.index.move_many(rows, x)
+                for row, value in zip(rows, x):
+                    self.x[row] = value
+            else:
+                for row, value in zip(rows, x):
+                    if value != self.x[row]:
+                        self.index.remove(self.x[row], row)
+                        self.x[row] = value
+                        self.index.insert(value, row)
+        for column, values in ((self.gap_top, gap_top), (self.gap_height, gap_height)):
+            if values is not None:
+                for row, value in zip(rows, values):
+                    column[row] = value
+        if width is not None:
+            for row, value in zip(rows, width):
+                self.width[row] = int(value)
+            self.index.grow(max((int(value) for value in width), default=0) // 2)
+
+    def clear(self):
+        self.__init__()
+
+    def live_columns(self):
+        """(x, gap_top, width, gap_height) arrays of the live rows, in row order"""
+        return self._live(self.x), self._live(self.gap_top), self._live(self.width), self._live(self.gap_height)
+
+    def to_dicts(self):
+        return pipe_dicts(self.live_columns())
+
+
+class PowerupView:
+    __slots__ = ('table', 'row')
+
+    def __init__(self, table, row):
+        self.table = table
+        self.row = row
+
+    @property
+    def x(self):
+        return self.table.x[self.row]
+
+    @property
+    def y(self):
+        return self.table.y[self.row]
+
+    @property
+    def type(self):
+        return POWERUP_TYPES[self.table.code[self.row]]
+
+    def __getitem__(self, field):
+        return getattr(self, field)
+
+    def to_dict(self):
+        return {'x': self.x, 'y': self.y, 'type': self.type}
+
+
+class PowerupTable(_Table):
+    __slots__ = ('x', 'y', 'code')
+    view_class = PowerupView
+
+    def __init__(self, powerups=()):
+        super().__init__()
+        self.x = array('d')
+        self.y = array('d')
+        self.code = array('B')
+        if powerups:
+            self.extend(powerups)
+
+    def append(self, x, y, powerup_type):
+        self.x.append(x)
+        self.y.append(y)
+        self.code.append(POWERUP_CODES[powerup_type])
+        return self._append_row(x, POWERUP_EXTENT)
+
+    def _extent(self, row):
+        return POWERUP_EXTENT
+
+    def extend(self, powerups):
+        powerups = list(powerups)
+        self.x.extend([powerup['x'] for powerup in powerups])
+        self.y.extend([powerup['y'] for powerup in powerups])
+        self.code.extend([POWERUP_CODES[powerup['type']] for powerup in powerups])
+        self.live.extend(b'\1' * len(powerups))
+        self.count += len(powerups)
+        self.revision += 1
+        self.index.build([(x, row, POWERUP_EXTENT) for row, x in enumerate(self.x)])
+
+    def clear(self):
+        self.__init__()
+
+    def live_columns(self):
+        """(x, y, type code) arrays of the live rows, in row order"""
+        return self._live(self.x), self._live(self.y), self._live(self.code)
+
+    def to_dicts(self):
+        return powerup_dicts(self.live_columns())
+
+
+def pipe_dicts(columns):
+    """Level-model pipe dicts from PipeTable.live_columns() or a snapshot of them"""
+    return [{'x': x, 'gap_top': gap_top, 'width': width, 'gap_height': gap_height}
+            for x, gap_top, width, gap_height in zip(*columns)]
+
+
+def powerup_dicts(columns):
+    return [{'x': x, 'y': y, 'type': POWERUP_TYPES[code]} for x, y, code in zip(*columns)]
+
+
+def _dict_model(pipes):
+    """The editor's previous storage, an id -> dict map plus a separate x index"""
+    model = {key: dict(pipe) for key, pipe in enumerate(pipes)}
+    index = SortedXIndex()
+    index.build([(pipe['x'], key, pipe['width'] // 2) for key, pipe in model.items()])
+    return model, index
+
+
+def _table_model(pipes):
+    table = PipeTable(pipes)
+    return table, table.index
+
+
+def bench(count):
+    import random
+    rng = random.Random(0)
+    pipes = [{'x': float(rng.randrange(0, count * 250)), 'gap_top': rng.randrange(30, 400),
+              'width': rng.choice((50, 60, 70)), 'gap_height': rng.randrange(100, 200)} for _ in range(count)]
+    windows = [rng.randrange(0, count * 250) for _ in range(1000)]
+    doomed = rng.sample(range(count), 1000)
+
+    for label, build in (("dicts", _dict_model), ("table", _table_model)):
+        tracemalloc.start()
+        model, index = build(pipes)
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del model, index
+
+        start = time.perf_counter()
+        model, index = build(pipes)
+        load_time = time.perf_counter() - start
+
+        # a whole-level pass: per-key dict lookups before, straight column reads now
+        start = time.perf_counter()
+        total = 0.0
+        if label == "dicts":
+            for key in model:
+                pipe = model[key]
+                total += pipe['x'] + pipe['gap_top'] + pipe['gap_height']
+        else:
+            x, gap_top, _, gap_height = model.live_columns()
+            for px, top, gap in zip(x, gap_top, gap_height):
+                total += px + top + gap
+        scan_time = time.perf_counter() - start
+
+        # single-object access the way UI handlers do it
+        start = time.perf_counter()
+        for key in doomed:
+            pipe = model[key]
+            total += pipe['x'] + pipe['width'] // 2
+        lookup_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        hits = sum(len(index.range(lo, lo + 1000)) for lo in windows)
+        range_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for key in doomed:
+            if label == "dicts":
+                index.remove(model.pop(key)['x'], key)
+            else:
+                model.delete(key)
+        delete_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for i in range(1000):
+            x = float(windows[i])
+            if label == "dicts":
+                key = count + i
+                model[key] = {'x': x, 'gap_top': 100, 'width': 60, 'gap_height': 150}
+                index.insert(x, key, 30)
+            else:
+                model.append(x, 100, 60, 150)
+        append_time = time.perf_counter() - start
+
+        print(f"{label}: {memory / 1e6:5.1f} MB, load {load_time * 1000:6.1f} ms, scan {scan_time * 1000:5.1f} ms, "
+              f"1000 lookups {lookup_time * 1000:4.2f} ms, 1000 ranges {range_time * 1000:4.1f} ms ({hits} hits), "
+              f"1000 deletes {delete_time * 1000:5.1f} ms, 1000 appends {append_time * 1000:5.1f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the column tables against per-object dicts")
+    parser.add_argument("--bench", type=int, metavar="N", default=100000, help="pipes to benchmark with")
+    args = parser.parse_args(argv)
+    bench(args.bench)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
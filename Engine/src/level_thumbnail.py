@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Headless level thumbnails
+Rasterizes a level's background, ground, pipes and power-ups straight into an RGB array, no Tk needed.
+Pipe columns are painted per pixel column: where several pipes share a column only the intersection of
+their gaps stays open, so the whole level is a couple of scatter reductions and one broadcast compare.
+Images come out as binary PPM, which Tk's PhotoImage reads as is.
+
+Rendered thumbnails are cached on disk by content hash, least recently used ones are dropped past the limit.
+
+    python level_thumbnail.py ../levels -o thumbs
+    python level_thumbnail.py --bench 100000
+"""
+import argparse
+import hashlib
+import os
+import sys
+import time
+
+import numpy as np
+
+from level_model import LEVEL_WIDTH, LEVEL_HEIGHT, GROUND_HEIGHT, POWERUP_TYPES
+from level_io import load_any_level_file, level_files, LEVEL_EXTENSIONS, PIPE_COLOR, GROUND_COLOR
+
+# bump when the drawing changes so cached images from the old look aren't reused
+RENDER_VERSION = 1
+THUMB_SIZE = (240, 48)
+DEFAULT_CACHE_ENTRIES = 1024
+# room left after the last object, like the editor's scroll padding but smaller
+TRAILING_SPACE = 200
+
+# RGB versions of scene_layer.POWERUP_COLORS, indexed by power-up type code
+POWERUP_RGB = np.array([(255, 215, 0), (0, 255, 255), (255, 192, 203)], dtype=np.uint8)
+assert len(POWERUP_RGB) == len(POWERUP_TYPES)
+
+
+def level_span(pipe_x, pipe_width, powerup_x):
+    """Width of level space a thumbnail covers, at least one screen"""
+    right = LEVEL_WIDTH
+    if len(pipe_x):
+        right = max(right, float(np.max(pipe_x + pipe_width / 2)) + TRAILING_SPACE)
+    if len(powerup_x):
+        right = max(right, float(np.max(powerup_x)) + TRAILING_SPACE)
+    return right
+
+
+def render_columns(pipe_x, gap_top, pipe_width, gap_height, powerup_x, powerup_y, powerup_code, bg,
+                   size=THUMB_SIZE, span=None):
+    """
+    (height, width, 3) uint8 image of a level given as column arrays (any sequence numpy can read, e.g.
+    a PipeTable's live_columns()). span is the level width the image covers, by default the whole level.
+    """
+    width, height = size
+    pipe_x = np.asarray(pipe_x, dtype=np.float64)
+    pipe_width = np.asarray(pipe_width, dtype=np.float64)
+    powerup_x = np.asarray(powerup_x, dtype=np.float64)
+    if span is None:
+        span = level_span(pipe_x, pipe_width, powerup_x)
+    sx = width / span
+    sy = height / LEVEL_HEIGHT
+    ground_row = int(round((LEVEL_HEIGHT - GROUND_HEIGHT) * sy))
+
+    image = np.empty((height, width, 3), dtype=np.uint8)
+    image[:] = bg
+    image[ground_row:] = GROUND_COLOR
+
+    if len(pipe_x):
+        # pixel columns each pipe touches, every pipe gets at least one so thin pipes don't vanish
+        first = np.clip(np.floor((pipe_x - pipe_width // 2) * sx), 0, width - 1).astype(np.intp)
+        last = np.clip(np.ceil((pipe_x + pipe_width // 2) * sx), first + 1, width).astype(np.intp)
+        counts = last - first
+        columns = np.repeat(first, counts) + (np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts))
+        tops = np.repeat(np.asarray(gap_top, dtype=np.float64) * sy, counts)
+        bottoms = tops + np.repeat(np.asarray(gap_height, dtype=np.float64) * sy, counts)
+
+        # open rows of a column are the intersection of the gaps of every pipe in it
+        open_top = np.full(width, -np.inf)
+        open_bottom = np.full(width, np.inf)
+        np.maximum.at(open_top, columns, tops)
+        np.minimum.at(open_bottom, columns, bottoms)
+        rows = np.arange(ground_row)[:, None] + 0.5
+        blocked = (rows < open_top) | (rows >= open_bottom)
+        image[:ground_row][blocked] = PIPE_COLOR
+
+    if len(powerup_x):
+        px = np.clip((powerup_x * sx).astype(np.intp), 0, width - 1)
+        py = np.clip((np.asarray(powerup_y, dtype=np.float64) * sy).astype(np.intp), 0, height - 1)
+        color = POWERUP_RGB[np.asarray(powerup_code, dtype=np.intp)]
+        # 3x3 dots, clipped at the edges
+        for dy in (-1, 0, 1):
+            for dx in (-1, 0, 1):
+                image[np.clip(py + dy, 0, height - 1), np.clip(px + dx, 0, width - 1)] = color
+    return image
+
+
+def render_level(level, size=THUMB_SIZE, span=None):
+    pipes = level.pipes
+    powerups = level.powerups
+    return render_columns([p['x'] for p in pipes], [p['gap_top'] for p in pipes], [p['width'] for p in pipes],
+                          [p['gap_height'] for p in pipes], [p['x'] for p in powerups], [p['y'] for p in powerups],
+                          [POWERUP_TYPES.index(p['type']) for p in powerups],
+                          (level.bg_r, level.bg_g, level.bg_b), size, span)
+
+
+def to_ppm(image):
+    height, width, _ = image.shape
+    return b"P6\n%d %d\n255\n" % (width, height) + image.tobytes()
+
+
+def default_cache_dir():
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "flappy-bird-editor", "thumbnails")
+
+
+class ThumbnailCache:
+    """
+    PPM thumbnails on disk, named by a hash of the level file's bytes and the render settings. A hit
+    bumps the file's mtime, so mtime order is recency order and eviction drops the oldest.
+    """
+
+    def __init__(self, directory=None, max_entries=DEFAULT_CACHE_ENTRIES, size=THUMB_SIZE):
+        self.directory = directory or default_cache_dir()
+        self.max_entries = max_entries
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+    def key(self, data):
+        digest = hashlib.sha1(data)
+        digest.update(b"v%d %dx%d" % (RENDER_VERSION, *self.size))
+        return digest.hexdigest()
+
+    def get(self, path):
+        """PPM bytes of path's thumbnail, rendered and stored on a miss"""
+        with open(path, 'rb') as f:
+            key = self.key(f.read())
+        cached = os.path.join(self.directory, key + ".ppm")
+        try:
+            with open(cached, 'rb') as f:
+                ppm = f.read()
+            os.utime(cached)
+            self.hits += 1
+            return ppm
+        except OSError:
+            pass
+
+        self.misses += 1
+        ppm = to_ppm(render_level(load_any_level_file(path), self.size))
+        temp = f"{cached}.{os.getpid()}.tmp"
+        with open(temp, 'wb') as f:
+            f.write(ppm)
+        os.replace(temp, cached)
+        self.evict()
+        return ppm
+
+    def evict(self):
+        entries = [entry for entry in os.scandir(self.directory) if entry.name.endswith(".ppm")]
+        if len(entries) <= self.max_entries:
+            return 0
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        doomed = entries[:len(entries) - self.max_entries]
+        for entry in doomed:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+        return len(doomed)
+
+
+def bench(count):
+    rng = np.random.default_rng(0)
+    x = np.cumsum(rng.integers(200, 350, count)).astype(np.float64)
+    gap_height = rng.integers(100, 200, count).astype(np.float64)
+    gap_top = rng.integers(30, 550 - 200, count).astype(np.float64)
+    width = rng.choice([50, 60, 70], count)
+    powerups = count // 10
+    args = (x, gap_top, width, gap_height, rng.uniform(0, x[-1], powerups), rng.uniform(50, 500, powerups),
+            rng.integers(0, len(POWERUP_TYPES), powerups), (135, 206, 235))
+    for size in (THUMB_SIZE, (800, 40)):
+        start = time.perf_counter()
+        for _ in range(10):
+            render_columns(*args, size=size)
+        elapsed = (time.perf_counter() - start) / 10
+        print(f"{count} pipes at {size[0]}x{size[1]}: {elapsed * 1000:.1f} ms per render")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render level thumbnails as PPM images")
+    parser.add_argument("levels", nargs="*", help="level files or directories")
+    parser.add_argument("-o", "--out", help="also copy each thumbnail here as <level>.ppm")
+    parser.add_argument("--cache", default=None, help="cache directory (default: ~/.cache/flappy-bird-editor)")
+    parser.add_argument("--size", type=int, nargs=2, default=THUMB_SIZE, metavar=("W", "H"))
+    parser.add_argument("--bench", type=int, metavar="N", help="time rendering a synthetic N-pipe level")
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        bench(args.bench)
+        return 0
+    paths = level_files(args.levels, LEVEL_EXTENSIONS)
+    if not paths:
+        parser.error("no level files given")
+
+    cache = ThumbnailCache(args.cache, size=tuple(args.size))
+    if args.out:
+        os.makedirs(args.out, exist_ok=True)
+    start = time.perf_counter()
+    for path in paths:
+        ppm = cache.get(path)
+        if args.out:
+            with open(os.path.join(args.out, os.path.splitext(os.path.basename(path))[0] + ".ppm"), 'wb') as f:
+                f.write(ppm)
+    elapsed = time.perf_counter() - start
+    print(f"{len(paths)} thumbnails in {elapsed:.2f}s ({cache.hits} cached, {cache.misses} rendered)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
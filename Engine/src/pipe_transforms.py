@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Bulk pipe transforms for the editor's range selection
+Each transform takes the selected pipes as numpy columns (x, gap_top, width, gap_height), in x order, and
+returns new columns of the same length, one array expression per field whatever the selection size. Gaps
+are kept inside the same limits clamp_gap_top puts on a placed pipe.
+
+    python pipe_transforms.py --bench 10000
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from level_model import GAP_TOP_MARGIN, GROUND_HEIGHT, LEVEL_HEIGHT
+
+
+def columns(x, gap_top, width, gap_height):
+    """float64 copies of a PipeTable.take() result"""
+    return (np.array(x, dtype=np.float64), np.array(gap_top, dtype=np.float64), np.array(width, dtype=np.int64),
+            np.array(gap_height, dtype=np.float64))
+
+
+def clamp_gap_tops(gap_top, gap_height, height=LEVEL_HEIGHT):
+    """clamp_gap_top over arrays: the margin below the ceiling first, then clear of the ground"""
+    return np.minimum(np.maximum(gap_top, GAP_TOP_MARGIN), height - GROUND_HEIGHT - gap_height)
+
+
+def shift(x, gap_top, width, gap_height, dx):
+    # never past the left edge of the level, the whole selection stops there together
+    dx = max(dx, -float(x.min())) if len(x) else dx
+    return x + dx, gap_top, width, gap_height
+
+
+def scale_spacing(x, gap_top, width, gap_height, factor):
+    """Stretches (factor > 1) or squeezes the distances between pipes, the leftmost one stays put"""
+    if not len(x):
+        return x, gap_top, width, gap_height
+    anchor = x.min()
+    return anchor + (x - anchor) * factor, gap_top, width, gap_height
+
+
+def mirror(x, gap_top, width, gap_height):
+    """Flips the section left to right within the span it already covers"""
+    if not len(x):
+        return x, gap_top, width, gap_height
+    return x.min() + x.max() - x, gap_top, width, gap_height
+
+
+def set_gap_height(x, gap_top, width, gap_height, value):
+    """Every gap becomes value px tall around its old centre"""
+    centre = gap_top + gap_height / 2
+    heights = np.full_like(gap_height, value)
+    return x, clamp_gap_tops(np.round(centre - heights / 2), heights), width, heights
+
+
+def randomize_gap_height(x, gap_top, width, gap_height, lo, hi, seed=None):
+    centre = gap_top + gap_height / 2
+    heights = np.random.default_rng(seed).integers(lo, hi + 1, len(gap_height)).astype(np.float64)
+    return x, clamp_gap_tops(np.round(centre - heights / 2), heights), width, heights
+
+
+def jitter_gap_top(x, gap_top, width, gap_height, amount, seed=None):
+    """Moves every gap up or down by up to amount px"""
+    offsets = np.random.default_rng(seed).integers(-amount, amount + 1, len(gap_top))
+    return x, clamp_gap_tops(gap_top + offsets, gap_height), width, gap_height
+
+
+def paste(clip, x0):
+    """Columns of a copied section (as copied, with x relative to its first pipe) placed to start at x0"""
+    x, gap_top, width, gap_height = clip
+    return x + max(x0, 0.0), gap_top, width, gap_height
+
+
+def copy(x, gap_top, width, gap_height):
+    return x - (x.min() if len(x) else 0.0), gap_top.copy(), width.copy(), gap_height.copy()
+
+
+def changed(before, after):
+    """Lists of the columns a transform replaced, None for the ones it passed through, ready for update_many"""
+    return [None if new is old else new.tolist() for old, new in zip(before, after)]
+
+
+def bench(count):
+    from level_table import PipeTable
+    rng = np.random.default_rng(0)
+    total = count * 10
+    table = PipeTable({'x': 400.0 + i * 250, 'gap_top': float(rng.integers(30, 400)), 'width': 60,
+                       'gap_height': 150.0} for i in range(total))
+    rows = table.range(400.0 + total // 3 * 250, float('inf'))[:count]
+    operations = (
+        ("shift", lambda *c: shift(*c, 120)),
+        ("scale spacing", lambda *c: scale_spacing(*c, 1.2)),
+        ("mirror", mirror),
+        ("set gap height", lambda *c: set_gap_height(*c, 140)),
+        ("randomize gap height", lambda *c: randomize_gap_height(*c, 100, 200, 1)),
+        ("jitter gap top", lambda *c: jitter_gap_top(*c, 40, 2)),
+    )
+    for label, transform in operations:
+        start = time.perf_counter()
+        selected = columns(*table.take(rows))
+        gathered = time.perf_counter()
+        result = transform(*selected)
+        transformed = time.perf_counter()
+        table.update_many(rows, *changed(selected, result))
+        end = time.perf_counter()
+        print(f"{label:<22} {count} of {total} pipes: gather {(gathered - start) * 1000:5.1f} ms, "
+              f"transform {(transformed - gathered) * 1000:5.2f} ms, write back {(end - transformed) * 1000:5.1f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the bulk pipe transforms")
+    parser.add_argument("--bench", type=int, metavar="N", default=10000, help="selected pipes, the level has 10x")
+    args = parser.parse_args(argv)
+    bench(args.bench)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,188 @@
+"""
+Retained-mode scene layer for the level editor canvas
+Keeps the Tk item ids for the pipes and power-ups near the viewport so edits only touch what changed,
+objects scrolled out of view hand their items back to a pool for reuse
+"""
+from instrumentation import count
+
+POWERUP_COLORS = {
+    'invincibility': 'gold',
+    'speed': 'cyan',
+    'shrink': 'pink',
+}
+POWERUP_SYMBOLS = {
+    'invincibility': '⭐',
+    'speed': '⚡',
+    'shrink': '🎯',
+}
+
+GROUND_HEIGHT = 50
+
+# outline for pipes the playability check flagged, by level_analyzer status code
+FLAG_OUTLINES = {1: 'magenta', 2: 'red'}
+
+
+class SceneLayer:
+    # hidden item groups kept around for reuse, anything past this is deleted
+    POOL_LIMIT = 256
+
+    def __init__(self, canvas, canvas_height):
+        self.canvas = canvas
+        self.canvas_height = canvas_height
+        self.ground_item = None
+
+        # item ids per materialized object, keyed by the editor's pipe/power-up ids
+        self.pipe_items = {}
+        self.powerup_items = {}
+        self.pipe_pool = []
+        self.powerup_pool = []
+        self.selected_pipe = None
+        # range selection, drawn the same as the single selected pipe
+        self.selection = frozenset()
+        self.pipe_flags = {}
+
+    def set_background(self, r, g, b):
+        self.canvas.config(bg=f'#{r:02x}{g:02x}{b:02x}')
+
+    def draw_ground(self, width):
+        coords = (0, self.canvas_height - GROUND_HEIGHT, width, self.canvas_height)
+        if self.ground_item is None:
+            self.ground_item = self.canvas.create_rectangle(*coords, fill='brown', outline='black')
+            count("canvas items created")
+        else:
+            self.canvas.coords(self.ground_item, *coords)
+
+    def _pipe_coords(self, pipe):
+        px = pipe['x']
+        gap_top = pipe['gap_top']
+        half = pipe['width'] // 2
+        gap_bottom = gap_top + pipe['gap_height']
+        marker_y = gap_top + pipe['gap_height'] // 2
+        return ((px - half, 0, px + half, gap_top),
+                (px - half, gap_bottom, px + half, self.canvas_height - GROUND_HEIGHT),
+                (px - 5, marker_y - 5, px + 5, marker_y + 5))
+
+    def _style_pipe(self, key, items):
+        top, bottom, marker = items
+        selected = key == self.selected_pipe or key in self.selection
+        flag = self.pipe_flags.get(key)
+        fill_color = 'yellow' if selected else 'green'
+        outline_color = 'orange' if selected else FLAG_OUTLINES.get(flag, 'darkgreen')
+        outline_width = 4 if selected or flag else 2
+        self.canvas.itemconfig(top, fill=fill_color, outline=outline_color, width=outline_width)
+        self.canvas.itemconfig(bottom, fill=fill_color, outline=outline_color, width=outline_width)
+        self.canvas.itemconfig(marker, fill='orange' if selected else 'red')
+
+    def _release(self, items, pool):
+        if len(pool) < self.POOL_LIMIT:
+            for item in items:
+                self.canvas.itemconfig(item, state='hidden')
+            pool.append(items)
+        else:
+            for item in items:
+                self.canvas.delete(item)
+
+    def add_pipe(self, key, pipe):
+        coords = self._pipe_coords(pipe)
+        if self.pipe_pool:
+            items = self.pipe_pool.pop()
+            for item, item_coords in zip(items, coords):
+                self.canvas.coords(item, *item_coords)
+                self.canvas.itemconfig(item, state='normal')
+        else:
+            top, bottom, marker = coords
+            items = (self.canvas.create_rectangle(*top),
+                     self.canvas.create_rectangle(*bottom),
+                     self.canvas.create_oval(*marker))
+            count("canvas items created", 3)
+            if self.powerup_items or self.powerup_pool:
+                # keep power-ups drawn above the pipes
+                for item in items:
+                    self.canvas.tag_lower(item, 'powerup')
+        self._style_pipe(key, items)
+        self.pipe_items[key] = items
+
+    def update_pipe(self, key, pipe):
+        if key not in self.pipe_items:
+            return
+        for item, coords in zip(self.pipe_items[key], self._pipe_coords(pipe)):
+            self.canvas.coords(item, *coords)
+
+    def set_selected_pipe(self, key):
+        # only the old and new selection get restyled
+        old = self.selected_pipe
+        self.selected_pipe = key
+        for changed in (old, key):
+            if changed in self.pipe_items:
+                self._style_pipe(changed, self.pipe_items[changed])
+
+    def set_selection(self, keys):
+        """keys is a set of pipe ids, only materialized pipes that joined or left it are restyled"""
+        old = self.selection
+        self.selection = keys
+        for key in self.pipe_items:
+            if (key in old) != (key in keys):
+                self._style_pipe(key, self.pipe_items[key])
+
+    def set_pipe_flags(self, flags):
+        """flags maps pipe id -> non-zero analyzer status, only pipes whose flag changed are restyled"""
+        old = self.pipe_flags
+        self.pipe_flags = flags
+        for key in set(old).symmetric_difference(flags) | {k for k in flags if old.get(k) != flags[k]}:
+            if key in self.pipe_items:
+                self._style_pipe(key, self.pipe_items[key])
+
+    def remove_pipe(self, key):
+        if key in self.pipe_items:
+            self._release(self.pipe_items.pop(key), self.pipe_pool)
+
+    def add_powerup(self, key, powerup):
+        px = powerup['x']
+        py = powerup['y']
+        ptype = powerup['type']
+        color = POWERUP_COLORS.get(ptype, 'white')
+        symbol = POWERUP_SYMBOLS.get(ptype, '?')
+        if self.powerup_pool:
+            oval, text = self.powerup_pool.pop()
+            self.canvas.coords(oval, px - 15, py - 15, px + 15, py + 15)
+            self.canvas.coords(text, px, py)
+            self.canvas.itemconfig(oval, fill=color, state='normal')
+            self.canvas.itemconfig(text, text=symbol, state='normal')
+        else:
+            oval = self.canvas.create_oval(px - 15, py - 15, px + 15, py + 15,
+                                           fill=color, outline='white', width=3, tags='powerup')
+            text = self.canvas.create_text(px, py, text=symbol,
+                                           font=('Arial', 16), fill='white', tags='powerup')
+            count("canvas items created", 2)
+        self.powerup_items[key] = (oval, text)
+
+    def remove_powerup(self, key):
+        if key in self.powerup_items:
+            self._release(self.powerup_items.pop(key), self.powerup_pool)
+
+    def sync(self, pipe_keys, pipes, powerup_keys, powerups):
+        """Materialize exactly the given keys, cost is proportional to what entered or left the view"""
+        wanted = set(pipe_keys)
+        for key in [key for key in self.pipe_items if key not in wanted]:
+            self.remove_pipe(key)
+        for key in wanted.difference(self.pipe_items):
+            self.add_pipe(key, pipes[key])
+
+        wanted = set(powerup_keys)
+        for key in [key for key in self.powerup_items if key not in wanted]:
+            self.remove_powerup(key)
+        for key in wanted.difference(self.powerup_items):
+            self.add_powerup(key, powerups[key])
+
+    def clear(self):
+        """Drop every pipe and power-up item, the ground stays"""
+        for items in list(self.pipe_items.values()) + self.pipe_pool:
+            for item in items:
+                self.canvas.delete(item)
+        for items in list(self.powerup_items.values()) + self.powerup_pool:
+            for item in items:
+                self.canvas.delete(item)
+        self.pipe_items = {}
+        self.powerup_items = {}
+        self.pipe_pool = []
+        self.powerup_pool = []
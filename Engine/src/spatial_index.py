@@ -0,0 +1,111 @@
+"""
+Sorted-by-x index used by the editor for click hit-testing
+Objects are stored as (x, key) pairs in two parallel typed arrays, keys are the editor's row numbers.
+Lookups are O(log n + k) for k results. Edits are not: insert() and remove() find their slot by bisection
+but shift the rest of both arrays along, O(n) memmoves, and the bulk methods rebuild the arrays in one
+O(n) pass however many keys they touch.
+"""
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import compress
+
+
+class SortedXIndex:
+    def __init__(self):
+        self.xs = array('d')
+        self.keys = array('q')
+        # widest half-extent seen, used as the search window for hit-tests
+        self.max_extent = 0
+
+    def __len__(self):
+        return len(self.keys)
+
+    def clear(self):
+        self.xs = array('d')
+        self.keys = array('q')
+        self.max_extent = 0
+
+    def build(self, items):
+        """Bulk load from (x, key, extent) tuples"""
+        items = list(items)
+        entries = sorted((x, key) for x, key, _ in items)
+        self.xs = array('d', [x for x, _ in entries])
+        self.keys = array('q', [key for _, key in entries])
+        self.max_extent = max((extent for _, _, extent in items), default=0)
+
+    def insert(self, x, key, extent=0):
+        # equal xs stay ordered by key so the lookups below can bisect on it
+        lo = bisect_left(self.xs, x)
+        hi = bisect_right(self.xs, x, lo)
+        i = bisect_left(self.keys, key, lo, hi)
+        self.xs.insert(i, x)
+        self.keys.insert(i, key)
+        self.grow(extent)
+
+    def remove(self, x, key):
+        lo = bisect_left(self.xs, x)
+        hi = bisect_right(self.xs, x, lo)
+        i = bisect_left(self.keys, key, lo, hi)
+        if i < hi and self.keys[i] == key:
+            del self.xs[i]
+            del self.keys[i]
+            return True
+        return False
+
+    def move_many(self, keys, xs):
+        """
+        Puts each key at its new x, keys not in the index yet are added. The other entries are kept in one
+        compress pass and the moved ones spliced back in x order, a run of them that lands between the same
+        two entries goes in at once.
+        """
+        moved = set(keys)
+        keep = [key not in moved for key in self.keys]
+        kept_xs = array('d', compress(self.xs, keep))
+        kept_keys = array('q', compress(self.keys, keep))
+        out_xs = array('d')
+        out_keys = array('q')
+        run_xs = []
+        run_keys = []
+        start = 0
+        for x, key in sorted(zip(xs, keys)):
+            if start < len(kept_xs) and (kept_xs[start], kept_keys[start]) < (x, key):
+                lo = bisect_left(kept_xs, x, start)
+                hi = bisect_right(kept_xs, x, lo)
+                i = bisect_left(kept_keys, key, lo, hi)
+                out_xs.extend(run_xs)
+                out_keys.extend(run_keys)
+                out_xs += kept_xs[start:i]
+                out_keys += kept_keys[start:i]
+                run_xs = []
+                run_keys = []
+                start = i
+            run_xs.append(x)
+            run_keys.append(key)
+        out_xs.extend(run_xs)
+        out_keys.extend(run_keys)
+        out_xs += kept_xs[start:]
+        out_keys += kept_keys[start:]
+        self.xs = out_xs
+        self.keys = out_keys
+
+    def remove_many(self, keys):
+        removed = set(keys)
+        keep = [key not in removed for key in self.keys]
+        self.xs = array('d', compress(self.xs, keep))
+        self.keys = array('q', compress(self.keys, keep))
+
+    def grow(self, extent):
+        if extent > self.max_extent:
+            self.max_extent = extent
+
+    def range(self, lo, hi):
+        """Keys with lo <= x <= hi, in x order"""
+        start = bisect_left(self.xs, lo)
+        end = bisect_right(self.xs, hi, start)
+        return self.keys[start:end]
+
+    def near(self, x, extent=None):
+        """Candidate keys whose x is within extent of x (defaults to the widest object)"""
+        if extent is None:
+            extent = self.max_extent
+        return self.range(x - extent, x + extent)
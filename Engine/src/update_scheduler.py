@@ -0,0 +1,51 @@
+"""
+Coalescing update scheduler for Tk callbacks
+Bursts of requests (a spinner arrow held down, trace writes while a value is typed) collapse into at most
+one flush per frame, run from root.after so the event loop never blocks on them
+"""
+import time
+
+
+class UpdateScheduler:
+    def __init__(self, root, flush, frame_ms=16):
+        self.root = root
+        self.flush = flush
+        # shortest time between two flushes
+        self.frame_ms = frame_ms
+
+        # requests received vs flushes performed, the gap between them is what got coalesced
+        self.received = 0
+        self.performed = 0
+        # how long the last flush took, to compare against the frame budget
+        self.last_flush_ms = 0.0
+
+        self._pending = None
+        self._last_flush = None
+
+    def request(self):
+        self.received += 1
+        if self._pending is not None:
+            return
+        delay = 1
+        if self._last_flush is not None:
+            since = (time.perf_counter() - self._last_flush) * 1000
+            delay = max(1, int(self.frame_ms - since))
+        self._pending = self.root.after(delay, self._run)
+
+    def _run(self):
+        self._pending = None
+        start = time.perf_counter()
+        self._last_flush = start
+        self.performed += 1
+        self.flush()
+        self.last_flush_ms = (time.perf_counter() - start) * 1000
+
+    def flush_now(self):
+        """Runs a pending flush right away, e.g. before saving"""
+        if self._pending is not None:
+            self.root.after_cancel(self._pending)
+            self._run()
+
+    def stats(self):
+        return (f"{self.received} updates, {self.performed} redraws, "
+                f"last redraw {self.last_flush_ms:.1f}ms of a {self.frame_ms}ms frame")
@@ -0,0 +1,133 @@
+"""
+AutoSaver polling and the atomic writes behind it, driven by a stand-in for Tk's after()
+
+    python -m unittest discover -s tests
+"""
+import json
+import os
+import sys
+import tempfile
+import unittest
+from array import array
+from contextlib import redirect_stderr
+from io import StringIO
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from autosave import AutoSaver, write_atomic, write_level_snapshot
+
+
+class Root:
+    """Keeps after() callbacks for the test to run by hand"""
+
+    def __init__(self):
+        self.pending = {}
+        self.next_id = 0
+
+    def after(self, ms, func):
+        self.next_id += 1
+        self.pending[self.next_id] = func
+        return self.next_id
+
+    def after_cancel(self, after_id):
+        self.pending.pop(after_id, None)
+
+    def run(self):
+        due, self.pending = self.pending, {}
+        for func in due.values():
+            func()
+
+
+class WriteAtomicTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "level.json")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_replaces_the_file(self):
+        write_atomic(self.path, "old")
+        self.assertEqual(write_atomic(self.path, "new é"), len("new é".encode('utf-8')))
+        with open(self.path, encoding='utf-8') as f:
+            self.assertEqual(f.read(), "new é")
+        self.assertEqual(os.listdir(self.dir.name), ["level.json"])
+
+    def test_failed_rename_keeps_the_old_file(self):
+        write_atomic(self.path, "old")
+        with mock.patch("os.replace", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                write_atomic(self.path, "new")
+        with open(self.path) as f:
+            self.assertEqual(f.read(), "old")
+        self.assertEqual(os.listdir(self.dir.name), ["level.json"])
+
+    def test_level_snapshot(self):
+        snapshot = ("Auto", 800.0, (135, 206, 235),
+                    (array('d', [300.0]), array('d', [200.0]), array('i', [60]), array('d', [150.0])),
+                    (array('d', []), array('d', []), array('B', [])))
+        write_level_snapshot(self.dir.name, snapshot)
+        with open(os.path.join(self.dir.name, "Auto.json")) as f:
+            data = json.load(f)
+        self.assertEqual(data['name'], "Auto")
+        self.assertEqual(sum("Pipe" in obj['name'] and obj['name'] != "Ground" for obj in data['gameObjects']), 2)
+
+
+class AutoSaverTest(unittest.TestCase):
+    def setUp(self):
+        self.root = Root()
+        self.snapshots = []
+        self.written = []
+
+    def saver(self, write=None):
+        saver = AutoSaver(self.root, lambda: self.snapshots.pop(0) if self.snapshots else None,
+                          write or self.write, interval_ms=10)
+        saver.start()
+        self.addCleanup(saver.stop, 5)
+        return saver
+
+    def write(self, snapshot):
+        self.written.append(snapshot)
+        return len(snapshot)
+
+    def test_only_dirty_polls_write(self):
+        saver = self.saver()
+        self.root.run()
+        self.snapshots.append("level")
+        self.root.run()
+        self.root.run()
+        saver.stop(5)
+        self.assertEqual(self.written, ["level"])
+        self.assertEqual(saver.skipped, 3)
+        self.assertEqual(saver.saves, 1)
+
+    def test_failed_snapshot_keeps_polling(self):
+        saver = self.saver()
+        saver.snapshot = mock.Mock(side_effect=[RuntimeError("bad row"), "level", None, None])
+        with redirect_stderr(StringIO()):
+            self.root.run()
+        self.assertIn("RuntimeError: bad row", saver.stats())
+        self.assertEqual(len(self.root.pending), 1)
+        self.root.run()
+        saver.stop(5)
+        self.assertEqual(self.written, ["level"])
+
+    def test_failed_write_keeps_the_worker(self):
+        def write(snapshot):
+            if snapshot == "bad":
+                raise ValueError("cannot serialize")
+            return self.write(snapshot)
+        saver = self.saver(write)
+        with redirect_stderr(StringIO()):
+            self.snapshots.append("bad")
+            self.root.run()
+            self.snapshots.append("good")
+            self.root.run()
+            saver.stop(5)
+        self.assertEqual(self.written, ["good"])
+        self.assertTrue(saver.stats().startswith("Autosaved"))
+
+
+if __name__ == "__main__":
+    unittest.main()
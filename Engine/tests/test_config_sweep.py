@@ -0,0 +1,105 @@
+"""
+config_sweep cells: the same results whether batched, cached or simulated one at a time
+
+    python -m unittest discover -s tests
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from config_sweep import (SWEEP_VERSION, apply_combination, load_cache, save_cache, simulate_combinations, sweep,
+                          sweep_level, variant)
+from level_difficulty import seed_for, simulate
+from level_io import save_level_file
+from level_model import Level
+
+RUNS = 40
+COMBINATIONS = [(-300.0, 800.0, -200.0, 2.5, False), (-340.0, 900.0, -200.0, 2.5, False),
+                (-300.0, 800.0, -240.0, 3.0, True)]
+
+
+def sample_level(name="Sweep"):
+    level = Level(name)
+    for i, gap_top in enumerate((200, 260, 150, 230)):
+        level.add_pipe(500.0 + i * 300, gap_top, 60, 150)
+    return level
+
+
+class SweepTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+        self.path = os.path.join(self.dir, "sweep.json")
+        save_level_file(sample_level(), self.path)
+
+    def test_batched_columns_match_simulate(self):
+        level = sample_level()
+        outcome = simulate_combinations(level, COMBINATIONS, RUNS)
+        for i, (jump_power, gravity, pipe_speed, rate, hard) in enumerate(COMBINATIONS):
+            rng = np.random.default_rng(seed_for(level, 0))
+            single = simulate(variant(level.pipes, rate, hard), gravity, RUNS, rng, jump_power, pipe_speed)
+            np.testing.assert_array_equal(outcome[:, i], single)
+
+    def test_cells_are_cached(self):
+        cache = {}
+        table, simulated = sweep([self.path], COMBINATIONS, RUNS, workers=1, cache=cache)
+        self.assertEqual(simulated, len(COMBINATIONS))
+        again, simulated = sweep([self.path], COMBINATIONS, RUNS, workers=1, cache=cache)
+        self.assertEqual((again, simulated), (table, 0))
+
+    def test_only_missing_cells_are_simulated(self):
+        cache = {}
+        table, _ = sweep([self.path], COMBINATIONS, RUNS, workers=1, cache=cache)
+        extra = (-280.0, 700.0, -200.0, 2.5, False)
+        wider, simulated = sweep([self.path], COMBINATIONS + [extra], RUNS, workers=1, cache=cache)
+        self.assertEqual(simulated, 1)
+        self.assertEqual(wider[self.path][:len(COMBINATIONS)], table[self.path])
+        # a cell doesn't depend on what else was swept with it
+        self.assertEqual(wider[self.path][-1], sweep_level(sample_level(), [extra], RUNS)[0])
+        # other run counts are other cells
+        self.assertEqual(sweep([self.path], COMBINATIONS, RUNS + 1, workers=1, cache=cache)[1], len(COMBINATIONS))
+
+    def test_cache_follows_content(self):
+        cache = {}
+        sweep([self.path], COMBINATIONS, RUNS, workers=1, cache=cache)
+        copy = os.path.join(self.dir, "copy.json")
+        shutil.copy(self.path, copy)
+        self.assertEqual(sweep([copy], COMBINATIONS, RUNS, workers=1, cache=cache)[1], 0)
+        level = sample_level()
+        level.pipes[0]['gap_top'] += 10
+        save_level_file(level, copy)
+        self.assertEqual(sweep([copy], COMBINATIONS, RUNS, workers=1, cache=cache)[1], len(COMBINATIONS))
+
+    def test_cache_file(self):
+        cache_path = os.path.join(self.dir, "cache.json")
+        self.assertEqual(load_cache(cache_path), {})
+        cache = {}
+        sweep([self.path], COMBINATIONS, RUNS, workers=1, cache=cache)
+        save_cache(cache_path, cache)
+        self.assertEqual(load_cache(cache_path), cache)
+        with open(cache_path, 'w') as f:
+            json.dump({'version': SWEEP_VERSION + 1, 'levels': cache}, f)
+        self.assertEqual(load_cache(cache_path), {})
+
+    def test_game_script(self):
+        config = {"type": "GameScript", "variables": {"bird_jump_power": -300.0}, "flags": {},
+                  "commands": [{"action": "modify", "target": "bird", "parameter": "jump_power", "value": -300.0}]}
+        script = apply_combination(config, (-340, 900, -200.0, 2.5, True), "tuned")
+        self.assertEqual(script["variables"]["bird_jump_power"], -340.0)
+        self.assertIsInstance(script["variables"]["bird_gravity"], float)
+        self.assertIs(script["flags"]["hard_mode"], True)
+        self.assertEqual(script["commands"][0]["value"], -340.0)
+        # the config passed in is left alone
+        self.assertEqual(config["variables"], {"bird_jump_power": -300.0})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+"""
+EditHistory on its own: undo/redo order, merging, attached deltas and the memory budget
+
+    python -m unittest discover -s tests
+"""
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from edit_history import MERGE_SECONDS, EditHistory
+
+
+class Value:
+    """A setting the history edits through set(), recording every edit it makes"""
+
+    def __init__(self, history, value=0):
+        self.history = history
+        self.value = value
+
+    def set(self, value, merge_key=None, size=100):
+        old = self.value
+        self.value = value
+        self.history.record(f"set {value}", (self.set, (old,)), (self.set, (value,)), size, merge_key)
+
+
+class EditHistoryTest(unittest.TestCase):
+    def setUp(self):
+        self.history = EditHistory(budget=1000)
+        self.setting = Value(self.history)
+
+    def test_undo_and_redo(self):
+        for value in (1, 2, 3):
+            self.setting.set(value)
+        self.assertEqual(self.history.undo(), "set 3")
+        self.assertEqual(self.history.undo(), "set 2")
+        self.assertEqual(self.setting.value, 1)
+        self.assertEqual(self.history.redo(), "set 2")
+        self.assertEqual(self.setting.value, 2)
+        # replaying didn't record anything new
+        self.assertEqual((len(self.history.done), len(self.history.undone)), (2, 1))
+
+    def test_new_edit_drops_the_redo_steps(self):
+        self.setting.set(1)
+        self.setting.set(2)
+        self.history.undo()
+        self.setting.set(5)
+        self.assertIsNone(self.history.redo())
+        self.assertEqual(self.history.size, 200)
+
+    def test_nothing_to_undo(self):
+        self.assertIsNone(self.history.undo())
+        self.assertIsNone(self.history.redo())
+
+    def test_merge(self):
+        clock = [0.0]
+        with mock.patch("edit_history.time.monotonic", side_effect=lambda: clock[0]):
+            for value, now in ((1, 0.0), (2, 0.1), (3, 0.2), (4, 0.2 + MERGE_SECONDS * 2)):
+                clock[0] = now
+                self.setting.set(value, merge_key="gravity")
+        # the first three came in one burst and undo as one step
+        self.history.undo()
+        self.assertEqual(self.setting.value, 3)
+        self.history.undo()
+        self.assertEqual(self.setting.value, 0)
+        self.history.redo()
+        self.assertEqual(self.setting.value, 3)
+
+    def test_attach(self):
+        log = []
+        self.setting.set(1)
+        self.history.attach((log.append, ("undo attached",)), (log.append, ("redo attached",)))
+        self.history.undo()
+        self.assertEqual((log, self.setting.value), (["undo attached"], 0))
+        self.history.redo()
+        self.assertEqual((log, self.setting.value), (["undo attached", "redo attached"], 1))
+
+    def test_budget(self):
+        for value in range(15):
+            self.setting.set(value)
+        self.assertEqual((len(self.history.done), self.history.evicted), (10, 5))
+        # the newest step is kept even when it alone is over the budget
+        self.setting.set(99, size=5000)
+        self.assertEqual(len(self.history.done), 1)
+
+    def test_clear(self):
+        for value in range(15):
+            self.setting.set(value)
+        self.history.undo()
+        self.history.clear()
+        self.assertEqual((len(self.history.done), len(self.history.undone), self.history.size, self.history.evicted),
+                         (0, 0, 0, 0))
+        self.assertTrue(self.history.stats().endswith(", 0 evicted"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+"""
+Undo/redo of merged settings edits (EditHistory.record) and of table compaction (Editor.compact_tables)
+Needs a Tk display, skipped without one.
+
+    python -m unittest discover -s tests
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import tkinter as tk
+
+import editor
+from level_table import COMPACT_MIN_DEAD
+
+
+class EditorTest(unittest.TestCase):
+    def setUp(self):
+        try:
+            self.root = tk.Tk()
+        except tk.TclError:
+            self.skipTest("no display")
+        self.autosave_dir = tempfile.TemporaryDirectory()
+        editor.Editor.AUTOSAVE_DIR = self.autosave_dir.name
+        self.editor = editor.Editor(self.root)
+
+    def tearDown(self):
+        self.editor.on_close()
+        self.autosave_dir.cleanup()
+
+
+class SettingsMergeTest(EditorTest):
+    def setUp(self):
+        super().setUp()
+        self.key = self.editor.insert_pipe(300.0, 200, 60, 150)
+        self.editor.history.done.clear()
+        self.editor.set_selected_pipe(self.key)
+
+    def edit(self, var, value):
+        # two edits well inside MERGE_SECONDS of each other, each flushed as its own frame
+        var.set(value)
+        self.editor.settings_updates.flush_now()
+
+    def assert_state(self, width, gravity):
+        self.assertEqual(self.editor.pipes.width[self.key], width)
+        self.assertEqual(self.editor.gravity, gravity)
+
+    def check(self, first, second):
+        ed = self.editor
+        self.edit(*first)
+        self.edit(*second)
+        self.assertEqual(len(ed.history.done), 1)
+        self.assert_state(80, 900)
+        ed.undo()
+        self.assert_state(60, 800)
+        ed.redo()
+        self.assert_state(80, 900)
+
+    def test_gravity_then_width(self):
+        self.check((self.editor.gravity_var, 900), (self.editor.width_var, 80))
+
+    def test_width_then_gravity(self):
+        self.check((self.editor.width_var, 80), (self.editor.gravity_var, 900))
+
+
+class CompactionTest(EditorTest):
+    def test_remove_most_pipes(self):
+        ed = self.editor
+        count = COMPACT_MIN_DEAD + 100
+        ed.pipes.append_many([100.0 * i for i in range(count)], [200.0] * count, [60] * count, [150.0] * count)
+        ed.set_selected_pipe(count - 1)
+        ed.set_selection(range(COMPACT_MIN_DEAD + 10))
+        ed.delete_selection()
+        self.assertEqual(len(ed.pipes.live), 90)
+        self.assertEqual(ed.pipes.x[0], 100.0 * (COMPACT_MIN_DEAD + 10))
+        self.assertEqual(ed.selected_pipe, 89)
+        self.assertEqual(len(ed.history.done), 1)
+
+        ed.undo()
+        self.assertEqual(len(ed.pipes), count)
+        self.assertEqual(ed.pipes.x[count - 1], 100.0 * (count - 1))
+        ed.redo()
+        self.assertEqual(len(ed.pipes.live), 90)
+        ed.undo()
+        # the sparse table is back, with the row numbers the remove was recorded against
+        ed.redo()
+        ed.undo()
+        self.assertEqual(len(ed.pipes), count)
+
+
+if __name__ == "__main__":
+    unittest.main()
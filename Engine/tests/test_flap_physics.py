@@ -0,0 +1,69 @@
+"""
+Vectorized bird physics against a frame-by-frame scalar replay of the engine's rules
+
+    python -m unittest discover -s tests
+"""
+import os
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from flap_physics import (BIRD_SIZE, BIRD_X, FRAME_DT, JUMP_POWER, PIPE_SPEED, column_arrays, hop_height,
+                          pipe_arrays, pipe_frames, step)
+
+
+class FlapPhysicsTest(unittest.TestCase):
+    def test_step_matches_a_scalar_replay(self):
+        flaps = np.random.default_rng(0).random((200, 8)) < 0.1
+        y = np.full(8, 200.0)
+        v = np.zeros(8)
+        for frame in flaps:
+            y, v = step(y, v, frame, 800.0)
+        for bird in range(8):
+            by, bv = 200.0, 0.0
+            for frame in flaps:
+                if frame[bird]:
+                    bv = JUMP_POWER
+                bv += 800.0 * FRAME_DT
+                by += int(bv * FRAME_DT)
+            self.assertEqual((y[bird], v[bird]), (by, bv))
+
+    def test_hop_height_is_elementwise(self):
+        powers = np.array([-300.0, -450.0, -200.0, 0.0])
+        gravities = np.array([800.0, 1200.0, 500.0, 800.0])
+        heights = hop_height(powers, gravities)
+        self.assertEqual(heights.tolist(), [hop_height(p, g) for p, g in zip(powers, gravities)])
+        self.assertEqual(hop_height(JUMP_POWER, 800.0), 42.0)
+        # truncating each frame's move keeps the hop under the continuous v^2 / 2g
+        self.assertTrue(np.all(heights[:3] < powers[:3] ** 2 / (2 * gravities[:3])))
+        self.assertEqual(heights[3], 0.0)
+        self.assertEqual(hop_height(JUMP_POWER, 0.0), 0.0)
+
+    def test_pipe_frames_match_the_scroll(self):
+        lefts = np.array([100.0, 273.0, 400.0, 1000.5])
+        first, last = pipe_frames(lefts, 60)
+        scroll = -PIPE_SPEED * FRAME_DT
+        for left, lo, hi in zip(lefts, first, last):
+            overlapping = [frame for frame in range(1, 400)
+                           if left - frame * scroll < BIRD_X + BIRD_SIZE and left - frame * scroll + 60 > BIRD_X]
+            self.assertEqual((lo, hi), (overlapping[0], overlapping[-1]))
+
+    def test_pipe_arrays(self):
+        pipes = [{'x': 500, 'gap_top': 200.7, 'width': 61, 'gap_height': 150},
+                 {'x': 300, 'gap_top': 100, 'width': 60, 'gap_height': 120}]
+        order, left, width, gap_top, gap_bottom = pipe_arrays(pipes)
+        self.assertEqual(order.tolist(), [1, 0])
+        self.assertEqual(left.tolist(), [270.0, 470.0])
+        self.assertEqual(width.tolist(), [60, 61])
+        self.assertEqual(gap_top.tolist(), [100.0, 200.0])
+        self.assertEqual(gap_bottom.tolist(), [220.0, 350.7])
+        columns = column_arrays([500, 300], [200.7, 100], [61, 60], [150, 120])
+        for a, b in zip(columns, (order, left, width, gap_top, gap_bottom)):
+            self.assertEqual(a.tolist(), b.tolist())
+
+
+if __name__ == "__main__":
+    unittest.main()
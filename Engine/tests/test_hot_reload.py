@@ -0,0 +1,123 @@
+"""
+Live reload wire format: DeltaBatch frames applied to a LevelMirror give back the editor's level
+
+    python -m unittest discover -s tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from hot_reload import FRAME, OP_PIPE, OP_PIPE_REMOVE, OPS, DeltaBatch, LevelMirror
+from level_table import PipeTable, PowerupTable
+
+
+def decode(frame):
+    """(sequence, edit time, ops) of one frame, checking the length field"""
+    length, sequence, edit_time = FRAME.unpack_from(frame)
+    payload = frame[FRAME.size:]
+    assert length == len(payload)
+    return sequence, edit_time, payload
+
+
+def op_codes(payload):
+    codes = []
+    offset = 0
+    while offset < len(payload):
+        codes.append(payload[offset])
+        offset += OPS[payload[offset]].size
+    return codes
+
+
+class WireFormatTest(unittest.TestCase):
+    def setUp(self):
+        self.pipes = PipeTable([{'x': 400.0 + i * 250, 'gap_top': 100 + i, 'width': 60, 'gap_height': 150}
+                                for i in range(5)])
+        self.powerups = PowerupTable([{'x': 500.0, 'y': 250.0, 'type': 'speed'},
+                                      {'x': 900.5, 'y': 120.0, 'type': 'shrink'}])
+        self.gravity = 900.0
+        self.bg = (1, 2, 3)
+        self.batch = DeltaBatch()
+        self.mirror = LevelMirror()
+
+    def state(self):
+        return ("Live", self.gravity, self.bg, self.pipes, self.powerups)
+
+    def send(self, frame):
+        _, _, payload = decode(frame)
+        self.mirror.apply(payload)
+        return payload
+
+    def assertMirrored(self):
+        self.assertEqual(self.mirror.pipes, {row: (pipe.x, pipe.gap_top, pipe.width, pipe.gap_height)
+                                             for row, pipe in self.pipes.items()})
+        self.assertEqual(self.mirror.powerups, {row: (self.powerups.x[row], self.powerups.y[row],
+                                                      self.powerups.code[row]) for row in self.powerups})
+        self.assertEqual(self.mirror.gravity, self.gravity)
+        self.assertEqual(self.mirror.bg, self.bg)
+
+    def test_snapshot_is_the_whole_level(self):
+        self.send(self.batch.snapshot(self.state()))
+        self.assertMirrored()
+        level = self.mirror.to_level()
+        self.assertEqual([pipe['x'] for pipe in level.pipes], [400.0, 650.0, 900.0, 1150.0, 1400.0])
+        self.assertEqual([powerup['type'] for powerup in level.powerups], ['speed', 'shrink'])
+
+    def test_deltas(self):
+        self.send(self.batch.snapshot(self.state()))
+        self.pipes.update(1, x=700.0, gap_top=90)
+        self.batch.pipe_changed(1)
+        self.pipes.delete(3)
+        self.batch.pipe_changed(3)
+        self.pipes.append(2000.0, 200, 80, 120)
+        self.batch.pipe_changed(5)
+        self.powerups.delete(0)
+        self.batch.powerup_changed(0)
+        self.gravity, self.bg = 1000.0, (9, 8, 7)
+        self.batch.settings_changed()
+        self.send(self.batch.encode(self.state()))
+        self.assertMirrored()
+
+    def test_rows_are_sent_once_per_frame(self):
+        for x in range(10):
+            self.pipes.update(2, x=float(x))
+            self.batch.pipe_changed(2)
+        payload = self.send(self.batch.encode(self.state()))
+        self.assertEqual(op_codes(payload), [OP_PIPE])
+        # an add and a remove in the same frame only sends the outcome
+        row = self.pipes.append(3000.0, 150, 60, 150)
+        self.batch.pipe_changed(row)
+        self.pipes.delete(row)
+        self.assertEqual(op_codes(decode(self.batch.encode(self.state()))[2]), [OP_PIPE_REMOVE])
+
+    def test_empty_batch_sends_nothing(self):
+        self.assertIsNone(self.batch.encode(self.state()))
+        self.assertEqual(self.batch.sequence, 0)
+
+    def test_sequence_and_edit_time(self):
+        self.batch.pipe_changed(0)
+        first_edit = self.batch.first_edit
+        self.batch.pipe_changed(1)
+        sequence, edit_time, _ = decode(self.batch.encode(self.state()))
+        self.assertEqual((sequence, edit_time), (1, first_edit))
+        self.batch.settings_changed()
+        self.assertEqual(decode(self.batch.encode(self.state()))[0], 2)
+
+    def test_snapshot_keeps_pending_marks(self):
+        self.batch.pipe_changed(4)
+        self.batch.snapshot(self.state())
+        self.assertEqual(self.batch.pipes, {4})
+        self.assertEqual(op_codes(decode(self.batch.encode(self.state()))[2]), [OP_PIPE])
+
+    def test_level_replaced_resets_the_client(self):
+        self.send(self.batch.snapshot(self.state()))
+        self.pipes = PipeTable([{'x': 10.0, 'gap_top': 50, 'width': 40, 'gap_height': 100}])
+        self.powerups = PowerupTable()
+        self.batch.level_replaced()
+        self.send(self.batch.encode(self.state()))
+        self.assertMirrored()
+
+
+if __name__ == "__main__":
+    unittest.main()
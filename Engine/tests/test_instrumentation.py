@@ -0,0 +1,149 @@
+"""
+Instrumentation: nothing recorded while off, operations, counters and frames recorded and exported while on
+
+    python -m unittest discover -s tests
+"""
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import instrumentation
+from instrumentation import FrameMonitor, SLOW_FRAME_MS, count, counters, span, stats, timed
+
+
+class Root:
+    """Keeps after() callbacks for the test to run by hand"""
+
+    def __init__(self):
+        self.pending = {}
+        self.next_id = 0
+
+    def after(self, ms, func):
+        self.next_id += 1
+        self.pending[self.next_id] = func
+        return self.next_id
+
+    def after_cancel(self, after_id):
+        self.pending.pop(after_id, None)
+
+    def run(self):
+        due, self.pending = self.pending, {}
+        for func in due.values():
+            func()
+
+
+class InstrumentationTest(unittest.TestCase):
+    def setUp(self):
+        instrumentation.reset()
+        self.addCleanup(instrumentation.reset)
+        self.addCleanup(instrumentation.disable)
+        # seconds, moved by hand
+        self.clock = [100.0]
+        patcher = mock.patch("instrumentation.time.perf_counter", side_effect=lambda: self.clock[0])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def work(self, ms):
+        self.clock[0] += ms / 1000
+
+    def test_disabled_records_nothing(self):
+        @timed("op")
+        def op():
+            self.work(5)
+            return 1
+
+        self.assertEqual(op(), 1)
+        with span("block") as block:
+            self.work(5)
+        count("items")
+        self.assertIs(block, instrumentation._NULL_SPAN)
+        self.assertEqual((stats(), counters(), len(instrumentation._events)), ({}, {}, 0))
+
+    def test_timed_span_and_count(self):
+        instrumentation.enable()
+
+        @timed("op")
+        def op(ms):
+            self.work(ms)
+
+        op(2)
+        op(6)
+        with span("block", items=3):
+            self.work(4)
+        count("items")
+        count("items", 4)
+        self.assertEqual(counters(), {"items": 5})
+        calls, total, worst = stats()["op"]
+        self.assertEqual(calls, 2)
+        self.assertAlmostEqual(total, 8)
+        self.assertAlmostEqual(worst, 6)
+        self.assertEqual(instrumentation._events[-1][5], {"items": 3})
+
+    def test_timed_records_a_raising_call(self):
+        instrumentation.enable()
+
+        @timed("op")
+        def op():
+            raise KeyError
+
+        with self.assertRaises(KeyError):
+            op()
+        self.assertEqual(stats()["op"][0], 1)
+
+    def test_frame_monitor(self):
+        instrumentation.enable()
+        root = Root()
+        reports = []
+        slow = []
+        monitor = FrameMonitor(root, report=reports.append, report_ms=100, log=slow.append)
+        monitor.start()
+        for ms in (16, 16, SLOW_FRAME_MS + 30, 16):
+            if ms > SLOW_FRAME_MS:
+                with span("redraw"):
+                    self.work(ms)
+            else:
+                self.work(ms)
+            root.run()
+        self.assertEqual(len(monitor.frames), 4)
+        self.assertEqual(monitor.slow, 1)
+        self.assertEqual(len(slow), 1)
+        self.assertTrue(slow[0].startswith(f"slow frame {SLOW_FRAME_MS + 30}ms: redraw"))
+        # 128ms in, one report so far
+        self.assertEqual(reports, [monitor])
+        self.assertTrue(monitor.summary().startswith("frame avg 32.0ms, worst 80ms"))
+        monitor.stop()
+        self.assertEqual(root.pending, {})
+
+    def test_chrome_trace(self):
+        instrumentation.enable()
+        with span("save", bytes=10):
+            self.work(2)
+        count("bytes serialized", 10)
+        root = Root()
+        monitor = FrameMonitor(root)
+        monitor.start()
+        self.work(20)
+        root.run()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "trace.json")
+            self.assertEqual(instrumentation.export_chrome_trace(path), 3)
+            with open(path) as f:
+                data = json.load(f)
+        phases = [event["ph"] for event in data["traceEvents"]]
+        self.assertEqual(phases, ["M", "X", "C"])
+        save = data["traceEvents"][1]
+        self.assertEqual((save["name"], save["dur"], save["args"]), ("save", 2000.0, {"bytes": 10}))
+        self.assertEqual(data["otherData"]["counters"], {"bytes serialized": 10})
+        summary = instrumentation.summarize(data)
+        self.assertIn("save", summary)
+        self.assertIn("1 frames", summary)
+        self.assertIn("bytes serialized: 10", summary)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+"""
+Reachability analyzer on sparse levels, and the flap-policy shortcut of passable_arrays
+
+    python -m unittest discover -s tests
+"""
+import os
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+try:
+    import numpy as np
+    from level_analyzer import IMPOSSIBLE, analyze_arrays, analyze_level, passable_arrays
+    from level_model import Level
+except ImportError:
+    analyze_level = None
+
+
+@unittest.skipIf(analyze_level is None, "needs numpy")
+class SparseLevelTest(unittest.TestCase):
+    def test_far_pipe_is_bounded(self):
+        # the empty stretch before the last pipe is ~625k frames, sized by it the arrays would need gigabytes
+        level = Level("Sparse")
+        level.add_pipe(400.0, 200, 60, 150)
+        level.add_pipe(650.0, 220, 60, 150)
+        level.add_pipe(2000000.0, 200, 60, 150)
+        start = time.perf_counter()
+        analysis = analyze_level(level)
+        self.assertLess(time.perf_counter() - start, 5.0)
+        self.assertEqual(analysis.counts()['impossible'], 0)
+
+    def test_far_pipe_out_of_reach_is_impossible(self):
+        # open sky is a superset of what a real run can reach, a gap the bird can't fit stays impossible
+        level = Level("Sparse Closed")
+        level.add_pipe(400.0, 200, 60, 150)
+        level.add_pipe(2000000.0, 300, 60, 10)
+        self.assertEqual(analyze_level(level).status.tolist(), [0, 2])
+
+
+@unittest.skipIf(analyze_level is None, "needs numpy")
+class PassableTest(unittest.TestCase):
+    def test_matches_the_full_analysis(self):
+        # overlapping, narrow, far and off-screen pipes at gravities the flap targets suit badly
+        rng = np.random.default_rng(0)
+        impossible = 0
+        for _ in range(150):
+            n = int(rng.integers(1, 30))
+            x = np.cumsum(rng.integers(5, 700, n)).astype(np.float64) + rng.integers(-300, 600)
+            if rng.random() < 0.2:
+                x[rng.integers(n):] += rng.integers(1000, 20000)
+            width = rng.integers(20, 200, n)
+            gap_height = rng.integers(10, 300, n)
+            top = rng.integers(-20, 620 - gap_height).astype(np.float64)
+            order = np.argsort(x - width // 2, kind='stable')
+            x, width, gap_height, top = x[order], width[order], gap_height[order], top[order]
+            starts = np.zeros(n, dtype=bool)
+            starts[0] = True
+            starts[rng.integers(n)] |= rng.random() < 0.3
+            gravity = float(rng.choice([200, 400, 800, 1500, 4000]))
+            pipes = (x - width // 2, width, top, top + gap_height, starts, gravity)
+            status, _ = analyze_arrays(*pipes)
+            self.assertEqual(passable_arrays(*pipes).tolist(), (status != IMPOSSIBLE).tolist())
+            impossible += int(np.count_nonzero(status == IMPOSSIBLE))
+        self.assertGreater(impossible, 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+"""
+Packed binary levels round trip to exactly the same engine JSON
+
+    python -m unittest discover -s tests
+"""
+import os
+import random
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from level_binary import (MAX_NAME_BYTES, BinaryLevelView, pack_level, read_level_binary,
+                          write_level_binary)
+from level_io import level_from_json, level_to_json
+from level_model import POWERUP_TYPES, Level
+
+
+def random_level(rng, pipes, powerups, name="Packed"):
+    level = Level(name, rng.uniform(400, 1200), (rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+    for _ in range(pipes):
+        level.add_pipe(rng.uniform(300, 50000), rng.randint(30, 350), rng.choice((40, 60, 61)), rng.randint(90, 200))
+    for _ in range(powerups):
+        level.add_powerup(rng.uniform(300, 50000), rng.uniform(50, 500), rng.choice(POWERUP_TYPES))
+    return level
+
+
+class BinaryRoundTripTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "level.fblv")
+        self.rng = random.Random(6)
+
+    def test_json_binary_json_is_lossless(self):
+        # odd and even counts on both sides, the byte column after the widths moves with the pipe count
+        for pipes, powerups in ((0, 0), (1, 0), (0, 1), (1, 3), (3, 2), (4, 5), (37, 11)):
+            with self.subTest(pipes=pipes, powerups=powerups):
+                data = level_to_json(random_level(self.rng, pipes, powerups))
+                write_level_binary(level_from_json(data), self.path)
+                self.assertEqual(level_to_json(read_level_binary(self.path)), data)
+
+    def test_columns(self):
+        level = random_level(self.rng, 3, 3)
+        with BinaryLevelView(pack_level(level)) as view:
+            self.assertEqual(list(view.pipe_x), [pipe['x'] for pipe in level.pipes])
+            self.assertEqual(list(view.pipe_width), [pipe['width'] for pipe in level.pipes])
+            self.assertEqual([POWERUP_TYPES[code] for code in view.powerup_type],
+                             [powerup['type'] for powerup in level.powerups])
+            np.testing.assert_array_equal(np.frombuffer(view.pipe_gap_top, dtype='<f8'),
+                                          [pipe['gap_top'] for pipe in level.pipes])
+
+    def test_names(self):
+        for name in ("", "Ünïcode level ✓", "x" * MAX_NAME_BYTES):
+            with self.subTest(length=len(name)):
+                write_level_binary(random_level(self.rng, 1, 1, name), self.path)
+                self.assertEqual(read_level_binary(self.path).name, name)
+
+    def test_name_too_long(self):
+        for name in ("x" * (MAX_NAME_BYTES + 1), "é" * 40000):
+            with self.assertRaises(ValueError):
+                pack_level(Level(name))
+
+    def test_bad_files(self):
+        data = pack_level(random_level(self.rng, 5, 2))
+        with self.assertRaises(ValueError):
+            BinaryLevelView(b'JSON' + data[4:])
+        with self.assertRaises(ValueError):
+            BinaryLevelView(data[:-3])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+"""
+Broadphase section: built from gameObjects, checked by verify() and queried like the engine would
+
+    python -m unittest discover -s tests
+"""
+import copy
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from level_broadphase import TAG_CODES, build_broadphase, collider_spans, query, verify
+from level_io import game_object, level_to_json
+from level_model import POWERUP_TYPES, Level
+
+
+def random_level(rng, pipes=60, powerups=15):
+    level = Level("Broadphase")
+    for _ in range(pipes):
+        level.add_pipe(rng.uniform(300, 15000), rng.randint(30, 350), rng.choice((40, 60, 120)), 150)
+    for _ in range(powerups):
+        level.add_powerup(rng.uniform(300, 15000), rng.uniform(50, 500), rng.choice(POWERUP_TYPES))
+    return level
+
+
+class BroadphaseTest(unittest.TestCase):
+    def setUp(self):
+        self.rng = random.Random(16)
+        self.data = level_to_json(random_level(self.rng), broadphase=True)
+
+    def test_built_section_verifies(self):
+        self.assertEqual(verify(self.data), [])
+        self.assertEqual(verify(level_to_json(random_level(self.rng), broadphase=True, prefabs=True)), [])
+
+    def test_sorted_by_left_edge(self):
+        section = self.data["broadphase"]
+        self.assertEqual(section["left"], sorted(section["left"]))
+        # every collider, the ground included, is listed once
+        self.assertEqual(sorted(section["object"]), list(range(len(self.data["gameObjects"]))))
+
+    def test_query_matches_a_full_scan(self):
+        section = self.data["broadphase"]
+        spans = collider_spans(self.data["gameObjects"])
+        for _ in range(300):
+            lo = self.rng.uniform(-100, 15500)
+            hi = lo + self.rng.choice((0, 30, 400))
+            brute = sorted(i for left, right, _, i in spans if left <= hi and right >= lo)
+            self.assertEqual(sorted(query(section, lo, hi)), brute)
+
+    def test_unknown_tags_get_codes_after_the_fixed_ones(self):
+        objects = self.data["gameObjects"] + [game_object("Cloud", 50.0, 20.0, 30, 30, (255, 255, 255), "cloud")]
+        section = build_broadphase(objects)
+        self.assertEqual(section["tags"], list(TAG_CODES) + ["cloud"])
+        self.assertIn(len(TAG_CODES), section["tag"])
+
+    def test_verify_finds_problems(self):
+        def broken(change):
+            data = copy.deepcopy(self.data)
+            change(data["broadphase"])
+            return verify(data)
+
+        self.assertEqual(verify({"gameObjects": []}), ["no broadphase section"])
+        self.assertIn("spans are not sorted by left edge", broken(lambda s: s["left"].reverse()))
+        self.assertTrue(broken(lambda s: s.update(maxWidth=1))[0].startswith("maxWidth 1"))
+        self.assertEqual(broken(lambda s: s["right"].pop()), ["broadphase columns have different lengths"])
+        missing = broken(lambda s: [s[column].pop() for column in ("left", "right", "tag", "object")])
+        self.assertTrue(missing[0].endswith("has a collider but no span"))
+        moved = broken(lambda s: s["right"].__setitem__(3, s["right"][3] + 5))
+        self.assertIn("index has", moved[0])
+
+    def test_stale_section_after_an_edit(self):
+        self.data["gameObjects"][1]["components"][0]["x"] += 10
+        self.assertNotEqual(verify(self.data), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+"""
+Batch compiler: spec files in, the same level JSON the editor saves out, serial or pooled
+
+    python -m unittest discover -s tests
+"""
+import json
+import os
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from io import StringIO
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from level_compiler import compile_specs, main, read_specs, synthetic_specs
+from level_io import level_to_json, load_level_file
+from level_model import Level
+
+SPEC = {"name": "Spec Level", "gravity": 900, "bg": [1, 2, 3],
+        "pipes": [[500, 150, 60.0, 180], [800, 250, 50, 150]], "powerups": [[650, 200, "speed"]]}
+
+
+def read(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+class CompilerTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+        self.out = os.path.join(self.dir, "out")
+
+    def write(self, name, text):
+        path = os.path.join(self.dir, name)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def test_read_specs(self):
+        other = dict(SPEC, name="Other")
+        self.assertEqual(read_specs(self.write("one.json", json.dumps(SPEC))), [SPEC])
+        self.assertEqual(read_specs(self.write("list.json", json.dumps([SPEC, other]))), [SPEC, other])
+        lines = json.dumps(SPEC) + "\n\n" + json.dumps(other) + "\n"
+        self.assertEqual(read_specs(self.write("lines.jsonl", lines)), [SPEC, other])
+
+    def test_output_matches_the_editor_save(self):
+        [(path, size)] = compile_specs([SPEC], self.out)
+        self.assertEqual(path, os.path.join(self.out, "Spec_Level.json"))
+        self.assertEqual(os.path.getsize(path), size)
+        self.assertEqual(read(path), level_to_json(Level.from_spec(SPEC)))
+        level = load_level_file(path)
+        self.assertEqual(level.gravity, 900.0)
+        self.assertIsInstance(level.pipes[0]['width'], int)
+
+    def test_pool_matches_serial(self):
+        specs = synthetic_specs(6, pipes_per_level=10)
+        serial = compile_specs(specs, os.path.join(self.dir, "serial"), workers=1)
+        pooled = compile_specs(specs, self.out, workers=2)
+        self.assertEqual([os.path.basename(path) for path, _ in pooled],
+                         [os.path.basename(path) for path, _ in serial])
+        for (a, _), (b, _) in zip(serial, pooled):
+            self.assertEqual(read(a), read(b))
+
+    def test_clashing_names_are_rejected(self):
+        specs = [SPEC, {"name": "Other"}, dict(SPEC, name="Spec_Level")]
+        with self.assertRaisesRegex(ValueError, "Spec_Level.json from specs 0, 2"):
+            compile_specs(specs, self.out)
+        self.assertFalse(os.path.exists(self.out))
+
+    def test_main(self):
+        path = self.write("specs.jsonl", json.dumps(SPEC) + "\n")
+        with redirect_stdout(StringIO()) as out:
+            self.assertEqual(main([path, "-o", self.out, "-j", "1"]), 0)
+        self.assertIn("Compiled 1 levels", out.getvalue())
+        self.assertEqual(os.listdir(self.out), ["Spec_Level.json"])
+        with redirect_stderr(StringIO()), self.assertRaises(SystemExit):
+            main([path, path, "-o", self.out])
+
+
+if __name__ == "__main__":
+    unittest.main()
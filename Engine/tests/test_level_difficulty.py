@@ -0,0 +1,83 @@
+"""
+Difficulty scores: shipped levels keep their labels and an almost empty level can't outrank them
+
+    python -m unittest discover -s tests
+"""
+import os
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from flap_physics import FRAME_DT, JUMP_POWER
+from level_difficulty import estimate_level, hop_offset, simulate
+from level_io import load_level_file
+from level_model import Level
+
+LEVELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "levels")
+
+
+def shipped(name):
+    return load_level_file(os.path.join(LEVELS_DIR, name + ".json"))
+
+
+def one_pipe(gap_top, gap_height):
+    level = Level("One Pipe")
+    level.add_pipe(549.0, gap_top, 60, gap_height)
+    return level
+
+
+class DifficultyTest(unittest.TestCase):
+    def test_shipped_labels(self):
+        for name in ("level1_easy", "level2_medium", "level3_hard"):
+            with self.subTest(name=name):
+                self.assertEqual(estimate_level(shipped(name)).label, name.split("_")[1])
+
+    def test_one_pipe_level_is_not_the_hardest(self):
+        hard = estimate_level(shipped("level3_hard")).score
+        for gap_top, gap_height in ((94, 150), (125, 200), (300, 150)):
+            with self.subTest(gap_top=gap_top, gap_height=gap_height):
+                self.assertLess(estimate_level(one_pipe(gap_top, gap_height)).score, hard)
+
+    def test_narrower_gap_is_harder(self):
+        self.assertLess(estimate_level(one_pipe(125, 200)).score, estimate_level(one_pipe(150, 120)).score)
+
+    def test_empty_level(self):
+        estimate = estimate_level(Level("Empty"))
+        self.assertEqual((estimate.score, estimate.label, estimate.completion), (0.0, 'easy', 1.0))
+
+    def test_same_level_same_score(self):
+        level = shipped("level2_medium")
+        self.assertEqual(estimate_level(level).to_dict(), estimate_level(level).to_dict())
+        self.assertNotEqual(estimate_level(level, seed=1).survival.tolist(), estimate_level(level).survival.tolist())
+
+    def test_survival_curve(self):
+        estimate = estimate_level(shipped("level1_easy"), runs=500)
+        self.assertEqual(len(estimate.survival), 6)
+        self.assertEqual(estimate.survival[0], 1.0)
+        self.assertTrue(np.all(np.diff(estimate.survival) <= 0))
+        self.assertAlmostEqual(estimate.score, (1 - estimate.survival[-1]) * 100)
+
+    def test_hop_offset_is_half_a_hop(self):
+        # a flap stepped like the engine peaks twice the offset above where it started
+        gravity = 800.0
+        y, v, apex = 0.0, JUMP_POWER, 0.0
+        while v < 0:
+            v += gravity * FRAME_DT
+            y += int(v * FRAME_DT)
+            apex = min(apex, y)
+        self.assertEqual(-apex, 2 * hop_offset(JUMP_POWER, gravity))
+
+    def test_simulate_counts_cleared_pipes(self):
+        level = shipped("level3_hard")
+        outcome = simulate(level.pipes, level.gravity, 300, np.random.default_rng(0))
+        self.assertEqual(outcome.shape, (300,))
+        self.assertTrue(np.all((outcome >= 0) & (outcome <= len(level.pipes))))
+        # no pipes, nothing to die on before the level ends
+        self.assertEqual(simulate([], 800.0, 10).tolist(), [0] * 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
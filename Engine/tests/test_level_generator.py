@@ -0,0 +1,40 @@
+"""
+Generated levels: degenerate bounds and the reachability filter
+
+    python -m unittest discover -s tests
+"""
+import os
+import sys
+import unittest
+from itertools import islice
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+try:
+    from level_generator import LevelGenerator, GeneratorBounds
+    from level_analyzer import analyze_level
+except ImportError:
+    LevelGenerator = None
+
+
+@unittest.skipIf(LevelGenerator is None, "needs numpy")
+class LevelGeneratorTest(unittest.TestCase):
+    def test_single_pipe_levels(self):
+        levels = list(islice(LevelGenerator(0, GeneratorBounds(pipes=(1, 3)), batch=64), 64))
+        self.assertTrue(any(len(level.pipes) == 1 for level in levels))
+        for level in levels:
+            if len(level.pipes) == 1:
+                self.assertEqual(level.powerups, [])
+
+    def test_impossible_levels_are_filtered_out(self):
+        # narrow gaps that jump far between closely spaced pipes, most draws can't be flown
+        bounds = GeneratorBounds(pipes=(5, 10), spacing=(90, 110), gap_height=(85, 100), gap_step=450)
+        generator = LevelGenerator(0, bounds, batch=64)
+        levels = list(islice(generator, 10))
+        self.assertGreater(generator.rejected, 0)
+        for level in levels:
+            self.assertEqual(analyze_level(level).counts()['impossible'], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
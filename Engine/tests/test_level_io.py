@@ -0,0 +1,101 @@
+"""
+level_io's prefab form and level file helpers
+
+    python -m unittest discover -s tests
+"""
+import copy
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from level_io import (LEVEL_EXTENSIONS, PREFABS, compact_objects, expand_level, expand_objects, level_files,
+                      level_from_json, level_to_json)
+from level_model import Level
+
+
+def sample_level():
+    level = Level("Round Trip", 900.0, (10, 20, 30))
+    level.add_pipe(700.0, 220, 60, 150)
+    level.add_pipe(400.0, 200, 80, 120)
+    level.add_pipe(1000.0, 100, 61, 200)
+    level.add_powerup(550.0, 250, 'speed')
+    level.add_powerup(850.0, 300, 'shrink')
+    return level
+
+
+def sprite(obj):
+    return next(comp for comp in obj["components"] if comp["type"] == "Sprite")
+
+
+class PrefabRoundTripTest(unittest.TestCase):
+    def test_prefab_form_expands_to_plain_form(self):
+        level = sample_level()
+        self.assertEqual(expand_level(level_to_json(level, prefabs=True)), level_to_json(level))
+
+    def test_compact_then_expand_is_lossless(self):
+        objects = level_to_json(sample_level())["gameObjects"]
+        compacted = compact_objects(objects)
+        # the ground stays a plain object, every pipe pair and power-up becomes one instance
+        self.assertEqual(len(compacted), 1 + 3 + 2)
+        self.assertNotIn("index", compacted[1])
+        self.assertEqual(expand_objects(PREFABS, compacted), objects)
+
+    def test_overrides_and_skipped_numbers(self):
+        objects = level_to_json(sample_level())["gameObjects"]
+        sprite(objects[1])["r"] = sprite(objects[2])["r"] = 200
+        # drop Pipe1 so Pipe2 needs an index
+        del objects[3:5]
+        compacted = compact_objects(objects)
+        self.assertEqual(compacted[1].get("r"), 200)
+        self.assertEqual(compacted[2]["index"], 2)
+        self.assertEqual(expand_objects(PREFABS, compacted), objects)
+
+    def test_unmatched_objects_are_kept(self):
+        objects = level_to_json(sample_level())["gameObjects"]
+        # a top half whose bottom half no longer lines up
+        sprite(objects[2])["width"] = 10
+        compacted = compact_objects(copy.deepcopy(objects))
+        self.assertEqual(compacted[1:3], objects[1:3])
+        self.assertEqual(expand_objects(PREFABS, compacted), objects)
+
+    def test_level_from_prefab_form(self):
+        level = sample_level()
+        loaded = level_from_json(level_to_json(level, prefabs=True))
+        self.assertEqual(sorted(loaded.to_spec()["pipes"]), sorted(level.to_spec()["pipes"]))
+        self.assertEqual(sorted(loaded.to_spec()["powerups"]), sorted(level.to_spec()["powerups"]))
+
+    def test_unknown_prefab(self):
+        with self.assertRaises(ValueError):
+            expand_objects(PREFABS, [{"prefab": "cloud", "x": 1.0}])
+
+
+class LevelFilesTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+        for name in ("b.json", "a.json", "c.fblv", "notes.txt", os.path.join("autosave", "x.json")):
+            path = os.path.join(self.dir, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            open(path, "w").close()
+        os.mkdir(os.path.join(self.dir, "folder.json"))
+
+    def names(self, paths):
+        return [os.path.relpath(path, self.dir) for path in paths]
+
+    def test_directory_is_not_walked(self):
+        self.assertEqual(self.names(level_files([self.dir])), ["a.json", "b.json"])
+
+    def test_extensions(self):
+        self.assertEqual(self.names(level_files([self.dir], LEVEL_EXTENSIONS)), ["a.json", "b.json", "c.fblv"])
+
+    def test_named_files_kept_in_order(self):
+        named = [os.path.join(self.dir, "notes.txt"), os.path.join(self.dir, "autosave", "x.json")]
+        self.assertEqual(level_files(named + [self.dir]), named + level_files([self.dir]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+"""
+Level linter rules and its result cache
+
+    python -m unittest discover -s tests
+"""
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from level_io import level_to_json
+from level_lint import ERROR, WARNING, LINT_VERSION, lint_data, lint_files, load_cache, save_cache
+from level_model import Level
+
+
+def sample_level():
+    level = Level("Lint")
+    level.add_pipe(400.0, 200, 60, 150)
+    level.add_pipe(700.0, 220, 60, 150)
+    level.add_powerup(550.0, 250, 'speed')
+    return level
+
+
+def codes(issues, severity=ERROR):
+    return [found['code'] for found in issues if found['severity'] == severity]
+
+
+class PrefabTest(unittest.TestCase):
+    def test_expanded_level_is_clean(self):
+        data = level_to_json(sample_level())
+        self.assertEqual(codes(lint_data(data)), [])
+
+    def test_prefab_form_is_an_error(self):
+        data = level_to_json(sample_level(), prefabs=True)
+        issues = lint_data(data)
+        self.assertEqual(codes(issues), ['prefab'])
+        self.assertIn("level_prefab.py expand", issues[0]['message'])
+
+
+
+def objects_named(data, name):
+    return next(obj for obj in data['gameObjects'] if obj['name'] == name)
+
+
+def component(obj, kind):
+    return next(comp for comp in obj['components'] if comp['type'] == kind)
+
+
+class RulesTest(unittest.TestCase):
+    def setUp(self):
+        self.data = level_to_json(sample_level())
+
+    def test_field_types_and_ranges(self):
+        self.data['gravity'] = 800
+        component(objects_named(self.data, 'Pipe0_Top'), 'Sprite')['r'] = 300
+        component(objects_named(self.data, 'Pipe1_Top'), 'Collider')['isTrigger'] = 1
+        self.assertEqual(sorted(codes(lint_data(self.data))), ['range', 'type', 'type'])
+
+    def test_missing_component(self):
+        pipe = objects_named(self.data, 'Pipe0_Bottom')
+        pipe['components'] = [comp for comp in pipe['components'] if comp['type'] != 'Collider']
+        self.assertEqual(codes(lint_data(self.data)), ['component'])
+
+    def test_unpaired_and_overlapping_halves(self):
+        self.data['gameObjects'].remove(objects_named(self.data, 'Pipe1_Bottom'))
+        component(objects_named(self.data, 'Pipe0_Bottom'), 'Transform')['y'] = 100.0
+        self.assertEqual(sorted(codes(lint_data(self.data))), ['gap', 'pipe-pair'])
+
+    def test_duplicate_names_and_unknown_powerup_tag(self):
+        self.data['gameObjects'].append(dict(objects_named(self.data, 'Ground')))
+        component(objects_named(self.data, 'PowerUp_speed_0'), 'Collider')['tag'] = 'powerup_score'
+        self.assertEqual(sorted(codes(lint_data(self.data))), ['duplicate-name', 'powerup-tag'])
+
+    def test_warnings(self):
+        level = sample_level()
+        # overlapping pipes and a power-up inside a pipe wall
+        level.add_pipe(420.0, 200, 60, 150)
+        level.add_powerup(700.0, 100, 'shrink')
+        issues = lint_data(level_to_json(level))
+        self.assertEqual(codes(issues), [])
+        self.assertEqual(sorted(codes(issues, WARNING)), ['overlap', 'overlap'])
+
+    def test_not_a_level(self):
+        self.assertEqual(codes(lint_data([])), ['schema'])
+        self.assertEqual(codes(lint_data({'type': 'Level', 'gameObjects': {}})), ['schema'])
+
+
+class CacheTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+        self.clean = self.write('clean.json', level_to_json(sample_level()))
+        self.broken = os.path.join(self.dir, 'broken.json')
+        with open(self.broken, 'w') as f:
+            f.write('{"type": "Level", ')
+
+    def write(self, name, data):
+        path = os.path.join(self.dir, name)
+        with open(path, 'w') as f:
+            json.dump(data, f)
+        return path
+
+    def test_results_are_cached_by_content(self):
+        cache = {}
+        first = lint_files([self.clean, self.broken], workers=1, cache=cache)
+        self.assertEqual([result['cached'] for result in first.values()], [False, False])
+        self.assertEqual(codes(first[self.broken]['issues']), ['json'])
+        # a copy under another name has the same content, so it is never parsed
+        copy = self.write('copy.json', level_to_json(sample_level()))
+        second = lint_files([self.clean, copy, self.broken], workers=1, cache=cache)
+        self.assertTrue(all(result['cached'] for result in second.values()))
+        self.assertEqual(second[copy]['issues'], [])
+
+    def test_changed_file_is_linted_again(self):
+        cache = {}
+        lint_files([self.clean], workers=1, cache=cache)
+        self.write('clean.json', level_to_json(sample_level(), prefabs=True))
+        result = lint_files([self.clean], workers=1, cache=cache)[self.clean]
+        self.assertFalse(result['cached'])
+        self.assertEqual(codes(result['issues']), ['prefab'])
+
+    def test_cache_file(self):
+        cache_path = os.path.join(self.dir, 'cache.json')
+        self.assertEqual(load_cache(cache_path), {})
+        cache = {}
+        lint_files([self.clean], workers=1, cache=cache)
+        save_cache(cache_path, cache)
+        self.assertEqual(load_cache(cache_path), cache)
+        # results from older rules are thrown away
+        with open(cache_path, 'w') as f:
+            json.dump({'version': LINT_VERSION - 1, 'files': cache}, f)
+        self.assertEqual(load_cache(cache_path), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
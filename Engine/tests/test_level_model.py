@@ -0,0 +1,49 @@
+"""
+Tk-free level model: gap clamping and the compact spec round trip
+
+    python -m unittest discover -s tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from level_model import (DEFAULT_BG, DEFAULT_GRAVITY, GAP_TOP_MARGIN, GROUND_HEIGHT, LEVEL_HEIGHT, POWERUP_CODES,
+                         POWERUP_TAGS, POWERUP_TYPES, TAG_TO_POWERUP, Level, clamp_gap_top)
+
+
+class LevelModelTest(unittest.TestCase):
+    def test_clamp_gap_top(self):
+        floor = LEVEL_HEIGHT - GROUND_HEIGHT
+        self.assertEqual(clamp_gap_top(5, 150), GAP_TOP_MARGIN)
+        self.assertEqual(clamp_gap_top(200, 150), 200)
+        self.assertEqual(clamp_gap_top(500, 150), floor - 150)
+        self.assertEqual(clamp_gap_top(floor - 150, 150), floor - 150)
+        self.assertEqual(clamp_gap_top(500, 150, height=1000), 500)
+
+    def test_spec_round_trip(self):
+        spec = {"name": "Spec Level", "gravity": 900.0, "bg": [1, 2, 3],
+                "pipes": [[500, 150, 60, 180], [800.5, 250, 50, 150]], "powerups": [[650, 200, "shrink"]]}
+        level = Level.from_spec(spec)
+        self.assertEqual(level.to_spec(), spec)
+        self.assertEqual(level.file_name(), "Spec_Level.json")
+        self.assertEqual(level.pipes[1], {'x': 800.5, 'gap_top': 250, 'width': 50, 'gap_height': 150})
+
+    def test_spec_types_and_defaults(self):
+        level = Level.from_spec({"gravity": 900, "pipes": [[500, 150, 60.0, 180]]})
+        self.assertIsInstance(level.gravity, float)
+        self.assertIsInstance(level.pipes[0]['width'], int)
+        empty = Level.from_spec({})
+        self.assertEqual((empty.name, empty.gravity, (empty.bg_r, empty.bg_g, empty.bg_b)),
+                         ("My Level", DEFAULT_GRAVITY, DEFAULT_BG))
+        self.assertEqual((empty.pipes, empty.powerups), ([], []))
+
+    def test_powerup_lookups_agree(self):
+        for code, ptype in enumerate(POWERUP_TYPES):
+            self.assertEqual(POWERUP_CODES[ptype], code)
+            self.assertEqual(TAG_TO_POWERUP[POWERUP_TAGS[ptype]], ptype)
+
+
+if __name__ == "__main__":
+    unittest.main()
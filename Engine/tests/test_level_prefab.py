@@ -0,0 +1,80 @@
+"""
+Prefab converter: compact and expand are lossless on real level files
+
+    python -m unittest discover -s tests
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import level_prefab
+from level_io import level_to_json
+from level_model import Level
+
+LEVELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "levels")
+
+
+def read(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+class PrefabConverterTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+        self.levels = os.path.join(self.dir, "levels")
+        shutil.copytree(LEVELS_DIR, self.levels, ignore=shutil.ignore_patterns("autosave", "prefabs"))
+
+    def run_main(self, *argv):
+        with redirect_stdout(StringIO()) as out:
+            self.assertEqual(level_prefab.main(list(argv)), 0)
+        return out.getvalue()
+
+    def test_compact_level(self):
+        level = Level("Compact")
+        level.add_pipe(400.0, 200, 60, 150)
+        level.add_powerup(550.0, 250, 'speed')
+        data = level_to_json(level)
+        compact = level_prefab.compact_level(data)
+        keys = list(compact)
+        self.assertEqual(keys.index("prefabs") + 1, keys.index("gameObjects"))
+        self.assertEqual(compact, level_to_json(level, prefabs=True))
+        self.assertIs(level_prefab.compact_level(compact), compact)
+
+    def test_round_trip_of_the_shipped_levels(self):
+        compact = os.path.join(self.dir, "compact")
+        expanded = os.path.join(self.dir, "expanded")
+        self.run_main("compact", self.levels, "-o", compact)
+        self.run_main("expand", compact, "-o", expanded)
+        names = sorted(os.listdir(self.levels))
+        self.assertEqual(sorted(os.listdir(expanded)), names)
+        for name in names:
+            with self.subTest(name=name):
+                self.assertIn("prefabs", read(os.path.join(compact, name)))
+                self.assertEqual(read(os.path.join(expanded, name)), read(os.path.join(self.levels, name)))
+
+    def test_in_place(self):
+        path = os.path.join(self.levels, "level1_easy.json")
+        original = read(path)
+        self.run_main("compact", path)
+        self.assertLess(os.path.getsize(path), len(json.dumps(original, indent=2)))
+        self.run_main("expand", path)
+        self.assertEqual(read(path), original)
+
+    def test_report(self):
+        out = self.run_main("report", self.levels)
+        self.assertIn("level1_easy.json", out)
+        self.assertIn("total", out)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+"""
+The streaming loader has to give the same level as json.load plus level_from_json
+
+    python -m unittest discover -s tests
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from level_io import level_from_json, level_to_json
+from level_model import POWERUP_TYPES, Level
+from level_stream import LevelStream, load_level_stream
+
+
+def random_level(rng, pipes=40, powerups=10):
+    level = Level("Strëam \"test\"", 850.0, (1, 2, 3))
+    for _ in range(pipes):
+        level.add_pipe(rng.uniform(300, 20000), rng.randint(30, 350), rng.choice((40, 60, 61)), rng.randint(90, 200))
+    for _ in range(powerups):
+        level.add_powerup(rng.uniform(300, 20000), rng.uniform(50, 500), rng.choice(POWERUP_TYPES))
+    return level
+
+
+class StreamParityTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+        self.rng = random.Random(5)
+
+    def write(self, data, indent=2):
+        path = os.path.join(self.dir, "level.json")
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=indent)
+        return path
+
+    def assertParity(self, path):
+        with open(path) as f:
+            expected = level_from_json(json.load(f))
+        streamed = load_level_stream(path)
+        self.assertEqual(streamed.name, expected.name)
+        self.assertEqual(streamed.gravity, expected.gravity)
+        self.assertEqual((streamed.bg_r, streamed.bg_g, streamed.bg_b), (expected.bg_r, expected.bg_g, expected.bg_b))
+        self.assertEqual(streamed.pipes, expected.pipes)
+        self.assertEqual(streamed.powerups, expected.powerups)
+
+    def test_plain_and_compact_json(self):
+        for indent in (2, None):
+            for _ in range(5):
+                self.assertParity(self.write(level_to_json(random_level(self.rng)), indent))
+
+    def test_prefab_form(self):
+        self.assertParity(self.write(level_to_json(random_level(self.rng), prefabs=True)))
+
+    def test_pipe_halves_out_of_order(self):
+        data = level_to_json(random_level(self.rng))
+        objects = data["gameObjects"]
+        self.rng.shuffle(objects)
+        self.assertParity(self.write(data))
+
+    def test_empty_level(self):
+        self.assertParity(self.write(level_to_json(Level("Empty"))))
+        self.assertParity(self.write({}))
+
+    def test_chunk_boundaries(self):
+        # tiny chunks cut strings, escapes and numbers at every possible place
+        path = self.write(level_to_json(random_level(self.rng, pipes=5, powerups=3)), None)
+        whole = list(LevelStream(path))
+        for chunk_size in (1, 2, 3, 7, 64):
+            stream = LevelStream(path, chunk_size=chunk_size)
+            self.assertEqual(list(stream), whole)
+            self.assertEqual(stream.header["name"], "Strëam \"test\"")
+
+    def test_prefab_table_after_objects(self):
+        data = level_to_json(random_level(self.rng, pipes=2, powerups=0), prefabs=True)
+        data["prefabs"] = data.pop("prefabs")
+        with self.assertRaises(ValueError):
+            load_level_stream(self.write(data))
+
+
+if __name__ == "__main__":
+    unittest.main()
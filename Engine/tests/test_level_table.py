@@ -0,0 +1,54 @@
+"""
+PipeTable row bookkeeping
+
+    python -m unittest discover -s tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from level_table import PipeTable, PowerupTable, COMPACT_MIN_DEAD
+
+
+class CompactionTest(unittest.TestCase):
+    def pipes(self, count):
+        return PipeTable([{'x': 10.0 * i, 'gap_top': 100.0, 'width': 40 + i % 3, 'gap_height': 150.0}
+                          for i in range(count)])
+
+    def test_needs_compaction(self):
+        table = self.pipes(3 * COMPACT_MIN_DEAD)
+        table.delete_many(range(COMPACT_MIN_DEAD))
+        # dead rows under half the table
+        self.assertFalse(table.needs_compaction())
+        table.delete_many(range(COMPACT_MIN_DEAD, 2 * COMPACT_MIN_DEAD + 1))
+        self.assertTrue(table.needs_compaction())
+        small = self.pipes(10)
+        small.delete_many(range(9))
+        self.assertFalse(small.needs_compaction())
+
+    def test_compacted(self):
+        table = self.pipes(200)
+        doomed = range(0, 200, 3)
+        table.delete_many(doomed)
+        compact, rows = table.compacted()
+        self.assertEqual(len(compact.live), len(table))
+        self.assertEqual(compact.to_dicts(), table.to_dicts())
+        self.assertEqual(sorted(rows), list(table))
+        for row, new in rows.items():
+            self.assertEqual(compact[new].to_dict(), table[row].to_dict())
+        self.assertEqual(list(compact.range(500, 900)), sorted(rows[row] for row in table.range(500, 900)))
+        self.assertEqual(compact.index.max_extent, table.index.max_extent)
+
+    def test_compacted_powerups(self):
+        table = PowerupTable([{'x': 5.0 * i, 'y': 50.0, 'type': 'speed'} for i in range(10)])
+        table.delete(4)
+        compact, rows = table.compacted()
+        self.assertEqual(compact.to_dicts(), table.to_dicts())
+        self.assertEqual(rows[5], 4)
+        self.assertEqual(list(compact.near(25.0)), [rows[row] for row in table.near(25.0)])
+
+
+if __name__ == "__main__":
+    unittest.main()
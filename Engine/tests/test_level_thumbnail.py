@@ -0,0 +1,122 @@
+"""
+Thumbnail rasterizer and its on-disk cache
+
+    python -m unittest discover -s tests
+"""
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from level_binary import write_level_binary
+from level_io import GROUND_COLOR, PIPE_COLOR, save_level_file
+from level_model import GROUND_HEIGHT, LEVEL_HEIGHT, LEVEL_WIDTH, Level
+from level_thumbnail import POWERUP_RGB, ThumbnailCache, level_span, render_level, to_ppm
+
+BG = (10, 20, 30)
+# one image pixel per level pixel
+FULL = (LEVEL_WIDTH, LEVEL_HEIGHT)
+
+
+def sample_level(gap_top=200):
+    level = Level("Thumb", bg=BG)
+    level.add_pipe(300.0, gap_top, 60, 150)
+    level.add_powerup(600.0, 100.0, 'shrink')
+    return level
+
+
+class RenderTest(unittest.TestCase):
+    def pixel(self, image, x, y):
+        return tuple(int(c) for c in image[y, x])
+
+    def test_full_size_render(self):
+        image = render_level(sample_level(), FULL, span=LEVEL_WIDTH)
+        self.assertEqual(image.shape, (LEVEL_HEIGHT, LEVEL_WIDTH, 3))
+        self.assertEqual(self.pixel(image, 100, 100), BG)
+        self.assertEqual(self.pixel(image, 100, LEVEL_HEIGHT - GROUND_HEIGHT // 2), GROUND_COLOR)
+        # the pipe spans x 270..330, its gap y 200..350
+        self.assertEqual(self.pixel(image, 300, 100), PIPE_COLOR)
+        self.assertEqual(self.pixel(image, 300, 275), BG)
+        self.assertEqual(self.pixel(image, 300, 400), PIPE_COLOR)
+        self.assertEqual(self.pixel(image, 340, 100), BG)
+        self.assertEqual(self.pixel(image, 600, 100), tuple(POWERUP_RGB[2]))
+
+    def test_shared_columns_keep_only_the_common_gap(self):
+        level = Level("Overlap", bg=BG)
+        level.add_pipe(300.0, 100, 60, 200)
+        level.add_pipe(310.0, 200, 60, 200)
+        image = render_level(level, FULL, span=LEVEL_WIDTH)
+        self.assertEqual(self.pixel(image, 305, 150), PIPE_COLOR)
+        self.assertEqual(self.pixel(image, 305, 250), BG)
+        self.assertEqual(self.pixel(image, 305, 350), PIPE_COLOR)
+
+    def test_span_covers_the_whole_level(self):
+        level = sample_level()
+        self.assertEqual(level_span([], [], []), LEVEL_WIDTH)
+        level.add_pipe(5000.0, 200, 60, 150)
+        image = render_level(level, (100, 20))
+        self.assertEqual(image.shape, (20, 100, 3))
+        # the far pipe still gets a column, at the right edge less the trailing space
+        self.assertEqual(self.pixel(image, 95, 2), PIPE_COLOR)
+
+    def test_ppm(self):
+        image = render_level(sample_level(), (8, 4))
+        ppm = to_ppm(image)
+        self.assertTrue(ppm.startswith(b"P6\n8 4\n255\n"))
+        self.assertEqual(len(ppm), len(b"P6\n8 4\n255\n") + 8 * 4 * 3)
+
+
+class CacheTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+        self.cache = ThumbnailCache(os.path.join(self.dir, "cache"), max_entries=2)
+
+    def level_file(self, name, gap_top=200):
+        path = os.path.join(self.dir, name)
+        save_level_file(sample_level(gap_top), path)
+        return path
+
+    def test_hit_after_miss(self):
+        path = self.level_file("a.json")
+        first = self.cache.get(path)
+        self.assertEqual(self.cache.get(path), first)
+        self.assertEqual((self.cache.misses, self.cache.hits), (1, 1))
+        self.assertEqual(first, to_ppm(render_level(sample_level(), self.cache.size)))
+
+    def test_changed_file_is_rendered_again(self):
+        path = self.level_file("a.json")
+        self.cache.get(path)
+        self.level_file("a.json", gap_top=100)
+        self.cache.get(path)
+        self.assertEqual(self.cache.misses, 2)
+
+    def test_packed_levels(self):
+        path = os.path.join(self.dir, "a.fblv")
+        write_level_binary(sample_level(), path)
+        self.assertEqual(self.cache.get(path), self.cache.get(self.level_file("a.json")))
+
+    def test_least_recently_used_is_evicted(self):
+        paths = [self.level_file(f"{i}.json", gap_top=100 + i * 10) for i in range(3)]
+        self.cache.get(paths[0])
+        self.cache.get(paths[1])
+        # make the first one the most recent, so the second one goes when a third comes in
+        past = time.time() - 100
+        for entry in os.scandir(self.cache.directory):
+            os.utime(entry.path, (past, past))
+        self.cache.get(paths[0])
+        self.cache.get(paths[2])
+        self.assertEqual(len(os.listdir(self.cache.directory)), 2)
+        hits = self.cache.hits
+        self.cache.get(paths[0])
+        self.assertEqual(self.cache.hits, hits + 1)
+        self.cache.get(paths[1])
+        self.assertEqual(self.cache.hits, hits + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
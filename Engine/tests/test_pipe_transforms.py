@@ -0,0 +1,106 @@
+"""
+Bulk pipe transforms and the limits they keep gaps in
+
+    python -m unittest discover -s tests
+"""
+import os
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import pipe_transforms as pt
+from level_model import GAP_TOP_MARGIN, GROUND_HEIGHT, LEVEL_HEIGHT, clamp_gap_top
+from level_table import PipeTable
+
+FLOOR = LEVEL_HEIGHT - GROUND_HEIGHT
+
+
+def selection():
+    return pt.columns([100.0, 400.0, 550.0, 900.0], [20.0, 200.0, 380.0, 100.0], [60, 60, 80, 60],
+                      [150.0, 120.0, 150.0, 150.0])
+
+
+class PipeTransformsTest(unittest.TestCase):
+    def assertInBounds(self, gap_top, gap_height):
+        self.assertTrue(np.all(gap_top >= GAP_TOP_MARGIN))
+        self.assertTrue(np.all(gap_top + gap_height <= FLOOR))
+
+    def test_clamp_matches_clamp_gap_top(self):
+        gap_top = np.arange(-50.0, 600.0, 7.0)
+        gap_height = np.full_like(gap_top, 150.0)
+        expected = [clamp_gap_top(top, height) for top, height in zip(gap_top, gap_height)]
+        np.testing.assert_array_equal(pt.clamp_gap_tops(gap_top, gap_height), expected)
+
+    def test_shift(self):
+        x, gap_top, width, gap_height = pt.shift(*selection(), 50)
+        np.testing.assert_array_equal(x, [150.0, 450.0, 600.0, 950.0])
+        # the leftmost pipe stops at the level edge and the rest keep their spacing
+        x = pt.shift(*selection(), -500)[0]
+        np.testing.assert_array_equal(x, [0.0, 300.0, 450.0, 800.0])
+
+    def test_scale_spacing(self):
+        x = pt.scale_spacing(*selection(), 2.0)[0]
+        np.testing.assert_array_equal(x, [100.0, 700.0, 1000.0, 1700.0])
+        x = pt.scale_spacing(*selection(), 0.5)[0]
+        np.testing.assert_array_equal(x, [100.0, 250.0, 325.0, 500.0])
+
+    def test_mirror(self):
+        x = pt.mirror(*selection())[0]
+        np.testing.assert_array_equal(x, [900.0, 600.0, 450.0, 100.0])
+        np.testing.assert_array_equal(pt.mirror(*pt.mirror(*selection()))[0], selection()[0])
+
+    def test_set_gap_height_keeps_centres(self):
+        _, gap_top, _, gap_height = pt.set_gap_height(*selection(), 200)
+        np.testing.assert_array_equal(gap_height, [200.0] * 4)
+        # the first gap grows into the ceiling margin and the third into the ground, both get pushed back
+        np.testing.assert_array_equal(gap_top, [GAP_TOP_MARGIN, 160.0, FLOOR - 200, 75.0])
+        self.assertInBounds(gap_top, gap_height)
+
+    def test_set_gap_height_taller_than_the_room(self):
+        _, gap_top, _, gap_height = pt.set_gap_height(*selection(), FLOOR - GAP_TOP_MARGIN)
+        np.testing.assert_array_equal(gap_top, [GAP_TOP_MARGIN] * 4)
+
+    def test_randomize_gap_height(self):
+        first = pt.randomize_gap_height(*selection(), 90, 110, seed=3)
+        second = pt.randomize_gap_height(*selection(), 90, 110, seed=3)
+        np.testing.assert_array_equal(first[3], second[3])
+        self.assertTrue(np.all((first[3] >= 90) & (first[3] <= 110)))
+        self.assertInBounds(first[1], first[3])
+
+    def test_jitter_gap_top(self):
+        before = selection()
+        _, gap_top, _, gap_height = pt.jitter_gap_top(*before, 40, seed=1)
+        self.assertIs(gap_height, before[3])
+        self.assertTrue(np.all(np.abs(gap_top - pt.clamp_gap_tops(before[1], gap_height)) <= 40))
+        self.assertInBounds(gap_top, gap_height)
+
+    def test_copy_and_paste(self):
+        clip = pt.copy(*selection())
+        np.testing.assert_array_equal(clip[0], [0.0, 300.0, 450.0, 800.0])
+        np.testing.assert_array_equal(pt.paste(clip, 2000.0)[0], [2000.0, 2300.0, 2450.0, 2800.0])
+        np.testing.assert_array_equal(pt.paste(clip, -300.0)[0], clip[0])
+
+    def test_empty_selection(self):
+        empty = pt.columns([], [], [], [])
+        for transform in (lambda *c: pt.shift(*c, -10), lambda *c: pt.scale_spacing(*c, 2), pt.mirror,
+                          lambda *c: pt.set_gap_height(*c, 100), pt.copy):
+            self.assertEqual([len(column) for column in transform(*empty)], [0, 0, 0, 0])
+
+    def test_changed_writes_back(self):
+        table = PipeTable({'x': 400.0 + i * 250, 'gap_top': 100.0, 'width': 60, 'gap_height': 150.0}
+                          for i in range(6))
+        rows = [1, 2, 4]
+        before = pt.columns(*table.take(rows))
+        after = pt.set_gap_height(*before, 100)
+        update = pt.changed(before, after)
+        self.assertEqual([column is None for column in update], [True, False, True, False])
+        table.update_many(rows, *update)
+        self.assertEqual([table.gap_height[row] for row in range(6)], [150.0, 100.0, 100.0, 150.0, 100.0, 150.0])
+        self.assertEqual([table.gap_top[row] for row in rows], [125.0] * 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
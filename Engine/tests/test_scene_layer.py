@@ -0,0 +1,144 @@
+"""
+SceneLayer against a stand-in canvas: items follow the view, get pooled and reused, restyles stay local
+
+    python -m unittest discover -s tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from scene_layer import GROUND_HEIGHT, SceneLayer
+
+HEIGHT = 600
+
+
+class Canvas:
+    """Keeps every item's kind, coords and options, counts itemconfig calls per item"""
+
+    def __init__(self):
+        self.items = {}
+        self.configs = {}
+        self.next_id = 0
+        self.options = {}
+
+    def _create(self, kind, coords, options):
+        self.next_id += 1
+        self.items[self.next_id] = {"kind": kind, "coords": list(coords), **options}
+        return self.next_id
+
+    def create_rectangle(self, *coords, **options):
+        return self._create("rectangle", coords, options)
+
+    def create_oval(self, *coords, **options):
+        return self._create("oval", coords, options)
+
+    def create_text(self, *coords, **options):
+        return self._create("text", coords, options)
+
+    def coords(self, item, *coords):
+        self.items[item]["coords"] = list(coords)
+
+    def itemconfig(self, item, **options):
+        self.items[item].update(options)
+        self.configs[item] = self.configs.get(item, 0) + 1
+
+    def delete(self, item):
+        del self.items[item]
+
+    def tag_lower(self, item, below):
+        pass
+
+    def config(self, **options):
+        self.options.update(options)
+
+    def visible(self):
+        return [item for item, options in self.items.items() if options.get("state") != 'hidden']
+
+
+def pipe(x, gap_top=200, width=60, gap_height=150):
+    return {'x': x, 'gap_top': gap_top, 'width': width, 'gap_height': gap_height}
+
+
+class SceneLayerTest(unittest.TestCase):
+    def setUp(self):
+        self.canvas = Canvas()
+        self.scene = SceneLayer(self.canvas, HEIGHT)
+        self.pipes = {i: pipe(300.0 + 200 * i) for i in range(10)}
+        self.powerups = {i: {'x': 400.0 + 200 * i, 'y': 250, 'type': 'speed'} for i in range(5)}
+
+    def top(self, key):
+        return self.canvas.items[self.scene.pipe_items[key][0]]
+
+    def test_pipe_items(self):
+        self.scene.add_pipe(1, self.pipes[1])
+        top, bottom, marker = (self.canvas.items[item] for item in self.scene.pipe_items[1])
+        self.assertEqual(top["coords"], [470.0, 0, 530.0, 200])
+        self.assertEqual(bottom["coords"], [470.0, 350, 530.0, HEIGHT - GROUND_HEIGHT])
+        self.assertEqual(marker["coords"], [495.0, 270, 505.0, 280])
+        self.assertEqual(top["fill"], 'green')
+        self.pipes[1]['gap_top'] = 100
+        self.scene.update_pipe(1, self.pipes[1])
+        self.assertEqual(top["coords"][3], 100)
+        # not materialized, nothing to move
+        self.scene.update_pipe(2, self.pipes[2])
+        self.assertEqual(len(self.canvas.items), 3)
+
+    def test_sync_pools_and_reuses_items(self):
+        self.scene.sync(range(0, 4), self.pipes, range(0, 2), self.powerups)
+        self.assertEqual(len(self.canvas.items), 4 * 3 + 2 * 2)
+        created = self.canvas.next_id
+        # scrolled right, two pipes and a power-up left the view, as many came in
+        self.scene.sync(range(2, 6), self.pipes, range(1, 3), self.powerups)
+        self.assertEqual(self.canvas.next_id, created)
+        self.assertEqual(sorted(self.scene.pipe_items), [2, 3, 4, 5])
+        self.assertEqual(len(self.canvas.visible()), 4 * 3 + 2 * 2)
+        left = self.canvas.items[self.scene.pipe_items[5][0]]["coords"][0]
+        self.assertEqual(left, self.pipes[5]['x'] - 30)
+        oval, text = self.scene.powerup_items[2]
+        self.assertEqual(self.canvas.items[oval]["coords"], [785.0, 235, 815.0, 265])
+        self.assertEqual(self.canvas.items[text]["coords"], [800.0, 250])
+        # scrolled away entirely, everything is hidden, nothing deleted
+        self.scene.sync([], self.pipes, [], self.powerups)
+        self.assertEqual(self.canvas.visible(), [])
+        self.assertEqual(len(self.canvas.items), created)
+
+    def test_pool_limit(self):
+        self.scene.POOL_LIMIT = 2
+        self.scene.sync(range(5), self.pipes, [], self.powerups)
+        self.scene.sync([], self.pipes, [], self.powerups)
+        self.assertEqual(len(self.scene.pipe_pool), 2)
+        self.assertEqual(len(self.canvas.items), 2 * 3)
+
+    def test_selection_restyles_only_what_changed(self):
+        self.scene.sync(range(5), self.pipes, [], self.powerups)
+        before = dict(self.canvas.configs)
+        self.scene.set_selected_pipe(1)
+        self.scene.set_selection(frozenset({2, 3}))
+        self.scene.set_pipe_flags({4: 2})
+        changed = {item for item, n in self.canvas.configs.items() if n != before.get(item)}
+        expected = {item for key in (1, 2, 3, 4) for item in self.scene.pipe_items[key]}
+        self.assertEqual(changed, expected)
+        fills = [self.top(key)["fill"] for key in (0, 1, 2, 4)]
+        self.assertEqual(fills, ['green', 'yellow', 'yellow', 'green'])
+        self.assertEqual((self.top(4)["outline"], self.top(4)["width"]), ('red', 4))
+        self.scene.set_selected_pipe(None)
+        self.assertEqual((self.top(1)["fill"], self.top(1)["outline"]), ('green', 'darkgreen'))
+
+    def test_ground_background_and_clear(self):
+        self.scene.set_background(255, 0, 16)
+        self.assertEqual(self.canvas.options, {"bg": '#ff0010'})
+        self.scene.draw_ground(800)
+        self.scene.draw_ground(1600)
+        ground = self.canvas.items[self.scene.ground_item]
+        self.assertEqual(ground["coords"], [0, HEIGHT - GROUND_HEIGHT, 1600, HEIGHT])
+        self.scene.sync(range(3), self.pipes, range(2), self.powerups)
+        self.scene.sync([0], self.pipes, [], self.powerups)
+        self.scene.clear()
+        self.assertEqual(list(self.canvas.items), [self.scene.ground_item])
+        self.assertEqual((self.scene.pipe_items, self.scene.pipe_pool, self.scene.powerup_pool), ({}, [], []))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+"""
+SortedXIndex against a plain list of (x, key) pairs
+
+    python -m unittest discover -s tests
+"""
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from spatial_index import SortedXIndex
+
+
+class SortedXIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.rng = random.Random(2)
+        self.index = SortedXIndex()
+        # x -> key pairs, xs are drawn from few values so ties are common
+        self.entries = {}
+
+    def random_x(self):
+        return float(self.rng.randrange(0, 2000, 25))
+
+    def assertMatches(self):
+        expected = sorted((x, key) for key, x in self.entries.items())
+        self.assertEqual(list(zip(self.index.xs, self.index.keys)), expected)
+        for _ in range(20):
+            lo = self.random_x() - 10
+            hi = lo + self.rng.choice((0, 30, 300))
+            self.assertEqual(list(self.index.range(lo, hi)), [key for x, key in expected if lo <= x <= hi])
+
+    def test_build(self):
+        self.entries = {key: self.random_x() for key in range(300)}
+        self.index.build((x, key, self.rng.randint(10, 40)) for key, x in self.entries.items())
+        self.assertMatches()
+
+    def test_insert_and_remove(self):
+        for key in range(300):
+            self.entries[key] = self.random_x()
+            self.index.insert(self.entries[key], key)
+        self.assertMatches()
+        for key in self.rng.sample(sorted(self.entries), 150):
+            self.assertTrue(self.index.remove(self.entries.pop(key), key))
+        self.assertMatches()
+        self.assertFalse(self.index.remove(12345.0, 1))
+        key = next(iter(self.entries))
+        self.assertFalse(self.index.remove(self.entries[key] + 1, key))
+
+    def test_move_many(self):
+        for key in range(200):
+            self.entries[key] = self.random_x()
+            self.index.insert(self.entries[key], key)
+        for _ in range(10):
+            keys = self.rng.sample(sorted(self.entries), self.rng.randint(1, 60))
+            # moved as a block, like a range selection dragged sideways, plus one key that is new
+            dx = self.rng.choice((-50.0, 25.0, 400.0))
+            keys.append(1000 + len(self.entries))
+            xs = [self.entries.get(key, 0.0) + dx for key in keys]
+            self.entries.update(zip(keys, xs))
+            self.index.move_many(keys, xs)
+            self.assertMatches()
+
+    def test_remove_many(self):
+        for key in range(100):
+            self.entries[key] = self.random_x()
+            self.index.insert(self.entries[key], key)
+        gone = self.rng.sample(sorted(self.entries), 40)
+        self.index.remove_many(gone)
+        for key in gone:
+            del self.entries[key]
+        self.assertMatches()
+
+    def test_near_uses_the_widest_extent(self):
+        self.index.insert(100.0, 1, extent=10)
+        self.index.insert(300.0, 2, extent=30)
+        self.assertEqual(list(self.index.near(125.0)), [1])
+        self.assertEqual(list(self.index.near(125.0, extent=5)), [])
+        self.index.clear()
+        self.assertEqual((len(self.index), self.index.max_extent), (0, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
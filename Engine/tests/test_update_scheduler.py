@@ -0,0 +1,86 @@
+"""
+UpdateScheduler coalescing, driven by a stand-in for Tk's after()
+
+    python -m unittest discover -s tests
+"""
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from update_scheduler import UpdateScheduler
+
+
+class Root:
+    """Keeps after() callbacks and their delays for the test to run by hand"""
+
+    def __init__(self):
+        self.pending = {}
+        self.delays = []
+        self.next_id = 0
+
+    def after(self, ms, func):
+        self.next_id += 1
+        self.pending[self.next_id] = func
+        self.delays.append(ms)
+        return self.next_id
+
+    def after_cancel(self, after_id):
+        self.pending.pop(after_id, None)
+
+    def run(self):
+        due, self.pending = self.pending, {}
+        for func in due.values():
+            func()
+
+
+class UpdateSchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.root = Root()
+        self.flush = mock.Mock()
+        self.updates = UpdateScheduler(self.root, self.flush, frame_ms=16)
+
+    def test_burst_is_one_flush(self):
+        for _ in range(50):
+            self.updates.request()
+        self.assertEqual(len(self.root.pending), 1)
+        self.flush.assert_not_called()
+        self.root.run()
+        self.flush.assert_called_once_with()
+        self.assertEqual((self.updates.received, self.updates.performed), (50, 1))
+
+    def test_nothing_requested_nothing_flushed(self):
+        self.updates.flush_now()
+        self.root.run()
+        self.flush.assert_not_called()
+
+    def test_next_flush_waits_out_the_frame(self):
+        with mock.patch("update_scheduler.time.perf_counter", side_effect=[10.0, 10.0, 10.004]):
+            self.updates.request()
+            self.root.run()
+            self.updates.request()
+        # the first flush goes out right away, the second one waits for the rest of the 16ms frame
+        self.assertEqual(self.root.delays, [1, 12])
+
+    def test_flush_after_a_quiet_spell_is_immediate(self):
+        with mock.patch("update_scheduler.time.perf_counter", side_effect=[10.0, 10.0, 11.0]):
+            self.updates.request()
+            self.root.run()
+            self.updates.request()
+        self.assertEqual(self.root.delays, [1, 1])
+
+    def test_flush_now(self):
+        self.updates.request()
+        self.updates.request()
+        self.updates.flush_now()
+        self.flush.assert_called_once_with()
+        # the scheduled flush was cancelled, not left to run a second time
+        self.assertEqual(self.root.pending, {})
+        self.updates.request()
+        self.assertEqual(len(self.root.pending), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()